@@ -0,0 +1,125 @@
+"""
+Índice de agregados por mes sobre las transacciones.
+
+Se construye una sola vez por versión, a partir del cubo de transacciones
+(ver cube.py), para que los endpoints por mes
+(`/summary`, `/expenses_donut`, `/budget_progress`, ...) sean búsquedas en un
+diccionario en lugar de filtrar todo `tx` en cada request.
+"""
+from typing import Dict, NamedTuple
+import numpy as np
+import pandas as pd
+
+
+class MonthAggregate(NamedTuple):
+    start: int                 # offset (iloc) de la primera fila del mes en `tx` ordenado
+    stop: int                  # offset exclusivo de la última fila
+    ingresos: float
+    gastos: float
+    gastos_cat: pd.DataFrame   # category, amount (ordenado desc)
+
+    @property
+    def rows(self) -> int:
+        return self.stop - self.start
+
+
+EMPTY_MONTH = MonthAggregate(
+    0, 0, 0.0, 0.0,
+    pd.DataFrame({"category": pd.Series(dtype=object), "amount": pd.Series(dtype=float)}),
+)
+
+
+def cents(x):
+    """Montos redondeados a centavos, como vienen en el CSV: las sumas de floats
+    (y las restas de acumulados en ranges.py) dejan ruido en los últimos dígitos
+    y un mes pedido como `month` o como rango `from`/`to` debe dar lo mismo."""
+    return np.round(x, 2)
+
+
+def sort_by_month(tx: pd.DataFrame) -> pd.DataFrame:
+    """Ordena `tx` por (month, date) de forma estable.
+
+    El índice original se conserva como id de fila, así que dentro de una
+    misma fecha se mantiene el orden del CSV.
+    """
+    return tx.sort_values(["month", "date"], kind="stable")
+
+
+def build_month_index(cube: pd.DataFrame) -> Dict[str, MonthAggregate]:
+    """Totales de ingresos/gastos, gasto por categoría y offsets de filas por mes,
+    a partir del cubo de transacciones (`cube.build_cube`).
+
+    Los offsets son la cantidad de filas acumulada por mes: valen para `tx`
+    ordenado con `sort_by_month`.
+    """
+    if cube.empty:
+        return {}
+
+    rows = cube.groupby("month", sort=True)["count"].sum()
+    keys = rows.index.to_numpy()
+    stops = np.cumsum(rows.to_numpy())
+    starts = stops - rows.to_numpy()
+
+    totals = (
+        cube.groupby(["month", "type"], observed=True)["sum"].sum()
+            .unstack(fill_value=0.0)
+            .reindex(index=keys, columns=["Ingreso", "Gasto"], fill_value=0.0)
+    )
+
+    gastos = cube[cube["type"] == "Gasto"]
+    by_cat = {
+        m: g.droplevel(0).rename_axis("category").reset_index(name="amount")
+            .assign(amount=lambda d: cents(d["amount"]))
+            .sort_values("amount", ascending=False, kind="stable")
+            .reset_index(drop=True)
+        for m, g in gastos.groupby(["month", "category"], observed=True)["sum"].sum().groupby(level=0)
+    }
+
+    index = {}
+    for m, start, stop, ing, gas in zip(keys, starts, stops,
+                                         totals["Ingreso"].to_numpy(), totals["Gasto"].to_numpy()):
+        index[str(m)] = MonthAggregate(
+            int(start), int(stop), float(cents(ing)), float(cents(gas)),
+            by_cat.get(m, EMPTY_MONTH.gastos_cat),
+        )
+    return index
+
+
+def apply_batch(index: Dict[str, MonthAggregate], delta: pd.DataFrame) -> Dict[str, MonthAggregate]:
+    """Índice con las filas de un lote sumadas (`delta`: su cubo), sin volver a recorrer `tx`.
+
+    Solo se recalculan los meses que trae el lote; los offsets se desplazan
+    con las cantidades de filas por mes (O(meses)).
+    """
+    delta = build_month_index(delta)
+    out, offset = {}, 0
+    for m in sorted(set(index) | set(delta)):
+        old, new = index.get(m), delta.get(m)
+        rows = (old.rows if old else 0) + (new.rows if new else 0)
+        if old is None or new is None:
+            agg = (old or new)._replace(start=offset, stop=offset + rows)
+        else:
+            cat = (
+                pd.concat([old.gastos_cat, new.gastos_cat])
+                  .groupby("category", as_index=False, observed=True, sort=False)["amount"].sum()
+                  .assign(amount=lambda d: cents(d["amount"]))
+                  .sort_values("amount", ascending=False, kind="stable")
+                  .reset_index(drop=True)
+            )
+            agg = MonthAggregate(offset, offset + rows, float(cents(old.ingresos + new.ingresos)),
+                                 float(cents(old.gastos + new.gastos)), cat)
+        out[m] = agg
+        offset += rows
+    return out
+
+
+def cash_monthly(index: Dict[str, MonthAggregate]) -> pd.DataFrame:
+    """Flujo neto y efectivo acumulado por mes a partir del índice (O(meses))."""
+    months = sorted(index)
+    flow = np.array([index[m].ingresos - index[m].gastos for m in months], dtype=float)
+    return pd.DataFrame({"month": months, "net_cash_flow": flow, "cumulative_cash": np.cumsum(flow)})
+
+
+def index_by_month(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Parte una tabla mensual (p.ej. `budgets`) en un dict month -> filas."""
+    return {str(m): g.reset_index(drop=True) for m, g in df.groupby("month", sort=True)}
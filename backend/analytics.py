@@ -0,0 +1,182 @@
+"""
+Métricas de riesgo/retorno del portafolio (`/investments_analytics`).
+
+Todo se calcula sobre `Dataset.price_matrix` (fechas x activos, ya armada una
+vez por versión de precios) como arreglos de NumPy, en pasadas vectorizadas:
+retornos por activo, pesos del período anterior y retorno del portafolio
+encadenado (time-weighted). El costo es O(fechas x activos), sin merges ni
+ordenamientos por request.
+"""
+from typing import Any, Dict, Optional, Sequence, Tuple
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from networth import units_at
+
+# Tope de la correlación móvil: pares por request y fechas por par
+MAX_ROLLING_PAIRS = 20
+MAX_ROLLING_POINTS = 500
+
+
+def _num(x: float) -> Optional[float]:
+    x = float(x)
+    return x if np.isfinite(x) else None
+
+
+def periods_per_year(dates: pd.DatetimeIndex) -> float:
+    """Frecuencia de los precios (12 si son mensuales, ~252-365 si son diarios)."""
+    if len(dates) < 2:
+        return 1.0
+    step_days = float(np.median(np.diff(dates.values).astype("timedelta64[s]").astype(float))) / 86400
+    return 365.25 / step_days if step_days > 0 else 1.0
+
+
+def asset_returns(prices: np.ndarray) -> np.ndarray:
+    """Retorno simple por período y activo; NaN donde el activo aún no tiene precio."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return prices[1:] / prices[:-1] - 1.0
+
+
+def nan_corr(returns: np.ndarray) -> np.ndarray:
+    """Correlación entre columnas usando las filas donde ambas tienen dato."""
+    valid = np.isfinite(returns)
+    x = np.where(valid, returns, 0.0)
+    v = valid.astype(float)
+    n = v.T @ v
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sx = x.T @ v                     # suma de i sobre filas donde j también tiene dato
+        sxx = (x * x).T @ v
+        sxy = x.T @ x
+        cov = sxy - sx * sx.T / n
+        var_i = sxx - sx * sx / n
+        corr = cov / np.sqrt(var_i * var_i.T)
+    corr[n < 3] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def rolling_corr(returns: np.ndarray, dates: pd.DatetimeIndex, assets: pd.Index,
+                 pairs: Sequence[Tuple[str, str]], window: int, max_points: int) -> Tuple[pd.DataFrame, int]:
+    """Correlación móvil de `window` períodos de cada par de `pairs` (date, asset_a, asset_b, corr).
+
+    Sale de sumas acumuladas por par, O(fechas x pares), sin armar la matriz
+    fecha x activo x activo. Cada fecha usa las filas de la ventana donde
+    ambos activos tienen dato (al menos `min(3, window)`, como `nan_corr`).
+    Se devuelven como mucho `max_points` fechas por par, una cada `step`
+    terminando en la última; devuelve también ese `step`.
+    """
+    t = len(returns)
+    a = assets.get_indexer([p[0] for p in pairs])
+    b = assets.get_indexer([p[1] for p in pairs])
+    if t == 0 or not len(pairs):
+        return pd.DataFrame(columns=["date", "asset_a", "asset_b", "corr"]), 1
+    x, y = returns[:, a], returns[:, b]                          # (T, pares)
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+
+    step = max(1, -(-t // max_points))
+    rows = np.arange(t - 1, -1, -step)[::-1]
+    lo = np.maximum(rows + 1 - window, 0)
+
+    def windowed(v: np.ndarray) -> np.ndarray:
+        c = np.concatenate([np.zeros((1, v.shape[1])), np.cumsum(v, axis=0)])
+        return c[rows + 1] - c[lo]
+
+    n, sx, sy = windowed(valid.astype(float)), windowed(x), windowed(y)
+    sxx, syy, sxy = windowed(x * x), windowed(y * y), windowed(x * y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = (sxy - sx * sy / n) / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+    corr[n < min(3, window)] = np.nan
+    return pd.DataFrame({
+        "date": np.repeat(dates[rows].strftime("%Y-%m-%d").to_numpy(), len(pairs)),
+        "asset_a": np.tile(np.asarray([p[0] for p in pairs], dtype=object), len(rows)),
+        "asset_b": np.tile(np.asarray([p[1] for p in pairs], dtype=object), len(rows)),
+        "corr": np.clip(corr, -1.0, 1.0).ravel(),
+    }), step
+
+
+def portfolio_analytics(matrix: pd.DataFrame, holdings: pd.DataFrame, window: int = 12,
+                        risk_free: float = 0.0, pairs: Sequence[Tuple[str, str]] = (),
+                        max_points: int = MAX_ROLLING_POINTS) -> Dict[str, Any]:
+    """`risk_free` es la tasa libre de riesgo anual (0.05 = 5%); `window` es la
+    cantidad de períodos de la correlación: la matriz usa los últimos `window`.
+    La correlación móvil (`rolling`) solo se calcula para los `pairs` pedidos,
+    con hasta `max_points` fechas por par."""
+    assets = matrix.columns
+    dates = matrix.index
+    prices = matrix.to_numpy(dtype=float)
+    units = units_at(holdings, dates, assets)                  # (T, A): las posiciones pueden cambiar
+    ppy = periods_per_year(dates)
+
+    held = (units != 0).any(axis=0)
+    values = np.nan_to_num(prices) * units                     # (T, A)
+    total = values.sum(axis=1)
+    r = asset_returns(prices)                                  # (T-1, A)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w_prev = np.where(total[:-1, None] > 0, values[:-1] / total[:-1, None], 0.0)
+    contrib = w_prev * np.nan_to_num(r)                        # aporte de cada activo al retorno del período
+    port_r = contrib.sum(axis=1)
+
+    wealth = np.cumprod(1.0 + port_r)
+    twr = wealth[-1] - 1.0 if len(wealth) else 0.0
+    years = len(port_r) / ppy
+    ann_return = (1.0 + twr) ** (1.0 / years) - 1.0 if years > 0 and twr > -1 else np.nan
+    vol = port_r.std(ddof=1) * np.sqrt(ppy) if len(port_r) > 1 else np.nan
+    excess = port_r.mean() * ppy - risk_free if len(port_r) else np.nan
+    sharpe = excess / vol if vol and np.isfinite(vol) and vol > 0 else np.nan
+    peak = np.maximum.accumulate(np.concatenate([[1.0], wealth]))
+    drawdown = np.concatenate([[1.0], wealth]) / peak - 1.0
+
+    asset_total = asset_vol = np.full(len(assets), np.nan)
+    if len(dates):
+        first = prices[np.argmax(np.isfinite(prices), axis=0), np.arange(len(assets))]
+        asset_total = prices[-1] / first - 1.0
+    if len(r) > 1:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)   # activos sin suficientes precios -> NaN
+            asset_vol = np.nanstd(r, axis=0, ddof=1) * np.sqrt(ppy)
+    last_total = total[-1] if len(total) else 0.0
+
+    per_asset = pd.DataFrame({
+        "asset": assets.astype(str),
+        "units": units[-1] if len(units) else np.zeros(len(assets)),
+        "value": values[-1] if len(values) else np.zeros(len(assets)),
+        "weight_pct": (values[-1] / last_total * 100) if last_total else np.zeros(len(assets)),
+        "return_pct": asset_total * 100,
+        "contribution_pct": contrib.sum(axis=0) * 100,
+        "volatility_pct": asset_vol * 100,
+    })[held].sort_values("contribution_pct", ascending=False)
+
+    recent = r[-window:][:, held] if window > 0 else r[:0][:, held]
+    corr = pd.DataFrame(nan_corr(recent) if len(recent) else np.full((held.sum(),) * 2, np.nan),
+                        columns=assets[held].astype(str))
+    corr.insert(0, "asset", assets[held].astype(str))
+    correlation = {"window": window, "matrix": corr}
+    if pairs:
+        correlation["rolling"], correlation["rolling_step"] = rolling_corr(
+            r, dates[1:], assets.astype(str), pairs, window, max_points)
+
+    series = pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "value": total,
+        "twr_pct": np.concatenate([[0.0], wealth - 1.0]) * 100,
+        "drawdown_pct": drawdown * 100,
+    }) if len(dates) else pd.DataFrame(columns=["date", "value", "twr_pct", "drawdown_pct"])
+
+    return {
+        "start": dates[0].strftime("%Y-%m-%d") if len(dates) else None,
+        "end": dates[-1].strftime("%Y-%m-%d") if len(dates) else None,
+        "periods_per_year": _num(ppy),
+        "metrics": {
+            "twr_pct": _num(twr * 100),
+            "annualized_return_pct": _num(ann_return * 100),
+            "volatility_pct": _num(vol * 100),
+            "max_drawdown_pct": _num(drawdown.min() * 100),
+            "sharpe": _num(sharpe),
+            "risk_free_pct": _num(risk_free * 100),
+        },
+        "assets": per_asset,
+        "correlation": correlation,
+        "series": series,
+    }
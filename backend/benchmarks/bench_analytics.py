@@ -0,0 +1,57 @@
+"""
+Benchmark: `/investments_analytics` con muchos activos y precios diarios.
+
+Uso (desde la raíz del repo):
+    python backend/benchmarks/bench_analytics.py
+
+Genera precios sintéticos (caminata aleatoria geométrica, activos que
+empiezan a cotizar en fechas distintas) y mide por separado el armado de la
+matriz de precios y de posiciones (una vez por versión) y el cálculo de las
+métricas (por request).
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+
+from analytics import portfolio_analytics
+from networth import holdings_matrix, price_matrix
+
+
+def synthetic_prices(n_assets: int, years: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2000-01-03", periods=years * 252)
+    paths = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (len(dates), n_assets)), axis=0))
+    starts = rng.integers(0, len(dates) // 2, n_assets)
+    paths[np.arange(len(dates))[:, None] < starts] = np.nan
+    assets = [f"A{i:04d}" for i in range(n_assets)]
+    prices = (
+        pd.DataFrame(paths, index=dates, columns=assets).rename_axis("date")
+          .stack().rename("price").reset_index().rename(columns={"level_1": "asset"})
+    )
+    hold = pd.DataFrame({"asset": assets, "units": rng.uniform(10, 1000, n_assets)})
+    return prices, hold
+
+
+def main():
+    print(f"{'activos':>8} {'años':>5} {'filas':>12} {'matriz (s)':>11} {'métricas (ms)':>14}")
+    for n_assets, years in ((10, 20), (100, 20), (500, 30)):
+        prices, hold = synthetic_prices(n_assets, years)
+        t0 = time.perf_counter()
+        matrix = price_matrix(prices)
+        holdings = holdings_matrix(hold)
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(5):
+            portfolio_analytics(matrix, holdings, window=252)
+        metrics_ms = (time.perf_counter() - t0) / 5 * 1000
+        print(f"{n_assets:>8} {years:>5} {len(prices):>12,} {build_s:>11.3f} {metrics_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
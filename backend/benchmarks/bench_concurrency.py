@@ -0,0 +1,97 @@
+"""
+Benchmark: latencia con 1, 50 y 500 clientes concurrentes.
+
+Uso (desde la raíz del repo):
+    python backend/benchmarks/bench_concurrency.py
+
+Levanta la API con uvicorn en otro proceso (datos de `backend/data/` sobre
+`MemoryStorage`) y, para cada nivel de concurrencia, cada cliente hace varios
+requests seguidos a vistas con parámetros distintos (para no caer siempre en
+la caché de ETag). Reporta p50/p99 de los 200 y cuántos requests se
+rechazaron con 503 por la cola acotada (`COMPUTE_MAX_QUEUE`).
+"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+REQUESTS_PER_CLIENT = 10
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, **env_overrides: str) -> subprocess.Popen:
+    env = {**os.environ, "STORAGE_BACKEND": "memory", "DATA_REFRESH_SECONDS": "0",
+           "DATA_CACHE_DIR": "off", "LOG_LEVEL": "WARNING", **env_overrides}
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND,
+                             "--port", str(port), "--log-level", "warning",
+                             # más que lo que una conexión puede esperar libre en el pool del cliente
+                             "--timeout-keep-alive", "120"], env=env)
+    deadline = time.monotonic() + 600
+    while time.monotonic() < deadline and proc.poll() is None:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("La API no arrancó")
+
+
+def random_path(rng: random.Random) -> str:
+    return rng.choice([
+        f"/net_worth_series?resolution=daily&from=2024-{rng.randint(4, 12):02d}-{rng.randint(1, 28):02d}",
+        f"/investments_analytics?window={rng.randint(2, 500)}",
+        f"/budget_forecast?month=all&day={rng.randint(1, 31)}&_={rng.random()}",
+        f"/summary?month=2024-{rng.randint(4, 12):02d}&_={rng.random()}",
+    ])
+
+
+async def client(http: httpx.AsyncClient, seed: int, latencies: list, statuses: dict):
+    rng = random.Random(seed)
+    for _ in range(REQUESTS_PER_CLIENT):
+        t0 = time.perf_counter()
+        r = await http.get(random_path(rng))
+        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+        if r.status_code == 200:
+            latencies.append(time.perf_counter() - t0)
+
+
+async def run_level(base: str, clients: int):
+    latencies, statuses = [], {}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=120) as http:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client(http, i, latencies, statuses) for i in range(clients)))
+        elapsed = time.perf_counter() - t0
+    ms = np.array(latencies) * 1000
+    p50, p99 = (np.percentile(ms, [50, 99]) if len(ms) else (float("nan"),) * 2)
+    total = sum(statuses.values())
+    print(f"{clients:>9} {total:>9} {total / elapsed:>8.0f} {p50:>9.1f} {p99:>9.1f} {statuses.get(503, 0):>6}")
+
+
+def main():
+    port = free_port()
+    proc = start_server(port)
+    try:
+        print(f"{'clientes':>9} {'requests':>9} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'503':>6}")
+        for clients in (1, 50, 500):
+            asyncio.run(run_level(f"http://127.0.0.1:{port}", clients))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
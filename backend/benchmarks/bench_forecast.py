@@ -0,0 +1,63 @@
+"""
+Benchmark: `/budget_forecast` para todos los meses x todas las categorías.
+
+Uso (desde la raíz del repo):
+    python backend/benchmarks/bench_forecast.py
+
+Mide el armado del cubo de gasto diario (una vez por versión de
+`transactions.csv`) y la proyección de todos los meses (`month=all`), contra
+una versión ingenua que filtra `tx` por mes y categoría en un bucle.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_month_index import synthetic_tx
+from cube import build_cube
+from forecast import budget_limits, build_spend_cube, forecast
+
+
+def synthetic_budgets(tx: pd.DataFrame, n_categories: int) -> pd.DataFrame:
+    months = np.unique(tx["month"])
+    cats = np.unique(tx["category"])[:n_categories]
+    grid = pd.MultiIndex.from_product([months, cats], names=["month", "category"]).to_frame(index=False)
+    grid["limit"] = 500_000.0
+    return grid
+
+
+def naive(tx: pd.DataFrame, budgets: pd.DataFrame) -> list:
+    out = []
+    for _, b in budgets.iterrows():
+        g = tx[(tx["month"] == b["month"]) & (tx["category"] == b["category"]) & (tx["type"] == "Gasto")]
+        out.append(float(g["amount"].sum()))
+    return out
+
+
+def main():
+    print(f"{'rows':>10} {'meses x cat':>12} {'cubo (s)':>9} {'forecast (ms)':>14} {'bucle (s)':>10}")
+    for n in (10_000, 100_000, 1_000_000):
+        tx = synthetic_tx(n)
+        budgets = synthetic_budgets(tx, 8)
+        t0 = time.perf_counter()
+        cube = build_spend_cube(build_cube(tx))
+        limits = budget_limits(budgets)
+        cube_s = time.perf_counter() - t0
+
+        months = list(limits.index)
+        t0 = time.perf_counter()
+        forecast(cube, limits, months, tx["date"].iloc[-1])
+        fc_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        naive(tx, budgets.head(100))
+        loop_s = (time.perf_counter() - t0) * len(budgets) / 100
+        print(f"{n:>10,} {len(budgets):>12,} {cube_s:>9.3f} {fc_ms:>14.1f} {loop_s:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
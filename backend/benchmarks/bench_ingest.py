@@ -0,0 +1,57 @@
+"""
+Benchmark: ingesta por `POST /transactions/bulk`.
+
+Uso (desde la raíz del repo):
+    python backend/benchmarks/bench_ingest.py
+
+Levanta la API sobre `MemoryStorage` (sin refresco ni caché en disco) y envía
+lotes de distintos tamaños. Reporta filas/s de la ingesta y cuánto tarda
+después `/summary` del mes afectado, que debe seguir siendo O(1) en el tamaño
+de `tx`.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("DATA_REFRESH_SECONDS", "0")
+os.environ.setdefault("DATA_CACHE_DIR", "off")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from dataset import current
+
+CATEGORIES = ["Comida", "Transporte", "Vivienda", "Servicios", "Ocio", "Salud"]
+
+
+def batch(n: int, rng: np.random.Generator) -> list:
+    days = rng.integers(0, 28, n)
+    return [{"date": f"2025-06-{d + 1:02d}", "type": "Gasto", "category": CATEGORIES[d % len(CATEGORIES)],
+             "amount": round(float(a), 2), "description": "bench"}
+            for d, a in zip(days, rng.gamma(2.0, 20_000, n))]
+
+
+def main_bench():
+    rng = np.random.default_rng(0)
+    print(f"{'lote':>7} {'lotes':>6} {'filas/s':>10} {'tx total':>10} {'/summary (ms)':>14}")
+    with TestClient(main.app) as client:
+        for size, repeat in ((1, 200), (100, 100), (1_000, 50), (10_000, 10)):
+            payloads = [{"rows": batch(size, rng)} for _ in range(repeat)]
+            t0 = time.perf_counter()
+            for p in payloads:
+                client.post("/transactions/bulk", json=p).raise_for_status()
+            rate = size * repeat / (time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            client.get("/summary", params={"month": "2025-06"}).raise_for_status()
+            summary_ms = (time.perf_counter() - t0) * 1000
+            print(f"{size:>7,} {repeat:>6} {rate:>10,.0f} {len(current().tx):>10,} {summary_ms:>14.2f}")
+        main.tenants.default.ingestor.flush()
+
+
+if __name__ == "__main__":
+    main_bench()
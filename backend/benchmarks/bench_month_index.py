@@ -0,0 +1,69 @@
+"""
+Benchmark: filtrado por máscara sobre `tx` vs. índice de agregados por mes.
+
+Uso (desde la raíz del repo):
+    python backend/benchmarks/bench_month_index.py
+
+Con el índice la latencia por request debe mantenerse plana al crecer `tx`.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from aggregates import build_month_index, sort_by_month
+from cube import build_cube
+
+CATEGORIES = ["Vivienda", "Transporte", "Comida", "Salud", "Ocio", "Servicios", "Compras", "Otros"]
+
+
+def synthetic_tx(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2015-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 3650, n)), unit="D")
+    df = pd.DataFrame({
+        "date": dates,
+        "type": np.where(rng.random(n) < 0.2, "Ingreso", "Gasto"),
+        "category": rng.choice(CATEGORIES, n),
+        "amount": rng.gamma(2.0, 50_000.0, n).round(2),
+    })
+    df["month"] = df["date"].dt.to_period("M").astype(str)
+    return df
+
+
+def scan(tx: pd.DataFrame, m: str):
+    dfm = tx[tx["month"] == m]
+    ingresos = float(dfm[dfm["type"] == "Ingreso"]["amount"].sum())
+    gastos = float(dfm[dfm["type"] == "Gasto"]["amount"].sum())
+    grp = dfm[dfm["type"] == "Gasto"].groupby("category", as_index=False)["amount"].sum()
+    return ingresos, gastos, grp
+
+
+def lookup(index, m: str):
+    agg = index[m]
+    return agg.ingresos, agg.gastos, agg.gastos_cat
+
+
+def per_call_ms(fn, *args, repeat: int = 50) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main():
+    print(f"{'rows':>10} {'build (ms)':>11} {'scan (ms)':>10} {'index (ms)':>11}")
+    for n in (10_000, 100_000, 1_000_000):
+        tx = sort_by_month(synthetic_tx(n))
+        t0 = time.perf_counter()
+        index = build_month_index(build_cube(tx))
+        build_ms = (time.perf_counter() - t0) * 1000
+        m = max(index)
+        print(f"{n:>10,} {build_ms:>11.1f} {per_call_ms(scan, tx, m):>10.3f} {per_call_ms(lookup, index, m):>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: serialización de `/transactions` con el camino anterior
+(`to_dict` + `_ensure_native` por celda + `jsonable_encoder` + `JSONResponse`)
+vs. `FrameJSONResponse`.
+
+Uso (desde la raíz del repo):
+    python backend/benchmarks/bench_serialization.py
+"""
+import os
+import sys
+import time
+from typing import Any
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_month_index import synthetic_tx
+from serialization import FrameJSONResponse
+
+
+def _ensure_native(obj: Any):
+    if isinstance(obj, (np.integer, np.int64)): return int(obj)
+    if isinstance(obj, (np.floating, np.float64)): return float(obj)
+    if isinstance(obj, (np.bool_,)): return bool(obj)
+    return obj
+
+
+def old_path(m, df) -> bytes:
+    df = df.copy()
+    df["date"] = df["date"].dt.date.astype(str)
+    rows = [{k: _ensure_native(v) for k, v in r.items()} for r in df.to_dict(orient="records")]
+    return JSONResponse(jsonable_encoder({"month": m, "rows": rows})).body
+
+
+def new_path(m, df) -> bytes:
+    df = df.copy()
+    df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+    return FrameJSONResponse({"month": m, "rows": df}).body
+
+
+def timed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    print(f"{'rows':>10} {'anterior (s)':>13} {'FrameJSON (s)':>14} {'x':>7}")
+    for n in (1_000, 100_000, 1_000_000):
+        df = synthetic_tx(n)
+        df["description"] = "Compra " + df["category"]
+        old_s = timed(old_path, "2024-01", df)
+        new_s = timed(new_path, "2024-01", df)
+        print(f"{n:>10,} {old_s:>13.3f} {new_s:>14.3f} {old_s / new_s:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark: tiempo de arranque parseando los CSV vs. desde la caché columnar.
+
+Uso (desde la raíz del repo):
+    python backend/benchmarks/bench_startup.py
+
+Genera un `transactions.csv` sintético de cada tamaño (el resto de CSV se
+copian de `backend/data/`) y mide `load_dataset` en frío (caché vacía) y en
+caliente (caché ya escrita por la carga anterior).
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_month_index import synthetic_tx
+from cache import ColumnarCache
+from dataset import load_dataset
+from storage import DEFAULT_DATA_DIR, LocalStorage
+
+
+def timed_load(storage, cache) -> float:
+    t0 = time.perf_counter()
+    load_dataset(storage, cache)
+    return time.perf_counter() - t0
+
+
+def main():
+    print(f"{'rows':>10} {'csv (s)':>9} {'cold+write (s)':>15} {'warm (s)':>9}")
+    for n in (10_000, 100_000, 1_000_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = os.path.join(tmp, "data")
+            shutil.copytree(DEFAULT_DATA_DIR, data_dir)
+            tx = synthetic_tx(n)
+            tx["description"] = "Compra " + tx["category"]
+            tx["date"] = tx["date"].dt.strftime("%Y-%m-%d")
+            tx[["date", "type", "category", "amount", "description", "month"]].to_csv(
+                os.path.join(data_dir, "transactions.csv"), index=False)
+
+            storage = LocalStorage(data_dir)
+            cache = ColumnarCache(os.path.join(tmp, "cache"))
+            csv_s = timed_load(storage, None)
+            cold_s = timed_load(storage, cache)
+            warm_s = timed_load(storage, cache)
+            print(f"{n:>10,} {csv_s:>9.3f} {cold_s:>15.3f} {warm_s:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
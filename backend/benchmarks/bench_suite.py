@@ -0,0 +1,244 @@
+"""
+Suite de benchmarks reproducible sobre datos sintéticos.
+
+Uso (desde la raíz del repo):
+    python backend/benchmarks/bench_suite.py                       # 10k y 1m
+    python backend/benchmarks/bench_suite.py --sizes 10k,1m,10m --out resultados.json
+    python backend/benchmarks/bench_suite.py --compare anterior.json
+
+Para cada tamaño genera los CSV con `synthetic.py` (una vez; se reutilizan
+entre corridas con la misma semilla) y levanta la API con uvicorn sobre el
+storage local. Mide:
+
+- arranque en frío (parseando los CSV) y en caliente (caché columnar);
+- latencia p50/p95/p99 de cada endpoint, con un parámetro distinto en cada
+  request para no medir la caché de ETag;
+- throughput con varios clientes concurrentes;
+- pico de memoria residente del proceso de la API (`VmHWM`).
+
+Los resultados se guardan en JSON junto con el commit y las versiones, y
+`--compare` marca las métricas que empeoraron más que `--tolerance`.
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_concurrency import free_port, start_server
+from synthetic import SIZES, generate
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+def endpoints(month: str, goal: str, dates: str, first: str) -> Dict[str, str]:
+    """`first`: primer mes con datos; los rangos van de ahí al último mes."""
+    start, end = f"{first}-01", pd.Period(month, "M").end_time.strftime("%Y-%m-%d")
+    middle = (pd.Timestamp(start) + (pd.Timestamp(end) - pd.Timestamp(start)) / 2).strftime("%Y-%m-%d")
+    return {
+        "summary": f"/summary?month={month}",
+        "summary_range": f"/summary?from={middle}&to={end}&compare_to={start}",
+        "expenses_donut": f"/expenses_donut?month={month}",
+        "top_expenses": f"/top_expenses?month={month}&n=10",
+        "top_expenses_range": f"/top_expenses?from={start}&to={end}&n=10",
+        "budget_progress": f"/budget_progress?month={month}",
+        "budget_progress_range": f"/budget_progress?from={middle}&to={end}",
+        "budget_forecast": "/budget_forecast?month=all",
+        "net_worth_series": "/net_worth_series?resolution=daily",
+        "investments_history": "/investments_history",
+        "investments_alloc": "/investments_alloc",
+        "investments_alloc_batch": f"/investments_alloc/batch?dates={dates}",
+        "investments_analytics": "/investments_analytics?window=12",
+        "goals": "/goals",
+        "goal_simulate": f"/goals/{goal}/simulate?paths=2000",
+        "dashboard": f"/dashboard?month={month}&views=summary,donut,top,budget",
+        "months": "/months",
+        "cube_pivot": "/cube?rows=category&columns=month&type=Gasto",
+        "cube_drill": f"/cube?rows=date,description&from={middle}&to={end}&measures=sum,count,max",
+        "transactions_page": f"/transactions?month={month}&limit=200",
+        "transactions_search": "/transactions?month=all&category=Comida&min_amount=100000&limit=200",
+    }
+
+
+def dataset_dir(root: str, size: str, seed: int) -> str:
+    path = os.path.join(root, f"{size}-s{seed}")
+    marker = os.path.join(path, ".done")
+    if not os.path.exists(marker):
+        t0 = time.perf_counter()
+        generate(path, *SIZES[size], seed=seed)
+        open(marker, "w").close()
+        print(f"[{size}] datos generados en {time.perf_counter() - t0:.1f} s", flush=True)
+    return path
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def timed_start(data_dir: str, cache_dir: str):
+    port = free_port()
+    t0 = time.perf_counter()
+    proc = start_server(port, STORAGE_BACKEND="local", LOCAL_DATA_DIR=data_dir, DATA_CACHE_DIR=cache_dir)
+    return proc, port, time.perf_counter() - t0
+
+
+def latency(http: httpx.Client, path: str, repeat: int) -> Dict[str, float]:
+    sep = "&" if "?" in path else "?"
+    ms = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        r = http.get(f"{path}{sep}_={i}")
+        ms.append((time.perf_counter() - t0) * 1000)
+        r.raise_for_status()
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3), "n": repeat}
+
+
+async def throughput(base: str, paths: List[str], clients: int, seconds: float) -> Dict[str, Any]:
+    statuses: Dict[int, int] = {}
+    deadline = time.perf_counter() + seconds
+    counter = iter(range(10**12))
+
+    async def client(http: httpx.AsyncClient, k: int):
+        while time.perf_counter() < deadline:
+            path = paths[k % len(paths)]
+            k += clients
+            sep = "&" if "?" in path else "?"
+            r = await http.get(f"{path}{sep}_=t{next(counter)}")
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    t0 = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=120) as http:
+        await asyncio.gather(*(client(http, k) for k in range(clients)))
+    elapsed = time.perf_counter() - t0
+    return {"clients": clients, "seconds": round(elapsed, 3),
+            "rps": round(statuses.get(200, 0) / elapsed, 2), "statuses": {str(k): v for k, v in statuses.items()}}
+
+
+def run_size(size: str, args) -> Dict[str, Any]:
+    data_dir = dataset_dir(args.data_root, size, args.seed)
+    result: Dict[str, Any] = {"rows": dict(zip(("transactions", "assets", "years"), SIZES[size]))}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        proc, _, result["startup_cold_s"] = timed_start(data_dir, cache_dir)
+        proc.terminate()
+        proc.wait()
+        proc, port, result["startup_warm_s"] = timed_start(data_dir, cache_dir)
+    print(f"[{size}] arranque: frío {result['startup_cold_s']:.2f} s, caliente {result['startup_warm_s']:.2f} s", flush=True)
+
+    base = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(base_url=base, timeout=300) as http:
+            months = http.get("/months").json()["months"]
+            month = months[-1]
+            goal = http.get("/goals").json()["goals"][0]["goal"]
+            dates = ",".join(pd.date_range(end=f"{month}-01", periods=24, freq="MS").strftime("%Y-%m-%d"))
+            paths = endpoints(month, goal, dates, months[0])
+            result["endpoints"] = {}
+            for name, path in paths.items():
+                result["endpoints"][name] = latency(http, path, args.repeat)
+                print(f"[{size}] {name:<24} p50 {result['endpoints'][name]['p50_ms']:>9.2f} ms"
+                      f"  p99 {result['endpoints'][name]['p99_ms']:>9.2f} ms", flush=True)
+        result["throughput"] = asyncio.run(throughput(base, list(paths.values()), args.clients, args.seconds))
+        print(f"[{size}] throughput: {result['throughput']['rps']} req/s con {args.clients} clientes", flush=True)
+        result["peak_rss_mb"] = peak_rss_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ---------------- Comparación ---------------- #
+def _metrics(results: Dict[str, Any]):
+    """(tamaño, métrica) -> valor, donde mayor es peor (salvo throughput)."""
+    for size, r in results["sizes"].items():
+        for key in ("startup_cold_s", "startup_warm_s", "peak_rss_mb"):
+            if r.get(key) is not None:
+                yield (size, key), r[key], False
+        for name, lat in r.get("endpoints", {}).items():
+            yield (size, f"{name}.p50_ms"), lat["p50_ms"], False
+            yield (size, f"{name}.p99_ms"), lat["p99_ms"], False
+        if "throughput" in r:
+            yield (size, "throughput.rps"), r["throughput"]["rps"], True
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], tolerance: float) -> int:
+    before = {k: v for k, v, _ in _metrics(old)}
+    regressions = 0
+    print(f"\n{'tamaño':<6} {'métrica':<36} {'antes':>11} {'ahora':>11} {'cambio':>8}")
+    for key, value, higher_is_better in _metrics(new):
+        if key not in before or not before[key]:
+            continue
+        change = (value - before[key]) / before[key]
+        worse = -change if higher_is_better else change
+        flag = "  REGRESIÓN" if worse > tolerance else ""
+        regressions += bool(flag)
+        print(f"{key[0]:<6} {key[1]:<36} {before[key]:>11.2f} {value:>11.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de la API sobre datos sintéticos")
+    parser.add_argument("--sizes", default="10k,1m", help=f"Tamaños separados por coma: {', '.join(SIZES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=30, help="Requests por endpoint")
+    parser.add_argument("--clients", type=int, default=16, help="Clientes concurrentes del throughput")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duración del throughput")
+    parser.add_argument("--data-root", default=os.path.join(tempfile.gettempdir(), "finanzas-bench"))
+    parser.add_argument("--out", help="JSON de resultados (por defecto bench-<commit>-<fecha>.json)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Empeoramiento que cuenta como regresión")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = {
+        "meta": {
+            "commit": commit, "timestamp": pd.Timestamp.now(tz="UTC").isoformat(),
+            "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(), "seed": args.seed,
+            "repeat": args.repeat, "clients": args.clients,
+        },
+        "sizes": {},
+    }
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        results["sizes"][size] = run_size(size, args)
+
+    out = args.out or f"bench-{commit or 'local'}-{pd.Timestamp.now():%Y%m%d-%H%M%S}.json"
+    with open(out, "w") as f:
+        json.dump(results, f, indent=1)
+    print(f"Resultados en {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Generador de datos sintéticos con el mismo esquema que `backend/data/`.
+
+Uso (desde la raíz del repo):
+    python backend/benchmarks/synthetic.py /tmp/finanzas-1m --size 1m
+    python backend/benchmarks/synthetic.py /tmp/custom --transactions 250000 --assets 50 --years 10
+
+Escribe los seis CSV: transacciones ordenadas por fecha (ingresos y gastos
+por categoría), precios diarios hábiles de cada activo (caminata aleatoria
+geométrica, activos que empiezan a cotizar en fechas distintas), posiciones,
+presupuestos por mes y categoría, la serie mensual de patrimonio y metas.
+Con la misma semilla el resultado es idéntico. Las transacciones se escriben
+por bloques de fechas, así 10M de filas no necesitan todo en memoria.
+"""
+from typing import Dict, NamedTuple
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+INCOME = ["Salario", "Freelance", "Intereses"]
+EXPENSES = ["Vivienda", "Transporte", "Comida", "Servicios", "Salud", "Ocio", "Compras",
+            "Educación", "Suscripciones", "Otros"]
+END = pd.Timestamp("2025-12-31")
+CHUNK_ROWS = 1_000_000
+
+
+class Size(NamedTuple):
+    transactions: int
+    assets: int
+    years: int
+
+
+SIZES: Dict[str, Size] = {
+    "10k": Size(10_000, 20, 5),
+    "1m": Size(1_000_000, 200, 20),
+    "10m": Size(10_000_000, 500, 30),
+}
+
+
+def _transactions(path: str, n: int, start: pd.Timestamp, rng: np.random.Generator) -> pd.Series:
+    """Escribe `transactions.csv` y devuelve el flujo neto por mes."""
+    days = (END - start).days + 1
+    chunks = max(1, -(-n // CHUNK_ROWS))
+    flows = []
+    with open(path, "w", newline="") as f:
+        f.write("date,type,category,amount,description,month\n")
+        for i in range(chunks):
+            rows = n // chunks + (1 if i < n % chunks else 0)
+            lo, hi = days * i // chunks, days * (i + 1) // chunks
+            dates = start + pd.to_timedelta(np.sort(rng.integers(lo, max(hi, lo + 1), rows)), unit="D")
+            income = rng.random(rows) < 0.15
+            category = np.where(income, rng.choice(INCOME, rows), rng.choice(EXPENSES, rows))
+            amount = np.where(income, rng.gamma(2.0, 400_000.0, rows), rng.gamma(1.5, 40_000.0, rows)).round(2)
+            kind = np.where(income, "Ingreso", "Gasto")
+            df = pd.DataFrame({
+                "date": dates.strftime("%Y-%m-%d"),
+                "type": kind,
+                "category": category,
+                "amount": amount,
+                "description": np.where(income, "Ingreso ", "Compra ") + category.astype(object),
+                "month": dates.strftime("%Y-%m"),
+            })
+            df.to_csv(f, header=False, index=False)
+            flows.append(pd.Series(np.where(income, amount, -amount)).groupby(df["month"].to_numpy()).sum())
+    return pd.concat(flows).groupby(level=0).sum()
+
+
+def _prices(n_assets: int, start: pd.Timestamp, rng: np.random.Generator) -> pd.DataFrame:
+    dates = pd.bdate_range(start, END)
+    paths = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, (len(dates), n_assets)), axis=0))
+    first = rng.integers(0, max(1, len(dates) // 3), n_assets)
+    first[0] = 0
+    paths[np.arange(len(dates))[:, None] < first] = np.nan
+    assets = [f"ACT_{i:04d}" for i in range(n_assets)]
+    wide = pd.DataFrame(paths.round(4), index=dates, columns=assets)
+    long = wide.rename_axis("date").rename_axis("asset", axis=1).stack().rename("price").reset_index()
+    return long.sort_values(["asset", "date"], kind="stable")
+
+
+def generate(out_dir: str, transactions: int, assets: int, years: int, seed: int = 0) -> Dict[str, int]:
+    """Escribe los seis CSV en `out_dir`. Devuelve las filas de cada uno."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    start = (END - pd.DateOffset(years=years) + pd.Timedelta(days=1)).normalize()
+
+    flow = _transactions(os.path.join(out_dir, "transactions.csv"), transactions, start, rng)
+    months = flow.index
+
+    prices = _prices(assets, start, rng)
+    prices.assign(date=prices["date"].dt.strftime("%Y-%m-%d")).to_csv(
+        os.path.join(out_dir, "investments_prices.csv"), index=False)
+
+    hold = pd.DataFrame({"asset": prices["asset"].unique()})
+    hold["units"] = rng.uniform(10, 5_000, len(hold)).round(2)
+    hold.to_csv(os.path.join(out_dir, "investments_holdings.csv"), index=False)
+
+    # Valor del portafolio al cierre de cada mes
+    last = prices.assign(month=prices["date"].dt.strftime("%Y-%m")).groupby(["month", "asset"])["price"].last()
+    units = hold.set_index("asset")["units"]
+    value = (last * units.reindex(last.index.get_level_values("asset")).to_numpy()).groupby(level="month").sum()
+    netw = pd.DataFrame({"month": months, "net_cash_flow": flow.to_numpy().round(2)})
+    netw["cumulative_cash"] = netw["net_cash_flow"].cumsum().round(2)
+    netw["value"] = value.reindex(months).ffill().fillna(0.0).to_numpy().round(4)
+    netw["net_worth"] = (netw["cumulative_cash"] + netw["value"]).round(4)
+    netw.to_csv(os.path.join(out_dir, "net_worth.csv"), index=False)
+
+    # Presupuesto: gasto mensual esperado por categoría con algo de holgura (o no)
+    per_month = transactions * 0.85 / len(months) / len(EXPENSES) * 60_000
+    budgets = pd.MultiIndex.from_product([months, EXPENSES], names=["month", "category"]).to_frame(index=False)
+    budgets["limit"] = (per_month * rng.uniform(0.8, 1.3, len(budgets))).round(-3)
+    budgets.to_csv(os.path.join(out_dir, "budgets.csv"), index=False)
+
+    savings = float(netw["net_worth"].iloc[-1])
+    goals = pd.DataFrame({
+        "goal": ["Vacaciones", "Coche nuevo", "Fondo de emergencia", "Vivienda propia"],
+        "target_amount": [5e6, 4e7, 1.2e7, 3e8],
+        "current_savings": [savings * w for w in (0.05, 0.2, 0.25, 0.5)],
+        "due_date": ["2026-12-15", "2028-06-01", "2027-03-01", "2035-01-01"],
+    })
+    goals.to_csv(os.path.join(out_dir, "goals.csv"), index=False)
+
+    return {"transactions.csv": transactions, "investments_prices.csv": len(prices),
+            "investments_holdings.csv": len(hold), "net_worth.csv": len(netw),
+            "budgets.csv": len(budgets), "goals.csv": len(goals)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--transactions", type=int)
+    parser.add_argument("--assets", type=int)
+    parser.add_argument("--years", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    size = SIZES[args.size]
+    rows = generate(args.out_dir, args.transactions or size.transactions, args.assets or size.assets,
+                    args.years or size.years, args.seed)
+    for name, n in rows.items():
+        print(f"{name:<26} {n:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Caché columnar en disco de los CSV ya tipados.
+
+La primera carga de cada CSV guarda el DataFrame resultante (fechas como
+datetime64, `type`/`category` como categorías, `month` como texto) en un
+archivo Arrow IPC (Feather v2) sin comprimir, cuyo nombre incluye la versión
+del blob de origen. Los arranques siguientes lo abren con memory-map en lugar
+de volver a parsear el CSV. Las columnas numéricas, las fechas y el texto
+(`description`, `month`, como `str` respaldado por Arrow) quedan sobre el
+archivo mapeado, sin copiar; de las categorías solo se copian los códigos
+(un byte por fila).
+"""
+from typing import Optional
+import hashlib
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+log = logging.getLogger(__name__)
+
+# Subirlo cuando cambie el tipado en dataset.PREPARE para invalidar lo guardado
+CACHE_FORMAT = 2
+# Texto como arreglo de Arrow sobre el buffer mapeado (el `str` de pandas 3), no objetos de Python
+STRING_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)
+
+
+def _types(arrow_type: pa.DataType):
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return STRING_DTYPE
+    return None
+
+
+class ColumnarCache:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def scoped(self, sub: str) -> "ColumnarCache":
+        """Caché en un subdirectorio (p.ej. por tenant), para que versiones de
+        archivos con el mismo nombre no se pisen."""
+        return ColumnarCache(os.path.join(self.root, sub))
+
+    def _stem(self, name: str) -> str:
+        return os.path.splitext(name)[0]
+
+    def _path(self, name: str, version: str) -> str:
+        key = hashlib.sha1(f"{CACHE_FORMAT}|{name}|{version}".encode()).hexdigest()[:16]
+        return os.path.join(self.root, f"{self._stem(name)}.{key}.arrow")
+
+    def load(self, name: str, version: str) -> Optional[pd.DataFrame]:
+        path = self._path(name, version)
+        if not os.path.exists(path):
+            return None
+        try:
+            table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+            return table.to_pandas(split_blocks=True, types_mapper=_types)
+        except (OSError, pa.ArrowInvalid):
+            log.warning("Caché corrupta, se ignora: %s", path)
+            return None
+
+    def store(self, name: str, version: str, df: pd.DataFrame) -> None:
+        path = self._path(name, version)
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp, "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+
+        # Versiones anteriores del mismo CSV ya no sirven
+        prefix = f"{self._stem(name)}."
+        for fname in os.listdir(self.root):
+            old = os.path.join(self.root, fname)
+            if fname.startswith(prefix) and fname.endswith(".arrow") and old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+
+def cache_from_env() -> Optional[ColumnarCache]:
+    """`DATA_CACHE_DIR` (por defecto en el directorio temporal); `DATA_CACHE_DIR=off` la desactiva."""
+    root = os.getenv("DATA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "finanzas-cache"))
+    if root.lower() in ("", "0", "off", "none"):
+        return None
+    return ColumnarCache(root)
@@ -0,0 +1,331 @@
+"""
+Snapshot inmutable de los datos que sirve la API.
+
+Un `Dataset` agrupa los seis CSV ya tipados y las estructuras derivadas
+(`portfolio_monthly`, cubo de transacciones, índices por mes). Los endpoints leen siempre el
+snapshot publicado con `publish`; un refresco construye uno nuevo fuera del
+camino del request y lo reemplaza con una sola asignación, así nunca se ve un
+estado a medio actualizar.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregates import apply_batch, build_month_index, cash_monthly, index_by_month, sort_by_month
+from cache import ColumnarCache
+from cube import apply_cube_batch, build_cube
+from forecast import apply_spend_batch, budget_limits, build_spend_cube
+import metrics
+from networth import apply_cash_batch, cash_daily, extend_price_matrix, holdings_matrix, price_matrix
+from ranges import apply_daily_batch, build_daily_sums
+from storage import Storage
+
+log = logging.getLogger(__name__)
+
+# Hilos para descargar/parsear los CSV en el arranque
+LOAD_WORKERS = int(os.getenv("DATA_LOAD_WORKERS", "4"))
+
+# ---------------- Parseo de cada CSV ---------------- #
+def _prepare_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    df["date"] = pd.to_datetime(df["date"])
+    df["month"] = df["month"].astype(str)
+    df["type"] = df["type"].astype("category")
+    df["category"] = df["category"].astype("category")
+    return sort_by_month(df)
+
+def _prepare_monthly(df: pd.DataFrame) -> pd.DataFrame:
+    df["month"] = df["month"].astype(str)
+    return df
+
+def _prepare_prices(df: pd.DataFrame) -> pd.DataFrame:
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+def _prepare_holdings(df: pd.DataFrame) -> pd.DataFrame:
+    # `date` es opcional: con ella cada fila es un movimiento de unidades (ver networth.holdings_matrix)
+    if "date" in df:
+        df["date"] = pd.to_datetime(df["date"])
+    return df
+
+def _prepare_goals(df: pd.DataFrame) -> pd.DataFrame:
+    df["due_date"] = pd.to_datetime(df["due_date"])
+    return df
+
+PREPARE: Dict[str, Callable[[pd.DataFrame], pd.DataFrame]] = {
+    "transactions.csv": _prepare_transactions,
+    "budgets.csv": _prepare_monthly,
+    "net_worth.csv": _prepare_monthly,
+    "investments_prices.csv": _prepare_prices,
+    "investments_holdings.csv": _prepare_holdings,
+    "goals.csv": _prepare_goals,
+}
+SOURCES = tuple(PREPARE)
+
+
+def parse(name: str, stream: BinaryIO) -> pd.DataFrame:
+    with stream:
+        return PREPARE[name](pd.read_csv(stream))
+
+
+# ---------------- Estructuras derivadas ---------------- #
+def build_portfolio_monthly(prices: pd.DataFrame, hold: pd.DataFrame) -> pd.DataFrame:
+    # unidades vigentes en la fecha de cada precio
+    holdings = holdings_matrix(hold)
+    port = prices[prices["asset"].isin(holdings.columns)].copy()
+    pos = holdings.index.searchsorted(port["date"], side="right") - 1
+    units = holdings.to_numpy(dtype=float)[pos, holdings.columns.get_indexer(port["asset"])]
+    port["value"] = port["price"] * np.where(pos >= 0, units, 0.0)
+    port["month"] = port["date"].dt.to_period("M").astype(str)
+    return port.groupby("month", as_index=False)["value"].sum()
+
+# nombre -> (CSV o estructuras derivadas de las que depende, constructor); las
+# que dependen de otra derivada van después de ella
+DERIVED: Dict[str, Tuple[Tuple[str, ...], Callable[..., Any]]] = {
+    "portfolio_monthly": (("investments_prices.csv", "investments_holdings.csv"), build_portfolio_monthly),
+    "cube": (("transactions.csv",), build_cube),
+    "month_index": (("cube",), build_month_index),
+    "budgets_by_month": (("budgets.csv",), index_by_month),
+    "cash_daily": (("cube",), cash_daily),
+    "price_matrix": (("investments_prices.csv",), price_matrix),
+    "holdings_matrix": (("investments_holdings.csv",), holdings_matrix),
+    "spend_cube": (("cube",), build_spend_cube),
+    "budget_limits": (("budgets.csv",), budget_limits),
+    "daily_sums": (("cube",), build_daily_sums),
+}
+
+def sources_of(key: str) -> Tuple[str, ...]:
+    """CSV de los que depende una estructura derivada, directa o indirectamente."""
+    return tuple(dict.fromkeys(s for d in DERIVED[key][0] for s in (sources_of(d) if d in DERIVED else (d,))))
+
+# nombre -> actualización incremental (valor anterior, CSV anteriores, CSV nuevos),
+# que devuelve None si no aplica y hay que rearmar la estructura
+UPDATERS: Dict[str, Callable[[Any, Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]], Any]] = {
+    "price_matrix": lambda matrix, old, new: extend_price_matrix(
+        matrix, old["investments_prices.csv"], new["investments_prices.csv"]),
+}
+
+def build_derived(key: str, inputs: Dict[str, Any]):
+    """Arma `key` con `inputs`: CSV y estructuras derivadas por nombre."""
+    deps, build = DERIVED[key]
+    return build(*(inputs[d] for d in deps))
+
+
+# ---------------- Snapshot ---------------- #
+def _nbytes(obj: Any) -> int:
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(v) for v in obj)
+    return 0
+
+class Dataset:
+    def __init__(self, frames: Dict[str, pd.DataFrame], versions: Dict[str, str],
+                 derived: Optional[Dict[str, Any]] = None, load_report: Optional[Dict[str, float]] = None):
+        self.frames = frames
+        self.versions = versions
+        self.version = hashlib.sha1(
+            "|".join(f"{n}={versions.get(n, '')}" for n in SOURCES).encode()
+        ).hexdigest()[:16]
+        # segundos por CSV / estructura derivada en la carga que armó este snapshot
+        self.load_report = load_report or {}
+
+        self.tx = frames["transactions.csv"]
+        self.budgets = frames["budgets.csv"]
+        self.netw = frames["net_worth.csv"]
+        self.prices = frames["investments_prices.csv"]
+        self.hold = frames["investments_holdings.csv"]
+        self.goals = frames["goals.csv"]
+
+        # -------- Serie mensual del portafolio e índices por mes -------- #
+        self.derived = dict(derived or {})
+        for key in DERIVED:
+            if key not in self.derived:
+                self.derived[key] = build_derived(key, {**frames, **self.derived})
+        self.portfolio_monthly = self.derived["portfolio_monthly"]
+        self.cube = self.derived["cube"]
+        self.month_index = self.derived["month_index"]
+        self.budgets_by_month = self.derived["budgets_by_month"]
+        self.cash_daily = self.derived["cash_daily"]
+        self.price_matrix = self.derived["price_matrix"]
+        self.holdings_matrix = self.derived["holdings_matrix"]
+        self.spend_cube = self.derived["spend_cube"]
+        self.budget_limits = self.derived["budget_limits"]
+        self.daily_sums = self.derived["daily_sums"]
+        # O(meses): se rehace desde el índice, no desde tx
+        self.cash_monthly = cash_monthly(self.month_index)
+
+    def memory_bytes(self) -> int:
+        """Bytes en memoria de los CSV y las estructuras derivadas (`memory_usage(deep=True)`)."""
+        return _nbytes(self.frames) + _nbytes(self.derived)
+
+    def replace(self, frames: Dict[str, pd.DataFrame], versions: Dict[str, str]) -> "Dataset":
+        """Nuevo snapshot con algunos CSV reemplazados.
+
+        El resto de CSV y las estructuras derivadas que no dependen de los
+        reemplazados se reutilizan tal cual; las que tienen actualización
+        incremental (`UPDATERS`) se extienden en vez de rearmarse.
+        """
+        merged = {**self.frames, **frames}
+        keep = {}
+        for key, value in self.derived.items():
+            if not set(sources_of(key)) & set(frames):
+                keep[key] = value
+            elif key in UPDATERS:
+                updated = UPDATERS[key](value, self.frames, merged)
+                if updated is not None:
+                    keep[key] = updated
+        return Dataset(merged, {**self.versions, **versions}, keep)
+
+    def append_transactions(self, batch: pd.DataFrame, version: str) -> "Dataset":
+        """Nuevo snapshot con `batch` (ya tipado) agregado a `tx`.
+
+        El lote se agrupa en su propio cubo, que se suma al cubo
+        (`cube.apply_cube_batch`) y a lo que se arma desde él: el índice por
+        mes solo en los meses del lote (`aggregates.apply_batch`), el efectivo
+        diario desde la primera fecha del lote (`networth.apply_cash_batch`) y
+        los acumulados diarios (`forecast.apply_spend_batch`,
+        `ranges.apply_daily_batch`); el resto se reutiliza.
+        """
+        tx = self.tx
+        batch = batch.set_axis(pd.RangeIndex(len(batch)) + (int(tx.index.max()) + 1 if len(tx) else 0))
+        for col in ("type", "category"):
+            dtype = pd.CategoricalDtype(tx[col].cat.categories.union(pd.Index(batch[col].unique())))
+            tx = tx.astype({col: dtype}) if tx[col].dtype != dtype else tx
+            batch = batch.astype({col: dtype})
+
+        # Lo habitual es que el lote vaya después de la última fila: basta con concatenar
+        appended = pd.concat([tx, batch])
+        last = (tx["month"].iloc[-1], tx["date"].iloc[-1]) if len(tx) else None
+        if last is not None and (batch["month"].min(), batch["date"].min()) < last:
+            appended = sort_by_month(appended)
+
+        # El lote se agrupa una vez y su cubo se suma a cada estructura
+        delta = build_cube(batch)
+        derived = {**self.derived, "cube": apply_cube_batch(self.cube, delta),
+                   "month_index": apply_batch(self.month_index, delta),
+                   "cash_daily": apply_cash_batch(self.cash_daily, delta),
+                   "spend_cube": apply_spend_batch(self.spend_cube, delta),
+                   "daily_sums": apply_daily_batch(self.daily_sums, delta)}
+        return Dataset({**self.frames, "transactions.csv": appended},
+                       {**self.versions, "transactions.csv": version}, derived)
+
+
+def load_frame(storage: Storage, name: str, cache: Optional[ColumnarCache] = None) -> Tuple[pd.DataFrame, str]:
+    """Lee un CSV ya tipado, desde la caché columnar si está la misma versión."""
+    t0 = time.perf_counter()
+    df = None
+    if cache is not None:
+        version = storage.version(name)
+        df = cache.load(name, version)
+    source = "cache" if df is not None else "storage"
+
+    if df is None:
+        stream, version = storage.open(name)
+        df = parse(name, stream)
+        if cache is not None:
+            try:
+                cache.store(name, version, df)
+            except OSError:
+                log.exception("No se pudo escribir la caché de %s", name)
+    metrics.LOAD_SECONDS.observe(time.perf_counter() - t0, name, source)
+    metrics.LOADED_BYTES.inc(_nbytes(df), name)
+    return df, version
+
+
+def load_dataset(storage: Storage, cache: Optional[ColumnarCache] = None, workers: int = LOAD_WORKERS) -> Dataset:
+    """Carga los seis CSV en paralelo en un pool acotado.
+
+    Cada estructura derivada se arma en el mismo pool apenas están listos los
+    CSV de los que depende (p.ej. `portfolio_monthly` con precios y
+    posiciones), sin esperar al resto de descargas.
+    """
+    t0 = time.perf_counter()
+    frames, versions, derived, report = {}, {}, {}, {}
+
+    def timed(key, fn, *args):
+        t = time.perf_counter()
+        out = fn(*args)
+        report[key] = time.perf_counter() - t
+        return out
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dataset-load") as pool:
+        pending = {pool.submit(timed, n, load_frame, storage, n, cache): n for n in SOURCES}
+        waiting = set(DERIVED)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key = pending.pop(fut)
+                if key in DERIVED:
+                    derived[key] = fut.result()
+                else:
+                    frames[key], versions[key] = fut.result()
+            ready = {**frames, **derived}
+            for key in [k for k in waiting if all(d in ready for d in DERIVED[k][0])]:
+                waiting.discard(key)
+                deps = {d: ready[d] for d in DERIVED[key][0]}
+                pending[pool.submit(timed, key, build_derived, key, deps)] = key
+
+    report["total"] = time.perf_counter() - t0
+    for key in DERIVED:
+        metrics.BUILD_SECONDS.observe(report[key], key)
+    metrics.DATASET_LOAD_SECONDS.observe(report["total"])
+    ds = Dataset(frames, versions, derived, report)
+    log.info("Dataset %s cargado en %.3f s (%s)", ds.version, report["total"],
+             ", ".join(f"{k}: {v:.3f}s" for k, v in report.items() if k != "total"))
+    return ds
+
+
+# ---------------- Snapshot publicado ---------------- #
+class DatasetSlot:
+    """Snapshot publicado de un conjunto de datos (un tenant).
+
+    `write_lock` serializa a quienes publican un snapshot derivado del actual
+    (refresco, ingesta); los lectores solo toman la referencia.
+    """
+
+    def __init__(self, ds: Optional[Dataset] = None):
+        self._ds = ds
+        self.write_lock = threading.RLock()
+
+    def publish(self, ds: Dataset) -> None:
+        self._ds = ds
+
+    def current(self) -> Dataset:
+        if self._ds is None:
+            raise RuntimeError("Dataset no cargado")
+        return self._ds
+
+    @property
+    def loaded(self) -> bool:
+        return self._ds is not None
+
+
+# Versión de un CSV con cambios en memoria aún no persistidos: el refresco no lo
+# recarga desde el storage hasta que la ingesta lo escriba
+LOCAL_VERSION_PREFIX = "local:"
+
+def is_local_version(version: Optional[str]) -> bool:
+    return bool(version) and version.startswith(LOCAL_VERSION_PREFIX)
+
+# Tenant por defecto (raíz del storage)
+default_slot = DatasetSlot()
+write_lock = default_slot.write_lock
+
+def publish(ds: Dataset) -> None:
+    default_slot.publish(ds)
+
+def current() -> Dataset:
+    return default_slot.current()
@@ -0,0 +1,68 @@
+"""
+Pool acotado para el trabajo pesado de los requests.
+
+Los handlers son `async`: validan en el event loop y mandan el cálculo de la
+vista y su serialización a este pool, con un número fijo de hilos y una cola
+de espera limitada. Si la cola está llena el request se rechaza en el acto
+(`Overloaded` -> 503 con `Retry-After`) en vez de acumular requests que van a
+terminar por timeout. Acotar los hilos también limita cuántos cálculos de
+pandas compiten por el GIL a la vez.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+import asyncio
+import contextvars
+import os
+import threading
+
+import metrics
+
+# Hilos que calculan vistas a la vez
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", str(min(8, os.cpu_count() or 1))))
+# Requests esperando un hilo libre antes de responder 503
+COMPUTE_MAX_QUEUE = int(os.getenv("COMPUTE_MAX_QUEUE", "64"))
+
+
+class Overloaded(RuntimeError):
+    pass
+
+
+class BoundedExecutor:
+    def __init__(self, workers: int = COMPUTE_WORKERS, max_queue: int = COMPUTE_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compute")
+        self._lock = threading.Lock()
+        self._inflight = 0
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def queued(self) -> int:
+        return max(0, self._inflight - self.workers)
+
+    def _done(self, _):
+        with self._lock:
+            self._inflight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """`fn(*args)` en el pool. Lanza `Overloaded` si ya hay `max_queue` esperando."""
+        with self._lock:
+            if self._inflight >= self.workers + self.max_queue:
+                metrics.COMPUTE_REJECTED.inc()
+                raise Overloaded(f"{self.queued} requests en espera")
+            self._inflight += 1
+        try:
+            # Con el contexto del request (p.ej. la ruta para `metrics.stage`)
+            fut = self._pool.submit(contextvars.copy_context().run, fn, *args)
+        except BaseException:
+            self._done(None)
+            raise
+        # Se descuenta cuando termina el cálculo, aunque el cliente ya se haya ido
+        fut.add_done_callback(self._done)
+        return await asyncio.wrap_future(fut)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
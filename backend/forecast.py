@@ -0,0 +1,116 @@
+"""
+Proyección de gasto por presupuesto (`/budget_forecast`).
+
+`SpendCube` guarda el gasto acumulado al cierre de cada día del mes, por mes
+y categoría, en un arreglo (meses x categorías x 31). Se arma una vez por
+versión de `transactions.csv` (un `bincount` sobre el cubo de cube.py) y los lotes de la ingesta se le
+suman (el acumulado es lineal). Con eso la proyección de todos los meses y
+categorías pedidos es una sola pasada vectorizada: gasto a la fecha, ritmo
+diario, gasto proyectado al cierre y el día en que se supera el límite.
+"""
+from typing import List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+DAYS = 31
+
+
+class SpendCube(NamedTuple):
+    months: pd.Index        # YYYY-MM, ordenados
+    categories: pd.Index
+    cum: np.ndarray         # (meses, categorías, 31): gasto acumulado al cierre de cada día
+
+
+def build_spend_cube(cells: pd.DataFrame) -> SpendCube:
+    """A partir del cubo de transacciones (`cube.build_cube`)."""
+    g = cells[cells["type"] == "Gasto"]
+    months = pd.Index(np.unique(g["month"].to_numpy().astype(str)))
+    categories = pd.Index(np.unique(g["category"].to_numpy().astype(str)))
+    m = months.get_indexer(g["month"].astype(str))
+    c = categories.get_indexer(g["category"].astype(str))
+    d = g["date"].dt.day.to_numpy() - 1
+    flat = (m * len(categories) + c) * DAYS + d
+    daily = np.bincount(flat, weights=g["sum"].to_numpy(dtype=float),
+                        minlength=len(months) * len(categories) * DAYS)
+    return SpendCube(months, categories, daily.reshape(len(months), len(categories), DAYS).cumsum(axis=2))
+
+
+def _reindex(cube: SpendCube, months: pd.Index, categories: pd.Index) -> np.ndarray:
+    out = np.zeros((len(months), len(categories), DAYS))
+    mi, ci = months.get_indexer(cube.months), categories.get_indexer(cube.categories)
+    out[np.ix_(mi, ci)] = cube.cum
+    return out
+
+
+def apply_spend_batch(cube: SpendCube, cells: pd.DataFrame) -> SpendCube:
+    """`cube` más los gastos de un lote (`cells`: su cubo), O(meses x categorías) sin recorrer `tx`."""
+    delta = build_spend_cube(cells)
+    if not len(delta.months):
+        return cube
+    months = cube.months.union(delta.months)
+    categories = cube.categories.union(delta.categories)
+    return SpendCube(months, categories, _reindex(cube, months, categories) + _reindex(delta, months, categories))
+
+
+def budget_limits(budgets: pd.DataFrame) -> pd.DataFrame:
+    """Límite por mes (filas) y categoría (columnas); NaN si no hay presupuesto."""
+    return budgets.pivot_table(index=budgets["month"].astype(str), columns="category", values="limit", aggfunc="sum")
+
+
+def forecast(cube: SpendCube, limits: pd.DataFrame, months: List[str], last_date: Optional[pd.Timestamp],
+             day: Optional[int] = None) -> pd.DataFrame:
+    """Proyección al cierre de cada mes de `months` para las categorías con presupuesto.
+
+    El corte es el día `day` de cada mes; sin `day`, el mes de `last_date` (el
+    último movimiento) se corta en ese día y los meses anteriores se toman
+    completos. El ritmo es el gasto a la fecha dividido por los días
+    transcurridos. Los meses posteriores al de `last_date` todavía no tienen
+    datos: se omiten en vez de proyectarse como meses completos sin gasto.
+    """
+    if last_date is not None:
+        months = [m for m in months if m <= last_date.strftime("%Y-%m")]
+    months_idx = pd.Index(months, dtype=object)
+    lim = limits.reindex(index=months_idx).to_numpy(dtype=float)                      # (K, C)
+    categories = limits.columns
+    cum = np.zeros((len(months_idx), len(categories), DAYS))
+    mi, ci = cube.months.get_indexer(months_idx), cube.categories.get_indexer(categories.astype(str))
+    rows, cols = np.nonzero(mi >= 0)[0], np.nonzero(ci >= 0)[0]
+    cum[np.ix_(rows, cols)] = cube.cum[np.ix_(mi[rows], ci[cols])]
+
+    periods = pd.PeriodIndex(months_idx, freq="M")
+    dim = periods.days_in_month.to_numpy()                                                 # (K,)
+    if day is not None:
+        cut = np.minimum(day, dim)
+    else:
+        cut = dim.copy()
+        if last_date is not None:
+            cut = np.where(months_idx == last_date.strftime("%Y-%m"), last_date.day, cut)
+
+    spent = np.take_along_axis(cum, (cut - 1)[:, None, None].repeat(len(categories), axis=1), axis=2)[..., 0]
+    rate = spent / cut[:, None]
+    projected = spent + rate * (dim - cut)[:, None]
+
+    # Día en que el acumulado ya superó el límite (hasta el corte)...
+    day_no = np.arange(1, DAYS + 1)
+    over = (cum > lim[..., None]) & (day_no <= cut[:, None, None])
+    exceeded = over.any(axis=2)
+    exceeded_day = over.argmax(axis=2) + 1
+    # ...o en el que lo superaría al ritmo actual
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_left = np.floor((lim - spent) / rate) + 1
+    projected_day = np.where((rate > 0) & (cut[:, None] + days_left <= dim[:, None]), cut[:, None] + days_left, np.nan)
+    exceed_day = np.where(exceeded, exceeded_day, projected_day)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(lim > 0, projected / lim * 100, 0.0)
+    status = np.select([pct <= 80, pct <= 100], ["green", "amber"], default="red")
+
+    k, c = np.nonzero(np.isfinite(lim))
+    df = pd.DataFrame({
+        "month": months_idx[k], "category": categories[c].astype(str), "limit": lim[k, c],
+        "as_of_day": cut[k], "days_in_month": dim[k], "spent": spent[k, c], "daily_rate": rate[k, c],
+        "projected": projected[k, c], "projected_pct": pct[k, c],
+        "exceeded": exceeded[k, c], "exceed_day": pd.array(exceed_day[k, c], dtype="Int64"),
+        "status": status[k, c],
+    })
+    return df.sort_values(["month", "projected_pct"], ascending=[True, False], kind="stable").reset_index(drop=True)
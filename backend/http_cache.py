@@ -0,0 +1,118 @@
+"""
+Respuestas condicionales (ETag / 304) para los GET.
+
+El ETag se calcula antes de ejecutar el endpoint: depende solo de la versión
+del dataset y de la ruta con sus query params normalizados. Con eso:
+- `If-None-Match` que coincide -> 304 sin ejecutar el endpoint.
+- Cuerpo ya codificado en la caché -> se devuelve sin ejecutar el endpoint.
+- Si no, se ejecuta, se agrega el header `ETag` y se guarda el cuerpo (LRU
+  acotada en bytes).
+"""
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+import hashlib
+import threading
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def normalized_query(query_string: bytes) -> str:
+    """Query params ordenados y sin valores vacíos (`?month=` equivale a omitirlo)."""
+    pairs = [(k, v) for k, v in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True) if v != ""]
+    return urlencode(sorted(pairs))
+
+
+def compute_etag(version: str, path: str, query: str) -> str:
+    return '"' + hashlib.sha1(f"{version}|{path}|{query}".encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparación débil, como pide RFC 9110 para If-None-Match
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return any(t.removeprefix("W/") == etag for t in tags)
+
+
+class BodyCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[Headers, bytes]]" = OrderedDict()
+        self._size = 0
+
+    def get(self, etag: str) -> Optional[Tuple[Headers, bytes]]:
+        with self._lock:
+            item = self._items.get(etag)
+            if item is not None:
+                self._items.move_to_end(etag)
+            return item
+
+    def put(self, etag: str, headers: Headers, body: bytes) -> None:
+        with self._lock:
+            if etag in self._items:
+                return
+            self._items[etag] = (headers, body)
+            self._size += len(body)
+            while self._size > self.max_bytes and self._items:
+                _, (_, old) = self._items.popitem(last=False)
+                self._size -= len(old)
+
+
+class ConditionalGetMiddleware:
+    """`version_fn(scope)` devuelve la versión de los datos que verá el request,
+    o None para no cachear ese request."""
+
+    def __init__(self, app, version_fn: Callable[[dict], Optional[str]],
+                 max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: int = 8 * 1024 * 1024):
+        self.app = app
+        self.version_fn = version_fn
+        self.cache = BodyCache(max_bytes)
+        self.max_entry_bytes = max_entry_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+        version = self.version_fn(scope)
+        if version is None:
+            return await self.app(scope, receive, send)
+
+        etag = compute_etag(version, scope["path"], normalized_query(scope.get("query_string", b"")))
+        validators = [(b"etag", etag.encode()), (b"cache-control", b"no-cache")]
+
+        request_headers = dict(scope["headers"])
+        if_none_match = request_headers.get(b"if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match.decode("latin-1"), etag):
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        hit = self.cache.get(etag)
+        if hit is not None:
+            headers, body = hit
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+            return
+
+        state = {"status": None, "headers": None, "chunks": [], "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                if message["status"] == 200:
+                    headers = [(k, v) for k, v in message.get("headers", [])
+                               if k.lower() not in (b"etag", b"cache-control")] + validators
+                    state["headers"] = headers
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and state["status"] == 200 and state["chunks"] is not None:
+                state["size"] += len(message.get("body", b""))
+                if state["size"] > self.max_entry_bytes:
+                    state["chunks"] = None   # respuesta muy grande (streaming): no se cachea
+                else:
+                    state["chunks"].append(message.get("body", b""))
+                    if not message.get("more_body", False) and scope["method"] == "GET":
+                        self.cache.put(etag, state["headers"], b"".join(state["chunks"]))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
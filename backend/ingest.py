@@ -0,0 +1,145 @@
+"""
+Ingesta de transacciones en lote (`POST /transactions/bulk`).
+
+Cada lote se valida, se agrega al `tx` en memoria y actualiza en el acto los
+totales por mes, el gasto por categoría y el efectivo acumulado (ver
+`Dataset.append_transactions`). La escritura al storage es diferida: un hilo
+agrega al final de `transactions.csv` todo lo pendiente cada
+`flush_interval` segundos, no en cada request.
+"""
+from datetime import date
+from typing import List, Literal
+import itertools
+import logging
+import threading
+
+import pandas as pd
+from pydantic import BaseModel, Field
+
+from dataset import LOCAL_VERSION_PREFIX, DatasetSlot, default_slot
+from storage import Storage
+
+log = logging.getLogger(__name__)
+
+TX_FILE = "transactions.csv"
+TX_COLUMNS = ["date", "type", "category", "amount", "description", "month"]
+
+
+class IngestClosed(RuntimeError):
+    """El tenant fue expulsado de memoria: el cliente debe reintentar (se vuelve a cargar)."""
+
+
+class TransactionIn(BaseModel):
+    date: date
+    type: Literal["Ingreso", "Gasto"]
+    category: str = Field(min_length=1)
+    amount: float = Field(gt=0)
+    description: str = ""
+
+
+class BulkTransactions(BaseModel):
+    rows: List[TransactionIn] = Field(min_length=1, max_length=50_000)
+
+
+def to_frame(rows: List[TransactionIn]) -> pd.DataFrame:
+    """Lote validado con los mismos tipos que `tx` (month se deriva de date)."""
+    df = pd.DataFrame({
+        "date": pd.to_datetime([r.date for r in rows]),
+        "type": [r.type for r in rows],
+        "category": [r.category for r in rows],
+        "amount": [r.amount for r in rows],
+        # Vacía -> NaN, como queda al volver a leer el CSV persistido
+        "description": pd.Series([r.description or None for r in rows], dtype="str"),
+    })
+    df["month"] = df["date"].dt.strftime("%Y-%m")
+    return df[TX_COLUMNS]
+
+
+class TransactionIngestor:
+    def __init__(self, storage: Storage, flush_interval: float = 5.0, slot: DatasetSlot = default_slot):
+        self.storage = storage
+        self.slot = slot
+        self.flush_interval = flush_interval
+        self._pending: List[pd.DataFrame] = []
+        self._seq = itertools.count(1)
+        self._stop = threading.Event()
+        self._thread = None
+        self.closed = False
+
+    @property
+    def pending_rows(self) -> int:
+        return sum(len(b) for b in self._pending)
+
+    def ingest(self, rows: List[TransactionIn]) -> dict:
+        batch = to_frame(rows)
+        with self.slot.write_lock:
+            if self.closed:
+                raise IngestClosed("El dataset se está descargando; reintentar")
+            ds = self.slot.current().append_transactions(batch, f"{LOCAL_VERSION_PREFIX}{next(self._seq)}")
+            self.slot.publish(ds)
+            self._pending.append(batch)
+            pending = self.pending_rows
+
+        touched = sorted(batch["month"].unique())
+        months = pd.DataFrame([
+            {"month": m, "ingresos": ds.month_index[m].ingresos, "gastos": ds.month_index[m].gastos,
+             "rows": ds.month_index[m].rows}
+            for m in touched
+        ])
+        return {
+            "inserted": len(batch),
+            "months": months,
+            "cumulative_cash": float(ds.cash_monthly["cumulative_cash"].iloc[-1]),
+            "pending_rows": pending,
+            "dataset_version": ds.version,
+        }
+
+    def close(self) -> bool:
+        """Deja de aceptar lotes si no hay nada pendiente de persistir.
+
+        No espera: si otro hilo está ingiriendo o persistiendo, o quedan filas
+        sin escribir, devuelve False y no cierra.
+        """
+        if not self.slot.write_lock.acquire(blocking=False):
+            return False
+        try:
+            if self._pending:
+                return False
+            self.closed = True
+            return True
+        finally:
+            self.slot.write_lock.release()
+
+    def flush(self) -> int:
+        """Escribe lo pendiente al final de `transactions.csv`. Devuelve las filas escritas."""
+        with self.slot.write_lock:
+            if not self._pending:
+                return 0
+            batch = pd.concat(self._pending)
+            data = batch.assign(date=batch["date"].dt.strftime("%Y-%m-%d")).to_csv(index=False, header=False)
+            version = self.storage.append(TX_FILE, data.encode("utf-8"))
+            self._pending.clear()
+            # Lo escrito ya es lo que hay en memoria: se registra la versión para que el
+            # refresco no vuelva a descargarlo
+            self.slot.publish(self.slot.current().replace({}, {TX_FILE: version}))
+        log.info("Persistidas %d transacciones en %s", len(batch), TX_FILE)
+        return len(batch)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Fallo persistiendo transacciones; se reintenta en el próximo ciclo")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ingest-flush", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
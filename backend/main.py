@@ -1,72 +1,172 @@
-from fastapi import FastAPI, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import List, Optional, Dict
+from contextlib import asynccontextmanager
+from datetime import date
 import pandas as pd
-import numpy as np
+import asyncio
+import logging
 import os
-import io
+import re
+import sys
 
-# 🔧 CAMBIO: ahora usamos Azure Blob Storage en lugar de archivos locales
-from azure.storage.blob import BlobServiceClient
+# Permite `uvicorn backend.main:app` desde la raíz además de `uvicorn main:app` en backend/
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# ---------------- Azure Storage Configuration ---------------- #
-# 🔧 CAMBIO: obtenemos el connection string desde Azure App Service
-BLOB_CONN_STR = os.getenv("AZURE_STORAGE_CONNECTION")
+from analytics import MAX_ROLLING_PAIRS
+from cache import cache_from_env
+from cube import DIMENSIONS, MEASURES, CubeQuery, InvalidCubeQuery
+from dataset import SOURCES, Dataset, load_dataset, publish
+from executor import BoundedExecutor, Overloaded
+from http_cache import ConditionalGetMiddleware
+from ingest import BulkTransactions, IngestClosed
+import metrics
+from metrics import MetricsMiddleware, stage
+from montecarlo import DEFAULT_PATHS, MAX_CELLS, MAX_MONTHS, MAX_PATHS, GoalSimulator, months_between
+from serialization import FrameJSONResponse
+from shared import SharedDataset
+from snapshot import COMPRESSIONS, MEDIA_TYPE, snapshot_chunks
+from storage import storage_from_env
+from tenants import DEFAULT_TENANT, InvalidTenant, Tenant, TenantRegistry, UnknownTenant
+from tx_query import InvalidCursor, TransactionQuery, stream_csv, stream_ndjson
+import views
+from views import MonthSlice, RangeSlice, Slice
 
-# 🔧 CAMBIO: nos conectamos al storage
-blob_service = BlobServiceClient.from_connection_string(BLOB_CONN_STR)
-CONTAINER = "data"
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
-def read_csv_blob(filename: str) -> pd.DataFrame:
-    """
-    🔧 CAMBIO: ahora todos los CSV se leen desde Azure Blob Storage.
-    """
-    blob = blob_service.get_blob_client(container=CONTAINER, blob=filename)
-    data = blob.download_blob().readall()
-    return pd.read_csv(io.BytesIO(data))
+# ---------------- Storage Configuration ---------------- #
+# Azure Blob Storage si hay AZURE_STORAGE_CONNECTION; si no, backend/data/ (ver storage.py)
+storage = storage_from_env()
+# CSV ya tipados en Arrow, indexados por versión del blob (ver cache.py)
+cache = cache_from_env()
+# Cada cuántos segundos se revisa la versión de los archivos (0 = sin refresco)
+REFRESH_SECONDS = float(os.getenv("DATA_REFRESH_SECONDS", "60"))
+# Cada cuántos segundos se persisten las transacciones recibidas por /transactions/bulk
+INGEST_FLUSH_SECONDS = float(os.getenv("INGEST_FLUSH_SECONDS", "5"))
+# Bytes de datasets de tenants (no el por defecto) que se mantienen en memoria
+TENANT_CACHE_MAX_BYTES = int(os.getenv("TENANT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Prefijo de los archivos de cada tenant en el storage: <prefijo><tenant>/transactions.csv
+TENANT_PREFIX = os.getenv("TENANT_PREFIX", "tenants/")
+# Directorio (idealmente en /dev/shm) para compartir un solo dataset entre workers; vacío = cada worker carga el suyo
+SHARED_DATASET_DIR = os.getenv("SHARED_DATASET_DIR", "")
 
-# ------- Carga de datos desde Azure Blob Storage ------- #
-# 🔧 CAMBIO: todas las cargas ahora vienen del storage
-tx = read_csv_blob("transactions.csv")
-tx["date"] = pd.to_datetime(tx["date"])
-tx["month"] = tx["month"].astype(str)
+# Máximo de fechas por request en /investments_alloc/batch
+MAX_BATCH_DATES = 5000
+# Meses en los parámetros: YYYY-MM
+MONTH_PATTERN = r"\d{4}-(0[1-9]|1[0-2])"
 
-budgets = read_csv_blob("budgets.csv")
-budgets["month"] = budgets["month"].astype(str)
+# ------- Carga de datos ------- #
+tenants = TenantRegistry(storage, cache, max_bytes=TENANT_CACHE_MAX_BYTES, prefix=TENANT_PREFIX)
+if SHARED_DATASET_DIR:
+    # Un worker carga y publica generaciones; el resto las mapea (ver shared.py)
+    shared = SharedDataset(SHARED_DATASET_DIR, storage, cache)
+    shared.attach()
+    tenants.default.refresher = shared
+else:
+    publish(load_dataset(storage, cache))
+simulator = GoalSimulator()
+# Cálculo de vistas y serialización: hilos y cola acotados, 503 al saturarse (ver executor.py)
+compute = BoundedExecutor()
 
-netw = read_csv_blob("net_worth.csv")
-netw["month"] = netw["month"].astype(str)
+def _render(fn, args, kwargs) -> FrameJSONResponse:
+    with stage("view"):
+        content = fn(*args, **kwargs)
+    with stage("serialize"):
+        return FrameJSONResponse(content)
 
-prices = read_csv_blob("investments_prices.csv")
-prices["date"] = pd.to_datetime(prices["date"])
+async def respond(fn, *args, **kwargs):
+    """`FrameJSONResponse(fn(*args, **kwargs))` calculado en el pool acotado."""
+    return await compute.run(_render, fn, args, kwargs)
 
-hold = read_csv_blob("investments_holdings.csv")
+def tenant_name(headers, query: Dict[str, str]) -> str:
+    """Tenant del request: header `X-Tenant` o parámetro `tenant`; vacío = el por defecto."""
+    return headers.get("x-tenant") or query.get("tenant") or DEFAULT_TENANT
 
-goals = read_csv_blob("goals.csv")
-goals["due_date"] = pd.to_datetime(goals["due_date"])
+async def get_tenant(request: Request):
+    """Tenant del request, tomado mientras dure (no se expulsa a mitad de un request)."""
+    name = tenant_name(request.headers, request.query_params)
+    tenant = tenants.try_acquire(name)
+    if tenant is None:
+        try:
+            # La primera vez descarga los CSV del tenant: fuera del event loop
+            tenant = await asyncio.to_thread(tenants.acquire, name)
+        except InvalidTenant as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except UnknownTenant as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    try:
+        yield tenant
+    finally:
+        tenants.release(tenant)
 
-# -------- Serie mensual del portafolio -------- #
-port = prices.merge(hold, on="asset")
-port["value"] = port["price"] * port["units"]
-port["month"] = port["date"].dt.to_period("M").astype(str)
-portfolio_monthly = port.groupby("month", as_index=False)["value"].sum()
+async def current(tenant: Tenant = Depends(get_tenant)) -> Dataset:
+    return tenant.dataset()
 
-# ---------------- Utilidades ---------------- #
-def _latest_month() -> str:
-    return sorted(tx["month"].unique())[-1]
+# Período de las vistas por mes: `month`, o un rango de fechas con `from`/`to` (ver ranges.py)
+async def period(month: Optional[str] = Query(default=None, pattern=f"^{MONTH_PATTERN}$"),
+                 date_from: Optional[date] = Query(default=None, alias="from", description="YYYY-MM-DD, en vez de `month`"),
+                 date_to: Optional[date] = Query(default=None, alias="to", description="YYYY-MM-DD, inclusive"),
+                 ds: Dataset = Depends(current)) -> Slice:
+    if date_from is None and date_to is None:
+        return MonthSlice(ds, month)
+    if month:
+        raise HTTPException(status_code=400, detail="`month` no se combina con `from`/`to`")
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="`from` no puede ser posterior a `to`")
+    return RangeSlice(ds, pd.Timestamp(date_from) if date_from else None,
+                      pd.Timestamp(date_to) if date_to else None)
 
-def _ensure_native(obj: Any):
-    if isinstance(obj, (np.integer, np.int64)): return int(obj)
-    if isinstance(obj, (np.floating, np.float64)): return float(obj)
-    if isinstance(obj, (np.bool_,)): return bool(obj)
-    return obj
+async def compare_period(compare_to: Optional[str] = Query(
+                             default=None, description="YYYY-MM con `month`; con `from`/`to`, la fecha YYYY-MM-DD "
+                                                       "en que empieza un período de igual duración"),
+                         sl: Slice = Depends(period)) -> Optional[Slice]:
+    if not compare_to:
+        return None
+    if not isinstance(sl, RangeSlice):
+        if not re.fullmatch(MONTH_PATTERN, compare_to):
+            raise HTTPException(status_code=400, detail="`compare_to` debe ser YYYY-MM junto con `month`")
+        return MonthSlice(sl.ds, compare_to)
+    try:
+        return sl.shifted(pd.Timestamp(date.fromisoformat(compare_to)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"`compare_to` inválido: {e}")
 
-def _df_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
-    return [{k: _ensure_native(v) for k, v in r.items()} for r in df.to_dict(orient="records")]
+def _etag_version(scope) -> Optional[str]:
+    if scope["path"] == "/metrics":
+        return None
+    # Sin cachear mientras el tenant no esté cargado: el request lo carga (o da 404)
+    request = Request(scope)
+    name = tenant_name(request.headers, request.query_params)
+    tenant = tenants.loaded(name)
+    return f"{name}|{tenant.dataset().version}" if tenant is not None else None
 
 # ---------------- FASTAPI ---------------- #
-app = FastAPI(title="Personal Finance API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tenants.start(REFRESH_SECONDS, INGEST_FLUSH_SECONDS)
+    yield
+    tenants.stop()
+    simulator.shutdown()
+    compute.shutdown()
+
+app = FastAPI(title="Personal Finance API", version="1.0.0", lifespan=lifespan,
+              default_response_class=FrameJSONResponse)
+
+# ETag por versión del dataset + query normalizada; 304 y cuerpos cacheados (ver http_cache.py)
+app.add_middleware(
+    ConditionalGetMiddleware,
+    version_fn=_etag_version,
+    max_bytes=int(os.getenv("HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=503, content={"detail": f"Servidor saturado: {exc}"}, headers={"Retry-After": "1"})
+
+@app.exception_handler(IngestClosed)
+async def ingest_closed(request: Request, exc: IngestClosed):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 app.add_middleware(
     CORSMiddleware,
@@ -74,109 +174,231 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"],
 )
 
+# Latencia por ruta, incluidas las respuestas servidas desde la caché de ETag (ver metrics.py)
+app.add_middleware(MetricsMiddleware, router=app.router)
+
+# -------- Métricas (Prometheus) -------- #
+metrics.Gauge("finanzas_dataset_memory_bytes", "Bytes en memoria de cada dataset cargado", ("tenant",),
+              fn=lambda: {(t.name or "default",): t.dataset().memory_bytes() for t in tenants.all_loaded()})
+metrics.Gauge("finanzas_compute_inflight", "Requests calculándose o esperando un hilo",
+              fn=lambda: {(): compute.inflight})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # -------- 1) Resumen financiero -------- #
 @app.get("/summary")
-def summary(month: Optional[str] = Query(default=None)):
-    m = month or _latest_month()
-    dfm = tx[tx["month"] == m]
-
-    ingresos = float(dfm[dfm["type"] == "Ingreso"]["amount"].sum())
-    gastos = float(dfm[dfm["type"] == "Gasto"]["amount"].sum())
-    neto_mes = ingresos - gastos
-
-    nw_row = netw.sort_values("month").iloc[-1].to_dict()
-
-    return {
-        "month": m,
-        "kpis": {
-            "ingresos_mes": ingresos,
-            "gastos_mes": gastos,
-            "neto_mes": neto_mes,
-            "patrimonio_actual": float(nw_row["net_worth"]),
-            "efectivo_acumulado": float(nw_row["cumulative_cash"]),
-            "valor_inversiones": float(nw_row["value"]),
-        },
-        "waterfall": [
-            {"label": "Inicio", "value": 0},
-            {"label": "Ingresos", "value": ingresos},
-            {"label": "Gastos", "value": -gastos},
-            {"label": "Neto mes", "value": neto_mes},
-        ],
-        "rows_mes": int(dfm.shape[0]),
-    }
+async def summary(sl: Slice = Depends(period), other: Optional[Slice] = Depends(compare_period)):
+    return await respond(views.compared, views.summary, sl, other)
 
 # -------- 2) Donut de gastos -------- #
 @app.get("/expenses_donut")
-def expenses_donut(month: Optional[str] = None):
-    m = month or _latest_month()
-    dfm = tx[(tx["month"] == m) & (tx["type"] == "Gasto")]
-    grp = dfm.groupby("category", as_index=False)["amount"].sum().sort_values("amount", ascending=False)
-    return {"month": m, "donut": _df_records(grp)}
+async def expenses_donut(sl: Slice = Depends(period), other: Optional[Slice] = Depends(compare_period)):
+    return await respond(views.compared, views.expenses_donut, sl, other)
 
 @app.get("/top_expenses")
-def top_expenses(month: Optional[str] = None, n: int = 10):
-    m = month or _latest_month()
-    dfm = tx[(tx["month"] == m) & (tx["type"] == "Gasto")].sort_values("amount", ascending=False).head(n)
-    dfm["date"] = dfm["date"].dt.date.astype(str)
-    return {"month": m, "top": _df_records(dfm)}
+async def top_expenses(n: int = 10, sl: Slice = Depends(period), other: Optional[Slice] = Depends(compare_period)):
+    return await respond(views.compared, views.top_expenses, sl, other, n)
 
 # -------- 3) Presupuestos -------- #
 @app.get("/budget_progress")
-def budget_progress(month: Optional[str] = None):
-    m = month or _latest_month()
-    g_m = tx[(tx["month"] == m) & (tx["type"] == "Gasto")].groupby("category", as_index=False)["amount"].sum().rename(columns={"amount":"spent"})
-    lim = budgets[budgets["month"] == m]
-    df = lim.merge(g_m, on="category", how="left").fillna({"spent": 0.0})
-    df["pct"] = (df["spent"] / df["limit"]).replace([np.inf, -np.inf], 0).fillna(0) * 100
-
-    def color(p):
-        if p <= 80: return "green"
-        if p <= 100: return "amber"
-        return "red"
+async def budget_progress(sl: Slice = Depends(period), other: Optional[Slice] = Depends(compare_period)):
+    return await respond(views.compared, views.budget_progress, sl, other)
 
-    df["status"] = df["pct"].apply(color)
-    return {"month": m, "progress": _df_records(df.sort_values("pct", ascending=False))}
+@app.get("/budget_forecast")
+async def budget_forecast(month: Optional[str] = Query(default=None, pattern=f"^({MONTH_PATTERN}|all)$",
+                                                      description="YYYY-MM, o `all` para todos los meses"),
+                    day: Optional[int] = Query(default=None, ge=1, le=31, description="Día de corte; por defecto el último movimiento"),
+                    ds: Dataset = Depends(current)):
+    return await respond(views.budget_forecast, ds, month, day)
 
 # -------- 4) Patrimonio -------- #
 @app.get("/net_worth_series")
-def net_worth_series():
-    df = netw.sort_values("month")[["month","cumulative_cash","value","net_worth"]]
-    return {"series": _df_records(df)}
+async def net_worth_series(
+    resolution: str = Query(default="monthly", pattern="^(daily|weekly|monthly)$"),
+    date_from: Optional[date] = Query(default=None, alias="from", description="YYYY-MM-DD"),
+    date_to: Optional[date] = Query(default=None, alias="to", description="YYYY-MM-DD, inclusive"),
+    ds: Dataset = Depends(current),
+):
+    return await respond(
+        views.net_worth_series, ds, resolution,
+        date_from=pd.Timestamp(date_from) if date_from else None,
+        date_to=pd.Timestamp(date_to) if date_to else None,
+    )
 
 # -------- 5) Inversiones -------- #
 @app.get("/investments_history")
-def investments_history():
-    df = portfolio_monthly.sort_values("month")
-    base = float(df["value"].iloc[0])
-    df["ret_acum"] = (df["value"] / base - 1.0) * 100
-    return {"history": _df_records(df)}
+async def investments_history(ds: Dataset = Depends(current)):
+    return await respond(views.investments_history, ds)
 
 @app.get("/investments_alloc")
-def investments_alloc():
-    last_prices = prices.sort_values("date").groupby("asset").tail(1)[["asset","price"]]
-    alloc = hold.merge(last_prices, on="asset")
-    alloc["value"] = alloc["units"] * alloc["price"]
-    total = float(alloc["value"].sum())
-    alloc["weight_pct"] = (alloc["value"] / total) * 100
-    alloc = alloc.sort_values("value", ascending=False)
-    return {"allocation": _df_records(alloc), "total_value": total}
+async def investments_alloc(as_of: Optional[date] = Query(default=None, description="YYYY-MM-DD; por defecto, lo más reciente"),
+                      ds: Dataset = Depends(current)):
+    return await respond(views.investments_alloc, ds, pd.Timestamp(as_of) if as_of else None)
+
+@app.get("/investments_alloc/batch")
+async def investments_alloc_batch(dates: str = Query(description="Fechas YYYY-MM-DD separadas por coma"),
+                            ds: Dataset = Depends(current)):
+    try:
+        when = [pd.Timestamp(date.fromisoformat(d)) for d in _csv_list(dates) or []]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Fecha inválida: {e}")
+    if not when or len(when) > MAX_BATCH_DATES:
+        raise HTTPException(status_code=400, detail=f"Se esperan entre 1 y {MAX_BATCH_DATES} fechas")
+    return await respond(views.investments_alloc_batch, ds, when)
+
+@app.get("/investments_analytics")
+async def investments_analytics(
+    window: int = Query(default=12, ge=3, description="Períodos de la correlación (mínimo 3 datos)"),
+    risk_free: float = Query(default=0.0, description="Tasa libre de riesgo anual (0.05 = 5%)"),
+    pairs: Optional[str] = Query(default=None, description="Pares `A:B` separados por coma: su correlación móvil"),
+    ds: Dataset = Depends(current),
+):
+    wanted = [tuple(p.split(":")) for p in _csv_list(pairs) or []]
+    if any(len(p) != 2 for p in wanted):
+        raise HTTPException(status_code=400, detail="`pairs` debe ser una lista de `A:B`")
+    if len(wanted) > MAX_ROLLING_PAIRS:
+        raise HTTPException(status_code=400, detail=f"Hasta {MAX_ROLLING_PAIRS} pares por pedido")
+    unknown = sorted({a for p in wanted for a in p} - set(ds.price_matrix.columns.astype(str)))
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Activos desconocidos: {', '.join(unknown)}")
+    return await respond(views.investments_analytics, ds, window, risk_free, wanted)
 
 # -------- 6) Metas -------- #
 @app.get("/goals")
-def get_goals():
-    df = goals.copy()
-    df["progress_pct"] = (df["current_savings"] / df["target_amount"]).clip(0,1) * 100
-    df["due_date"] = df["due_date"].dt.date.astype(str)
-    return {"goals": _df_records(df)}
+async def get_goals(ds: Dataset = Depends(current)):
+    return await respond(views.goals, ds)
+
+async def _simulate_goals(ds: Dataset, names: List[str], contribution: float, months: Optional[int],
+                    paths: int, seed: int):
+    unknown = [g for g in names if g not in set(ds.goals["goal"])]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Metas desconocidas: {', '.join(unknown)}")
+    horizon = months if months is not None else max(
+        min(months_between(views.latest_month(ds), d), MAX_MONTHS)
+        for d in ds.goals.set_index("goal").loc[names, "due_date"])
+    if paths * (horizon + 1) > MAX_CELLS:
+        raise HTTPException(status_code=400, detail=f"paths x meses no puede superar {MAX_CELLS:,}")
+    return await respond(views.goal_simulations, ds, simulator, names, contribution, months, paths, seed)
+
+_SIM_PARAMS = dict(
+    contribution=Query(default=0.0, ge=0, description="Aporte mensual"),
+    months=Query(default=None, ge=0, le=MAX_MONTHS, description="Horizonte; por defecto hasta `due_date`"),
+    paths=Query(default=DEFAULT_PATHS, ge=100, le=MAX_PATHS),
+    seed=Query(default=0, description="Semilla: mismos parámetros, mismo resultado"),
+)
+
+@app.get("/goals/simulate")
+async def simulate_goals(goals: Optional[str] = Query(default=None, description="Metas separadas por coma; por defecto todas"),
+                   contribution: float = _SIM_PARAMS["contribution"], months: Optional[int] = _SIM_PARAMS["months"],
+                   paths: int = _SIM_PARAMS["paths"], seed: int = _SIM_PARAMS["seed"],
+                   ds: Dataset = Depends(current)):
+    names = _csv_list(goals) or ds.goals["goal"].tolist()
+    return await _simulate_goals(ds, list(dict.fromkeys(names)), contribution, months, paths, seed)
+
+@app.get("/goals/{goal}/simulate")
+async def simulate_goal(goal: str, contribution: float = _SIM_PARAMS["contribution"],
+                  months: Optional[int] = _SIM_PARAMS["months"], paths: int = _SIM_PARAMS["paths"],
+                  seed: int = _SIM_PARAMS["seed"], ds: Dataset = Depends(current)):
+    return await _simulate_goals(ds, [goal], contribution, months, paths, seed)
+
+# -------- Dashboard: varias vistas en un solo request -------- #
+@app.get("/dashboard")
+async def dashboard(view_names: str = Query(default="summary", alias="views"),
+              n: int = 10, sl: Slice = Depends(period)):
+    names = list(dict.fromkeys(v.strip() for v in view_names.split(",") if v.strip()))
+    unknown = [v for v in names if v not in views.DASHBOARD]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Vistas desconocidas: {', '.join(unknown)}. "
+                                                    f"Disponibles: {', '.join(views.DASHBOARD)}")
+    return await respond(views.dashboard, sl, names, n)
+
+# -------- Cubo: cortes, tablas cruzadas y detalle por día o descripción -------- #
+@app.get("/cube")
+async def get_cube(
+    rows: str = Query(default="month,type", description=f"Dimensiones separadas por coma: {', '.join(DIMENSIONS)}"),
+    columns: Optional[str] = Query(default=None, description="Dimensión en columnas (tabla cruzada)"),
+    measures: str = Query(default="sum", description=f"Medidas separadas por coma: {', '.join(MEASURES)}"),
+    month: Optional[str] = Query(default=None, description="Meses YYYY-MM separados por coma"),
+    date_from: Optional[date] = Query(default=None, alias="from", description="YYYY-MM-DD"),
+    date_to: Optional[date] = Query(default=None, alias="to", description="YYYY-MM-DD, inclusive"),
+    type: Optional[str] = Query(default=None, description="Ingreso, Gasto (separados por coma)"),
+    category: Optional[str] = Query(default=None, description="Categorías separadas por coma"),
+    ds: Dataset = Depends(current),
+):
+    try:
+        query = CubeQuery(
+            rows=_csv_list(rows) or [], columns=columns or None, measures=_csv_list(measures),
+            months=_csv_list(month), types=_csv_list(type), categories=_csv_list(category),
+            date_from=pd.Timestamp(date_from) if date_from else None,
+            date_to=pd.Timestamp(date_to) if date_to else None,
+        )
+    except InvalidCubeQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await respond(views.cube, ds, query)
+
+# -------- Versión de los datos (invalidación de la caché del cliente) -------- #
+@app.get("/version")
+async def version(ds: Dataset = Depends(current)):
+    """Versión del dataset y de cada CSV; el cliente descarta solo lo que depende de una tabla que cambió."""
+    return {"version": ds.version, "tables": {name: ds.versions.get(name, "") for name in SOURCES}}
+
+# -------- Snapshot completo para calcular en el cliente -------- #
+@app.get("/snapshot.arrow")
+async def snapshot(compression: str = Query(default="zstd", pattern=f"^({'|'.join(COMPRESSIONS)})$"),
+                   ds: Dataset = Depends(current)):
+    """Los seis CSV ya tipados en Arrow IPC (un stream por tabla, ver snapshot.py)."""
+    return StreamingResponse(snapshot_chunks(ds, compression), media_type=MEDIA_TYPE,
+                             headers={"Content-Disposition": 'attachment; filename="snapshot.arrow"'})
 
 # -------- Extras -------- #
+@app.get("/months")
+async def months(ds: Dataset = Depends(current)):
+    return await respond(views.months, ds)
+
+def _csv_list(value: Optional[str]) -> Optional[List[str]]:
+    items = [v.strip() for v in (value or "").split(",") if v.strip()]
+    return items or None
+
 @app.get("/transactions")
-def transactions(month: Optional[str] = None, limit: int = 200):
-    m = month or _latest_month()
-    dfm = tx[tx["month"] == m].copy()
-    dfm["date"] = dfm["date"].dt.date.astype(str)
-    return {"month": m, "rows": _df_records(dfm.head(limit))}
+async def transactions(
+    month: Optional[str] = Query(default=None, description="YYYY-MM, o `all` para toda la historia"),
+    limit: int = 200,
+    cursor: Optional[str] = Query(default=None, description="`next_cursor` de la página anterior"),
+    type: Optional[str] = Query(default=None, description="Ingreso, Gasto (separados por coma)"),
+    category: Optional[str] = Query(default=None, description="Categorías separadas por coma"),
+    date_from: Optional[date] = Query(default=None, alias="from", description="YYYY-MM-DD"),
+    date_to: Optional[date] = Query(default=None, alias="to", description="YYYY-MM-DD, inclusive"),
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    q: Optional[str] = Query(default=None, description="Texto contenido en la descripción"),
+    format: str = Query(default="json", pattern="^(json|ndjson|csv)$"),
+    ds: Dataset = Depends(current),
+):
+    try:
+        query = TransactionQuery(
+            month=month, cursor=cursor, types=_csv_list(type), categories=_csv_list(category),
+            date_from=pd.Timestamp(date_from) if date_from else None,
+            date_to=pd.Timestamp(date_to) if date_to else None,
+            min_amount=min_amount, max_amount=max_amount, q=q,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Exportación completa por bloques: memoria acotada sin importar el tamaño de la historia
+    if format == "ndjson":
+        return StreamingResponse(stream_ndjson(query, ds), media_type="application/x-ndjson")
+    if format == "csv":
+        return StreamingResponse(stream_csv(query, ds), media_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="transactions.csv"'})
+    return await respond(views.transactions, ds, query, limit)
+
+@app.post("/transactions/bulk")
+async def transactions_bulk(body: BulkTransactions, tenant: Tenant = Depends(get_tenant)):
+    """Agrega transacciones; los agregados se actualizan en el acto y el CSV se escribe en diferido."""
+    return await respond(tenant.ingestor.ingest, body.rows)
 
 @app.get("/")
-def root():
+async def root():
     return {"status": "ok", "message": "API de Finanzas Personales funcionando 🚀"}
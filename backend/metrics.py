@@ -0,0 +1,193 @@
+"""
+Métricas de latencia y de carga en formato de texto de Prometheus (`/metrics`).
+
+- `MetricsMiddleware`: histograma de latencia por método, ruta (la plantilla,
+  p.ej. `/goals/{goal}/simulate`) y status.
+- `stage("filter")`: cronómetro de una etapa dentro de un handler (filtrado,
+  agregación, serialización); se etiqueta con la ruta del request en curso.
+- Carga del dataset: segundos por CSV (desde caché o storage) y por
+  estructura derivada, y bytes en memoria de lo cargado (ver dataset.py).
+
+Registrar una observación es un `perf_counter`, un `bisect` y unas sumas bajo
+un lock; el texto solo se arma cuando alguien pide `/metrics`, y los valores
+que cuestan calcular (memoria de cada dataset) se leen en ese momento.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import threading
+import time
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _num(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# ---------------- Tipos de métrica ---------------- #
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labels, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # etiquetas -> [conteo por bucket (el último es +Inf), suma]
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][i] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._series.items())
+        lines = self.header()
+        for labels, (counts, total) in items:
+            acc = 0
+            for le, count in zip(self.buckets + (float("inf"),), counts):
+                acc += count
+                le_label = 'le="{}"'.format("+Inf" if le == float("inf") else _num(le))
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le_label)} {acc}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {acc}")
+        return lines
+
+
+class Gauge(Metric):
+    """Valor que se calcula al pedir `/metrics` con `fn() -> {etiquetas: valor}`."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 fn: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        values = self.fn() if self.fn is not None else {}
+        return self.header() + [f"{self.name}{_labels(self.labels, k)} {_num(v)}" for k, v in sorted(values.items())]
+
+
+REGISTRY: List[Metric] = []
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# ---------------- Métricas de la API ---------------- #
+HTTP_SECONDS = Histogram("finanzas_http_request_duration_seconds", "Latencia de cada request",
+                         ("method", "route", "status"))
+STAGE_SECONDS = Histogram("finanzas_stage_duration_seconds", "Duración de cada etapa dentro de un handler",
+                          ("route", "stage"))
+LOAD_SECONDS = Histogram("finanzas_dataset_load_seconds", "Carga de cada CSV ya tipado",
+                         ("file", "source"))
+LOADED_BYTES = Counter("finanzas_dataset_loaded_bytes_total", "Bytes en memoria de los CSV cargados", ("file",))
+BUILD_SECONDS = Histogram("finanzas_dataset_build_seconds", "Armado de cada estructura derivada", ("name",))
+COMPUTE_REJECTED = Counter("finanzas_compute_rejected_total", "Requests rechazados con 503 por la cola llena")
+DATASET_LOAD_SECONDS = Histogram("finanzas_dataset_full_load_seconds", "Carga completa de un dataset",
+                                 buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+
+
+# ---------------- Etapas y middleware ---------------- #
+_scope: ContextVar[Optional[dict]] = ContextVar("metrics_scope", default=None)
+
+
+def route_of(scope: Optional[dict], router=None) -> str:
+    """Plantilla de la ruta del request (no el path, para acotar las etiquetas)."""
+    if scope is None:
+        return ""
+    route = scope.get("route")
+    if route is None and router is not None:
+        # Respuestas que no llegan al router (p.ej. 304 de la caché de ETag)
+        from starlette.routing import Match
+        route = next((r for r in router.routes if r.matches(scope)[0] == Match.FULL), None)
+    return getattr(route, "path", "unmatched") if route is not None else "unmatched"
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Cronometra una etapa del request en curso (`finanzas_stage_duration_seconds`)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, route_of(_scope.get()), name)
+
+
+class MetricsMiddleware:
+    def __init__(self, app, router=None):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        token = _scope.set(scope)
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_SECONDS.observe(time.perf_counter() - t0, scope["method"], route_of(scope, self.router), status[0])
+            _scope.reset(token)
@@ -0,0 +1,143 @@
+"""
+Simulación Monte Carlo de metas de ahorro (`/goals/{goal}/simulate`).
+
+Cada camino parte del ahorro actual y cada mes suma el aporte y el retorno de
+un mes tomado al azar (bootstrap) de los retornos mensuales históricos del
+portafolio. Todos los caminos se generan juntos como una matriz
+(caminos x meses):
+
+    S_t = G_t * (S_0 + c * sum_{k<=t} 1 / G_k),   G_t = prod_{j<=t} (1 + r_j)
+
+que es la recurrencia S_t = S_{t-1} * (1 + r_t) + c sin bucles por camino.
+
+Los resultados se memorizan por parámetros (incluida la serie de retornos,
+que cambia con la versión de precios/posiciones). Las simulaciones de varias
+metas en un request se reparten en un pool de procesos.
+"""
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_PATHS = 10_000
+MAX_PATHS = 100_000
+MAX_MONTHS = 600
+# caminos x meses por simulación (acota la memoria: ~8 bytes por celda y algunas copias)
+MAX_CELLS = 10_000_000
+
+# Procesos para simular varias metas a la vez; 0 = todo en el proceso de la API
+SIM_WORKERS = int(os.getenv("GOAL_SIM_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Resultados memorizados (por parámetros)
+SIM_CACHE_SIZE = int(os.getenv("GOAL_SIM_CACHE_SIZE", "256"))
+
+SimKey = Tuple[Tuple[float, ...], float, float, int, float, int, int]
+
+
+def monthly_returns(portfolio_monthly: pd.DataFrame) -> np.ndarray:
+    """Retornos mensuales históricos del portafolio (distribución empírica)."""
+    r = portfolio_monthly.sort_values("month")["value"].pct_change().to_numpy()[1:]
+    return r[np.isfinite(r)]
+
+
+def months_between(start: str, end: pd.Timestamp) -> int:
+    """Meses desde el mes `start` (YYYY-MM) hasta el mes de `end`."""
+    s = pd.Period(start, freq="M")
+    return max(0, (end.year - s.year) * 12 + (end.month - s.month))
+
+
+def simulate(returns: Tuple[float, ...], current: float, target: float, months: int,
+             contribution: float, paths: int, seed: int) -> Dict[str, Any]:
+    """Simula `paths` caminos de `months` meses. Función pura: se puede correr en otro proceso."""
+    rng = np.random.default_rng(seed)
+    r = np.asarray(returns, dtype=float)
+    if months == 0:
+        savings = np.full((paths, 1), current)
+    else:
+        draws = r[rng.integers(0, len(r), (paths, months))] if len(r) else np.zeros((paths, months))
+        growth = np.cumprod(1.0 + draws, axis=1)
+        savings = growth * (current + contribution * np.cumsum(1.0 / growth, axis=1))
+        savings = np.hstack([np.full((paths, 1), current), savings])
+
+    reached = np.maximum.accumulate(savings >= target, axis=1)
+    first_hit = np.where(reached.any(axis=1), reached.argmax(axis=1), -1)
+    hit_months = np.sort(first_hit[first_hit >= 0])
+
+    curves = pd.DataFrame({"month_offset": np.arange(savings.shape[1])})
+    for p, values in zip(PERCENTILES, np.percentile(savings, PERCENTILES, axis=0)):
+        curves[f"p{p}"] = values
+    curves["prob_reached_pct"] = reached.mean(axis=0) * 100
+
+    return {
+        "probability_of_success_pct": float((savings[:, -1] >= target).mean() * 100),
+        # mediana contando como "nunca" los caminos que no llegan
+        "median_months_to_target": int(hit_months[(paths - 1) // 2]) if len(hit_months) > (paths - 1) // 2 else None,
+        "final_percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(savings[:, -1], PERCENTILES))},
+        "curves": curves,
+    }
+
+
+class GoalSimulator:
+    def __init__(self, workers: int = SIM_WORKERS, cache_size: int = SIM_CACHE_SIZE):
+        self.workers = workers
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[SimKey, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _pool_or_none(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawn: el proceso de la API tiene hilos (refresco, ingesta), no conviene fork
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _get(self, key: SimKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+            return hit
+
+    def _put(self, key: SimKey, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def run(self, keys: List[SimKey]) -> List[Dict[str, Any]]:
+        """Resultados para cada juego de parámetros; los que no están memorizados se
+        calculan en paralelo en el pool si son varios."""
+        results = [self._get(k) for k in keys]
+        missing = list(dict.fromkeys(k for k, r in zip(keys, results) if r is None))
+        pool = self._pool_or_none() if len(missing) > 1 else None
+        computed = None
+        if pool is not None:
+            try:
+                computed = dict(zip(missing, pool.map(simulate, *zip(*missing))))
+            except BrokenProcessPool:
+                log.exception("Pool de simulación caído; se simula en el proceso de la API")
+                self.shutdown()
+        if computed is None:
+            computed = {k: simulate(*k) for k in missing}
+        for k, r in computed.items():
+            self._put(k, r)
+        return [r if r is not None else computed[k] for k, r in zip(keys, results)]
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
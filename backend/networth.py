@@ -0,0 +1,193 @@
+"""
+Patrimonio calculado a partir de `tx` y de los precios, sin depender de
+`net_worth.csv`.
+
+Se mantienen tres estructuras por snapshot:
+- `cash_daily`: flujo neto y efectivo acumulado por fecha con movimientos
+  (suma acumulada vectorizada). Un lote nuevo solo recalcula desde su primera
+  fecha en adelante (`apply_cash_batch`).
+- `price_matrix`: precio por fecha (filas) y activo (columnas), con el último
+  precio conocido propagado hacia adelante. Si el CSV de precios solo trae
+  fechas nuevas al final, se extiende sin rehacer lo anterior
+  (`extend_price_matrix`).
+- `holdings_matrix`: unidades por fecha x activo (acumulado de los
+  movimientos de `investments_holdings.csv`).
+
+Cualquier punto de la serie se resuelve "as of" con búsqueda binaria sobre
+ellas, así que el costo depende de cuántos puntos se piden, no del tamaño de
+la historia.
+"""
+from typing import Any, Dict, Optional
+import numpy as np
+import pandas as pd
+
+# resolución -> frecuencia de pandas para los períodos
+RESOLUTIONS = {"daily": "D", "weekly": "W-SUN", "monthly": "M"}
+
+SERIES_COLUMNS = ["cumulative_cash", "value", "net_worth"]
+
+
+# ---------------- Efectivo ---------------- #
+def cash_daily(cube: pd.DataFrame) -> pd.DataFrame:
+    """Flujo neto (ingresos - gastos) y efectivo acumulado por fecha, a partir del
+    cubo de transacciones (`cube.build_cube`, ordenado por fecha)."""
+    if cube.empty:
+        return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"),
+                             "net_cash_flow": pd.Series(dtype=float), "cumulative_cash": pd.Series(dtype=float)})
+    kind = cube["type"].to_numpy()
+    amount = cube["sum"].to_numpy(dtype=float)
+    signed = np.select([kind == "Ingreso", kind == "Gasto"], [amount, -amount], default=0.0)
+    dates, starts = np.unique(cube["date"].to_numpy(), return_index=True)
+    flow = np.add.reduceat(signed, starts)
+    return pd.DataFrame({"date": dates, "net_cash_flow": flow, "cumulative_cash": np.cumsum(flow)})
+
+
+def apply_cash_batch(daily: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """`cash_daily` con las filas de un lote sumadas (`delta`: su cubo).
+
+    Las fechas anteriores al lote no cambian; solo se vuelve a acumular desde
+    la primera fecha del lote (lo habitual: solo las fechas nuevas al final).
+    """
+    new = cash_daily(delta)
+    if new.empty:
+        return daily
+    k = int(daily["date"].searchsorted(new["date"].iloc[0], side="left"))
+    base = float(daily["cumulative_cash"].iloc[k - 1]) if k else 0.0
+    tail = (
+        pd.concat([daily.iloc[k:][["date", "net_cash_flow"]], new[["date", "net_cash_flow"]]])
+          .groupby("date", as_index=False, sort=True)["net_cash_flow"].sum()
+    )
+    tail["cumulative_cash"] = base + tail["net_cash_flow"].cumsum()
+    return pd.concat([daily.iloc[:k], tail], ignore_index=True)
+
+
+# ---------------- Precios ---------------- #
+def price_matrix(prices: pd.DataFrame) -> pd.DataFrame:
+    """Precio por fecha x activo, con el último precio conocido hacia adelante."""
+    return (
+        prices.pivot_table(index="date", columns="asset", values="price", aggfunc="last")
+              .sort_index()
+              .ffill()
+    )
+
+
+def extend_price_matrix(matrix: pd.DataFrame, old: pd.DataFrame, new: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Extiende `matrix` con las filas que `new` agrega al final de `old`.
+
+    Devuelve None si `new` no es `old` más filas posteriores (hay que rearmarla).
+    """
+    if len(new) < len(old) or not new.iloc[:len(old)].reset_index(drop=True).equals(old.reset_index(drop=True)):
+        return None
+    added = new.iloc[len(old):]
+    if added.empty:
+        return matrix
+    if len(matrix) and added["date"].min() <= matrix.index[-1]:
+        return None
+    tail = pd.concat([matrix.iloc[-1:], price_matrix(added)]).ffill().iloc[1 if len(matrix) else 0:]
+    return pd.concat([matrix, tail])
+
+
+# ---------------- Posiciones ---------------- #
+def holdings_matrix(hold: pd.DataFrame) -> pd.DataFrame:
+    """Unidades por fecha x activo: acumulado de los movimientos hasta cada fecha.
+
+    Con columna `date`, cada fila es un cambio de unidades (compra > 0, venta
+    < 0) desde esa fecha. Sin ella, o con la fecha vacía, las unidades valen
+    desde siempre (el `investments_holdings.csv` estático de siempre).
+    """
+    dates = hold["date"].fillna(pd.Timestamp.min) if "date" in hold else pd.Timestamp.min
+    return (
+        hold.assign(date=dates)
+            .pivot_table(index="date", columns="asset", values="units", aggfunc="sum", fill_value=0.0)
+            .sort_index()
+            .cumsum()
+    )
+
+
+def _rows_as_of(frame: pd.DataFrame, when: pd.DatetimeIndex, fill: float) -> np.ndarray:
+    """Fila de `frame` vigente en cada fecha de `when` (búsqueda binaria sobre el índice)."""
+    pos = frame.index.searchsorted(when, side="right") - 1
+    if not len(frame):
+        return np.full((len(when), frame.shape[1]), fill)
+    return np.where((pos >= 0)[:, None], frame.to_numpy(dtype=float)[np.maximum(pos, 0)], fill)
+
+
+def prices_at(matrix: pd.DataFrame, when: pd.DatetimeIndex) -> np.ndarray:
+    """Último precio conocido de cada activo en cada fecha (NaN si aún no cotiza)."""
+    return _rows_as_of(matrix, when, np.nan)
+
+
+def units_at(holdings: pd.DataFrame, when: pd.DatetimeIndex, assets: pd.Index) -> np.ndarray:
+    """Unidades de cada activo de `assets` en cada fecha de `when`."""
+    return _rows_as_of(holdings.reindex(columns=assets, fill_value=0.0), when, 0.0)
+
+
+def positions_at(matrix: pd.DataFrame, holdings: pd.DataFrame, when: pd.DatetimeIndex) -> pd.DataFrame:
+    """Una fila por (fecha, activo con unidades y precio): units, price, value, weight_pct."""
+    assets = matrix.columns
+    price = prices_at(matrix, when)
+    units = units_at(holdings, when, assets)
+    value = price * units
+    keep = (units != 0) & np.isfinite(price)
+    total = np.where(keep, value, 0.0).sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(total != 0, value / total * 100, 0.0)
+    d, a = np.nonzero(keep)
+    return pd.DataFrame({
+        "date": when[d], "asset": assets[a].astype(str), "units": units[d, a],
+        "price": price[d, a], "value": value[d, a], "weight_pct": weight[d, a],
+    })
+
+
+# ---------------- Serie de patrimonio ---------------- #
+def _as_of(cash: pd.DataFrame, matrix: pd.DataFrame, holdings: pd.DataFrame,
+           when: pd.DatetimeIndex) -> pd.DataFrame:
+    """Efectivo, inversiones y patrimonio al cierre de cada fecha de `when`."""
+    pos = cash["date"].searchsorted(when, side="right") - 1
+    cum = cash["cumulative_cash"].to_numpy()
+    cumulative_cash = np.where(pos >= 0, cum[np.maximum(pos, 0)] if len(cum) else 0.0, 0.0)
+
+    value = np.nansum(prices_at(matrix, when) * units_at(holdings, when, matrix.columns), axis=1)
+    return pd.DataFrame({"cumulative_cash": cumulative_cash, "value": value,
+                         "net_worth": cumulative_cash + value})
+
+
+def history_bounds(cash: pd.DataFrame, matrix: pd.DataFrame):
+    """Primera y última fecha con datos de efectivo o de precios."""
+    firsts = [d for d in (cash["date"].min() if len(cash) else None,
+                          matrix.index.min() if len(matrix) else None) if d is not None]
+    lasts = [d for d in (cash["date"].max() if len(cash) else None,
+                         matrix.index.max() if len(matrix) else None) if d is not None]
+    return (min(firsts), max(lasts)) if firsts else (None, None)
+
+
+def net_worth_series(cash: pd.DataFrame, matrix: pd.DataFrame, holdings: pd.DataFrame,
+                     resolution: str = "monthly", date_from: Optional[pd.Timestamp] = None,
+                     date_to: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """Un punto por día, semana (lunes a domingo) o mes entre `date_from` y `date_to`.
+
+    Cada punto es el cierre del período (o `date_to` si el período queda
+    cortado). Las series mensuales se etiquetan con `month` (YYYY-MM) y las
+    demás con `date`.
+    """
+    first, last = history_bounds(cash, matrix)
+    start = pd.Timestamp(date_from) if date_from is not None else first
+    end = pd.Timestamp(date_to) if date_to is not None else last
+    label = "month" if resolution == "monthly" else "date"
+    if start is None or end is None or start > end:
+        return pd.DataFrame(columns=[label] + SERIES_COLUMNS)
+
+    periods = pd.period_range(start, end, freq=RESOLUTIONS[resolution])
+    when = pd.DatetimeIndex(np.minimum(periods.end_time.normalize(), end))
+    out = _as_of(cash, matrix, holdings, when)
+    out.insert(0, label, periods.strftime("%Y-%m") if resolution == "monthly" else when.strftime("%Y-%m-%d"))
+    return out
+
+
+def net_worth_at(cash: pd.DataFrame, matrix: pd.DataFrame, holdings: pd.DataFrame,
+                 when: Optional[pd.Timestamp] = None) -> Dict[str, Any]:
+    """Efectivo, inversiones y patrimonio en `when` (por defecto, la última fecha con datos)."""
+    when = pd.Timestamp(when) if when is not None else history_bounds(cash, matrix)[1]
+    if when is None:
+        return {c: 0.0 for c in SERIES_COLUMNS}
+    return {c: float(v) for c, v in _as_of(cash, matrix, holdings, pd.DatetimeIndex([when])).iloc[0].items()}
@@ -0,0 +1,145 @@
+"""
+Consultas sobre rangos de fechas arbitrarios (`from`/`to`, `compare_to`).
+
+`DailySums` guarda, para cada fecha con movimientos, el monto y la cantidad
+de filas acumulados hasta esa fecha por tipo (Ingreso/Gasto) y categoría.
+El total de cualquier rango es la resta de dos filas (`cum[hi] - cum[lo]`,
+con `searchsorted` sobre las fechas): O(categorías) sin importar cuántos
+días o filas abarque. Las restas se redondean a centavos (`cents`), igual que
+el índice por mes, así un rango y un mes con las mismas filas dan lo mismo.
+Las filas del rango son un tramo contiguo de `tx` (ordenado por fecha), así
+que el top-N se elige sobre ese tramo con una selección parcial
+(`np.partition`) en vez de ordenar todas las filas.
+"""
+from typing import NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+from aggregates import EMPTY_MONTH, MonthAggregate, cents
+
+TYPES = pd.Index(["Ingreso", "Gasto"])
+
+
+class DailySums(NamedTuple):
+    dates: np.ndarray       # datetime64[ns], fechas con movimientos (únicas, ordenadas)
+    categories: pd.Index
+    cum: np.ndarray         # (fechas + 1, tipos, categorías): monto acumulado; cum[k] = primeras k fechas
+    count: np.ndarray       # (fechas + 1, tipos, categorías): filas acumuladas
+    rows: np.ndarray        # (fechas + 1,): filas de `tx` (de cualquier tipo) acumuladas
+
+
+def build_daily_sums(cube: pd.DataFrame) -> DailySums:
+    """Acumulados a partir del cubo de transacciones (`cube.build_cube`)."""
+    dates, d = np.unique(cube["date"].to_numpy(dtype="datetime64[ns]"), return_inverse=True)
+    categories = pd.Index(np.unique(cube["category"].to_numpy().astype(str)))
+    t = TYPES.get_indexer(cube["type"].astype(str))
+    c = categories.get_indexer(cube["category"].astype(str))
+    keep = t >= 0
+    flat = (d[keep] * len(TYPES) + t[keep]) * len(categories) + c[keep]
+    size = len(dates) * len(TYPES) * len(categories)
+    shape = (len(dates), len(TYPES), len(categories))
+    n = cube["count"].to_numpy()
+    amount = np.bincount(flat, weights=cube["sum"].to_numpy(dtype=float)[keep], minlength=size).reshape(shape)
+    count = np.bincount(flat, weights=n[keep], minlength=size).reshape(shape).astype(np.int64)
+    rows = np.bincount(d, weights=n, minlength=len(dates)).astype(np.int64)
+
+    def cumulative(a: np.ndarray) -> np.ndarray:
+        return np.concatenate([np.zeros((1,) + a.shape[1:], dtype=a.dtype), a.cumsum(axis=0)])
+
+    return DailySums(dates, categories, cumulative(amount), cumulative(count), cumulative(rows))
+
+
+def _at(sums: DailySums, dates: np.ndarray, categories: pd.Index):
+    """Acumulados de `sums` al cierre de cada fecha de `dates`, en las columnas `categories`."""
+    k = np.searchsorted(sums.dates, dates, side="right")
+    k = np.concatenate([[0], k])
+    ci = categories.get_indexer(sums.categories)
+    cum = np.zeros((len(k), len(TYPES), len(categories)))
+    count = np.zeros(cum.shape, dtype=sums.count.dtype)
+    cum[:, :, ci] = sums.cum[k]
+    count[:, :, ci] = sums.count[k]
+    return cum, count, sums.rows[k]
+
+
+def apply_daily_batch(sums: DailySums, delta: pd.DataFrame) -> DailySums:
+    """`sums` más las filas de un lote (`delta`: su cubo), O(fechas x categorías) sin recorrer `tx`.
+
+    El acumulado a una fecha es el de antes más el del lote a esa misma
+    fecha, así que se suman los dos por `searchsorted` sin diferenciar y
+    volver a acumular.
+    """
+    delta = build_daily_sums(delta)
+    if not len(delta.dates):
+        return sums
+    dates = np.union1d(sums.dates, delta.dates)
+    categories = sums.categories.union(delta.categories)
+    old, new = _at(sums, dates, categories), _at(delta, dates, categories)
+    return DailySums(dates, categories, old[0] + new[0], old[1] + new[1], old[2] + new[2])
+
+
+# ---------------- Consultas ---------------- #
+def range_bounds(sums: DailySums, start: pd.Timestamp, end: pd.Timestamp):
+    """Filas `[lo, hi)` de `cum` que delimitan las fechas entre `start` y `end` (inclusive)."""
+    lo = int(np.searchsorted(sums.dates, np.datetime64(start, "ns"), side="left"))
+    hi = int(np.searchsorted(sums.dates, np.datetime64(end, "ns"), side="right"))
+    return lo, max(lo, hi)
+
+
+def range_aggregate(sums: DailySums, start: pd.Timestamp, end: pd.Timestamp) -> MonthAggregate:
+    """Mismos agregados que un mes del índice, para las fechas entre `start` y `end`.
+
+    `start`/`stop` son los offsets de las filas del rango en `tx`.
+    """
+    lo, hi = range_bounds(sums, start, end)
+    if lo == hi:
+        r = int(sums.rows[lo])
+        return EMPTY_MONTH._replace(start=r, stop=r)
+    amount = cents(sums.cum[hi] - sums.cum[lo])    # (tipos, categorías)
+    count = sums.count[hi] - sums.count[lo]
+    gasto = TYPES.get_loc("Gasto")
+    present = count[gasto] > 0
+    gastos_cat = (
+        pd.DataFrame({"category": sums.categories[present].astype(object), "amount": amount[gasto, present]})
+          .sort_values("amount", ascending=False, kind="stable")
+          .reset_index(drop=True)
+    )
+    return MonthAggregate(int(sums.rows[lo]), int(sums.rows[hi]), float(cents(amount[TYPES.get_loc("Ingreso")].sum())),
+                          float(cents(amount[gasto].sum())), gastos_cat)
+
+
+def range_limits(limits: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """Presupuesto por categoría de un rango: el límite de cada mes que toca,
+    proporcional a los días del mes que quedan dentro del rango."""
+    periods = pd.period_range(start, end, freq="M")
+    first = np.maximum(periods.start_time.to_numpy(), np.datetime64(start, "ns"))
+    last = np.minimum(periods.end_time.normalize().to_numpy(), np.datetime64(end, "ns"))
+    weight = ((last - first) // np.timedelta64(1, "D") + 1) / periods.days_in_month.to_numpy()
+    lim = limits.reindex(index=periods.astype(str)).to_numpy(dtype=float)
+    defined = np.isfinite(lim).any(axis=0)
+    total = np.nansum(lim * weight[:, None], axis=0)
+    return pd.DataFrame({"category": limits.columns[defined].astype(object), "limit": total[defined]})
+
+
+def top_positions(values: np.ndarray, n: int) -> np.ndarray:
+    """Posiciones de los `n` mayores de `values` (sin NaN), de mayor a menor.
+
+    Como `nlargest(keep="first")`: los empates se resuelven por orden de
+    aparición. Se ordenan solo los `n` elegidos, no todo el arreglo.
+    """
+    pos = np.flatnonzero(~np.isnan(values))
+    if n <= 0 or not len(pos):
+        return pos[:0]
+    if n < len(pos):
+        v = values[pos]
+        kth = np.partition(v, len(v) - n)[len(v) - n]
+        above = pos[v > kth]
+        pos = np.concatenate([above, pos[v == kth][:n - len(above)]])
+        pos.sort()
+    return pos[np.lexsort((pos, -values[pos]))]
+
+
+def date_span(sums: DailySums) -> Optional[tuple]:
+    """Primera y última fecha con movimientos (None si no hay ninguna)."""
+    if not len(sums.dates):
+        return None
+    return pd.Timestamp(sums.dates[0]), pd.Timestamp(sums.dates[-1])
@@ -0,0 +1,75 @@
+"""
+Serialización JSON de respuestas con DataFrames.
+
+`FrameJSONResponse` acepta el contenido de siempre (dicts, listas, escalares)
+pero con DataFrames dentro: cada DataFrame se convierte columna por columna
+(un `tolist` por columna, fechas con `datetime_as_string`) y se codifica con
+orjson, sin pasar por `to_dict` + `jsonable_encoder` celda por celda. Los
+floats salen con la representación más corta que vuelve al mismo valor
+(17129.07, no 17129.069999999999709), igual que `repr`.
+"""
+from itertools import repeat
+from typing import Any, Dict, Iterator, List
+import json
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+
+def _default(obj: Any):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(obj).isoformat()
+    if isinstance(obj, pd.Series):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} no es serializable a JSON")
+
+
+def _column(s: pd.Series) -> list:
+    """Valores de una columna como objetos de Python que orjson codifica directo (faltantes = None)."""
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "fiub":
+        return s.to_numpy().tolist()        # NaN -> null en orjson
+    if pd.api.types.is_datetime64_any_dtype(s):
+        if getattr(s.dt, "tz", None) is not None:
+            s = s.dt.tz_convert(None)
+        iso = np.datetime_as_string(s.to_numpy(dtype="datetime64[ms]"), unit="ms").tolist()
+        return [None if missing else v for v, missing in zip(iso, s.isna().to_numpy())]
+    return s.astype(object).where(s.notna(), None).tolist()
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    columns = [str(c) for c in df.columns]
+    return list(map(dict, map(zip, repeat(columns), zip(*(_column(df[c]) for c in df.columns)))))
+
+
+def _orjson(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def frame_json(df: pd.DataFrame) -> str:
+    """Lista de registros JSON del DataFrame (las fechas como ISO 8601, NaN como null)."""
+    return _orjson(frame_records(df)).decode("utf-8")
+
+
+def frame_lines(df: pd.DataFrame) -> Iterator[bytes]:
+    """Un registro JSON por línea (NDJSON)."""
+    for record in frame_records(df):
+        yield _orjson(record) + b"\n"
+
+
+def dumps(obj: Any) -> str:
+    if isinstance(obj, pd.DataFrame):
+        return frame_json(obj)
+    if isinstance(obj, dict):
+        return "{" + ",".join(f"{json.dumps(str(k), ensure_ascii=False)}:{dumps(v)}" for k, v in obj.items()) + "}"
+    if isinstance(obj, (list, tuple)):
+        return "[" + ",".join(dumps(v) for v in obj) + "]"
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, default=_default)
+
+
+class FrameJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content).encode("utf-8")
@@ -0,0 +1,205 @@
+"""
+Un solo dataset compartido entre los workers de uvicorn (`--workers N`).
+
+Sin esto cada worker descarga y guarda su propia copia de los CSV. Con
+`SHARED_DATASET_DIR` (idealmente en `/dev/shm`) uno de los workers, el que
+toma el lock `loader.lock`, es el cargador: descarga los CSV, los refresca y
+publica cada versión como archivos Arrow IPC (el mismo formato que
+`cache.ColumnarCache`) más un manifiesto `CURRENT.json` con el número de
+generación y la versión de cada archivo. El resto de workers abren esos
+archivos con memory-map: las columnas numéricas, las fechas y el texto
+(`str` respaldado por Arrow) no se copian, así que esos datos quedan una sola
+vez en memoria (en el page cache, compartido) y se descargan una sola vez.
+Cada worker solo tiene su copia de los códigos de las categorías (un byte
+por fila) y de las estructuras derivadas que no se comparten.
+
+El manifiesto se reemplaza con `os.replace`, así que un worker ve la
+generación anterior o la nueva completa. Las estructuras derivadas que son
+DataFrames (matriz de precios, efectivo diario, ...) también se comparten;
+las demás las arma cada worker. Si el cargador muere se libera el lock y otro
+worker toma su lugar en la siguiente revisión.
+"""
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from cache import ColumnarCache
+from dataset import SOURCES, Dataset, DatasetSlot, default_slot, is_local_version, load_dataset, sources_of
+from refresh import DatasetRefresher
+from storage import Storage
+
+log = logging.getLogger(__name__)
+
+MANIFEST = "CURRENT.json"
+LOCK = "loader.lock"
+
+
+def derived_version(key: str, versions: Dict[str, str]) -> Optional[str]:
+    """Versión de una estructura derivada: la de los CSV de los que depende
+    (None si alguno tiene cambios locales sin persistir)."""
+    deps = [versions.get(d) for d in sources_of(key)]
+    if any(v is None or is_local_version(v) for v in deps):
+        return None
+    return "|".join(deps)
+
+
+class SharedDataset:
+    """Publica (cargador) o adopta (resto de workers) generaciones del dataset.
+
+    Ocupa el lugar del `DatasetRefresher` del tenant por defecto: `check_once`
+    refresca y publica si es el cargador, o adopta la última generación si no.
+    """
+
+    def __init__(self, root: str, storage: Storage, cache: Optional[ColumnarCache] = None,
+                 slot: DatasetSlot = default_slot, attach_timeout: float = 120.0):
+        self.root = root
+        self.store = ColumnarCache(root)
+        self.storage = storage
+        self.cache = cache
+        self.slot = slot
+        self.refresher = DatasetRefresher(storage, cache=cache, slot=slot)
+        self.attach_timeout = attach_timeout
+        self.generation = 0
+        self._lock_file = None
+
+    @property
+    def is_loader(self) -> bool:
+        return self._lock_file is not None
+
+    # -------- Manifiesto y lock -------- #
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.root, MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        path = os.path.join(self.root, MANIFEST)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, path)
+
+    def _try_lock(self) -> bool:
+        import fcntl
+        f = open(os.path.join(self.root, LOCK), "a+")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        self._lock_file = f
+        return True
+
+    # -------- Arranque -------- #
+    def attach(self) -> None:
+        """Deja publicado en `slot` el dataset: lo carga si este worker es el
+        cargador, o espera la primera generación si no."""
+        deadline = time.monotonic() + self.attach_timeout
+        while True:
+            if self._try_lock():
+                self._become_loader()
+                return
+            if self._adopt():
+                return
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"No hay dataset compartido en {self.root} tras {self.attach_timeout:.0f} s")
+            time.sleep(0.2)
+
+    def _become_loader(self) -> None:
+        manifest = self._read_manifest()
+        self.generation = manifest["generation"] if manifest else 0
+        if not self.slot.loaded:
+            self.slot.publish(load_dataset(self.storage, self.cache))
+        self._publish(force=True)
+        log.info("Worker %d es el cargador del dataset compartido (generación %d)", os.getpid(), self.generation)
+
+    # -------- Cargador -------- #
+    def _share(self, name: str, version: str, df: pd.DataFrame) -> pd.DataFrame:
+        # El propio cargador también se queda con la copia mapeada, no con la suya
+        shared = self.store.load(name, version)
+        if shared is None:
+            self.store.store(name, version, df)
+            shared = self.store.load(name, version)
+        return shared if shared is not None else df
+
+    def _publish(self, force: bool = False) -> bool:
+        """Publica una nueva generación si cambió alguna versión persistida."""
+        with self.slot.write_lock:
+            ds = self.slot.current()
+            previous = self._read_manifest() or {"versions": {}, "derived": {}}
+            versions = {n: v for n, v in ds.versions.items() if not is_local_version(v)}
+            if not force and versions == {n: previous["versions"].get(n) for n in versions}:
+                return False
+
+            frames = dict(ds.frames)
+            for name, version in versions.items():
+                frames[name] = self._share(name, version, ds.frames[name])
+            derived, derived_versions = dict(ds.derived), {}
+            for key, value in ds.derived.items():
+                version = derived_version(key, ds.versions)
+                if isinstance(value, pd.DataFrame) and version is not None:
+                    derived[key] = self._share(key, version, value)
+                    derived_versions[key] = version
+            self.slot.publish(Dataset(frames, ds.versions, derived, ds.load_report))
+
+            self.generation += 1
+            # Lo que aún no está persistido sigue con la versión de la generación anterior
+            self._write_manifest({
+                "generation": self.generation,
+                "versions": {**previous["versions"], **versions},
+                "derived": {**previous["derived"], **derived_versions},
+            })
+        log.info("Generación %d del dataset compartido publicada", self.generation)
+        return True
+
+    # -------- Resto de workers -------- #
+    def _adopt(self) -> List[str]:
+        """Adopta la última generación publicada. Devuelve los CSV que cambiaron."""
+        manifest = self._read_manifest()
+        if manifest is None or manifest["generation"] == self.generation or set(manifest["versions"]) != set(SOURCES):
+            return []
+        with self.slot.write_lock:
+            ds = self.slot.current() if self.slot.loaded else None
+            frames, versions = {}, {}
+            for name, version in manifest["versions"].items():
+                mine = ds.versions.get(name) if ds is not None else None
+                # Lo ingerido en este worker y aún no persistido no se pisa
+                if mine == version or is_local_version(mine):
+                    continue
+                df = self.store.load(name, version)
+                if df is None:
+                    return []       # ya hay otra generación en camino; se reintenta
+                frames[name], versions[name] = df, version
+            if ds is not None and not frames:
+                self.generation = manifest["generation"]
+                return []
+
+            merged = {**(ds.frames if ds is not None else {}), **frames}
+            merged_versions = {**(ds.versions if ds is not None else {}), **versions}
+            derived = {k: v for k, v in (ds.derived if ds is not None else {}).items()
+                       if not set(sources_of(k)) & set(frames)}
+            for key, version in manifest.get("derived", {}).items():
+                if key not in derived and version == derived_version(key, merged_versions):
+                    df = self.store.load(key, version)
+                    if df is not None:
+                        derived[key] = df
+            self.slot.publish(Dataset(merged, merged_versions, derived))
+            self.generation = manifest["generation"]
+        log.info("Generación %d del dataset compartido adoptada (%s)", self.generation, ", ".join(frames))
+        return list(frames)
+
+    def check_once(self) -> List[str]:
+        if not self.is_loader and self._try_lock():
+            self._become_loader()
+            return []
+        if self.is_loader:
+            changed = self.refresher.check_once()
+            self._publish()
+            return changed
+        return self._adopt()
@@ -0,0 +1,60 @@
+"""
+Snapshot del dataset en Arrow IPC comprimido (`/snapshot.arrow`).
+
+El cuerpo son varios streams IPC seguidos, uno por CSV ya tipado, con el
+nombre de la tabla y su versión en los metadatos del esquema; se leen en
+orden con `pyarrow.ipc.open_stream` hasta que no quedan bytes. Cada tabla
+se convierte y se escribe por bloques de `CHUNK_ROWS` filas comprimidos
+(zstd por defecto), así el servidor no arma el archivo entero en memoria y
+el cliente recibe las fechas, categorías y montos ya tipados.
+
+El ETag de la respuesta es el de cualquier GET (versión del dataset, ver
+http_cache.py): el cliente revalida con `If-None-Match` y solo vuelve a
+bajar el snapshot cuando cambian los datos.
+"""
+from typing import Iterator, List, Optional
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from dataset import SOURCES, Dataset
+
+MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COMPRESSIONS = ("zstd", "lz4", "none")
+CHUNK_ROWS = 65_536
+
+
+class _Chunks:
+    """Destino de escritura que acumula bytes hasta que se los retira con `take`."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        out, self._parts = b"".join(self._parts), []
+        return out
+
+
+def snapshot_chunks(ds: Dataset, compression: str = "zstd", tables: Optional[List[str]] = None) -> Iterator[bytes]:
+    """Bytes del snapshot, un bloque de filas comprimido a la vez."""
+    options = ipc.IpcWriteOptions(compression=None if compression == "none" else compression)
+    for name in tables or SOURCES:
+        df = ds.frames[name]
+        schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+        schema = schema.with_metadata({**(schema.metadata or {}), b"table": name.encode(),
+                                       b"version": ds.versions.get(name, "").encode()})
+        sink = _Chunks()
+        with ipc.new_stream(sink, schema, options=options) as writer:
+            for start in range(0, len(df), CHUNK_ROWS):
+                chunk = df.iloc[start:start + CHUNK_ROWS]
+                writer.write_batch(pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+                yield sink.take()
+        yield sink.take()
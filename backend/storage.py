@@ -0,0 +1,252 @@
+"""
+Capa de almacenamiento de los CSV.
+
+Tres backends con la misma interfaz:
+- `AzureBlobStorage`: el contenedor de Azure Blob Storage (producción).
+- `LocalStorage`: un directorio local, p.ej. `backend/data/` (desarrollo y pruebas de carga).
+- `MemoryStorage`: blobs en memoria (stand-in para pruebas).
+
+`open(name)` devuelve un stream legible junto con la versión (ETag, mtime...)
+de ese mismo contenido, así `pd.read_csv` consume los datos sin armar antes
+un `bytes` completo.
+"""
+from typing import BinaryIO, Dict, Iterator, Tuple
+import io
+import mmap
+import os
+import threading
+
+# Tope de un Append Block en Azure (4 MiB); los flushes más grandes van en varios
+APPEND_BLOCK_BYTES = 4 * 1024 * 1024
+
+
+class Storage:
+    """Los métodos de lectura lanzan `FileNotFoundError` si el archivo no existe."""
+
+    def version(self, name: str) -> str:
+        """Versión actual del archivo, sin leer su contenido."""
+        raise NotImplementedError
+
+    def open(self, name: str) -> Tuple[BinaryIO, str]:
+        """Stream de lectura del archivo y la versión de ese contenido."""
+        raise NotImplementedError
+
+    def write(self, name: str, data: bytes) -> str:
+        """Reemplaza el archivo y devuelve la nueva versión."""
+        raise NotImplementedError
+
+    def append(self, name: str, data: bytes) -> str:
+        """Agrega `data` al final del archivo y devuelve la nueva versión."""
+        raise NotImplementedError
+
+
+class _ChunkStream(io.RawIOBase):
+    """Adapta un iterador de chunks de bytes a un archivo de solo lectura."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buf = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf:
+            try:
+                self._buf = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+
+# ---------------- Azure Blob Storage ---------------- #
+class AzureBlobStorage(Storage):
+    def __init__(self, conn_str: str, container: str):
+        from azure.storage.blob import BlobServiceClient
+        self._container = BlobServiceClient.from_connection_string(conn_str).get_container_client(container)
+
+    def version(self, name: str) -> str:
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            return self._container.get_blob_client(name).get_blob_properties().etag
+        except ResourceNotFoundError as e:
+            raise FileNotFoundError(name) from e
+
+    def open(self, name: str) -> Tuple[BinaryIO, str]:
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            downloader = self._container.get_blob_client(name).download_blob()
+        except ResourceNotFoundError as e:
+            raise FileNotFoundError(name) from e
+        return io.BufferedReader(_ChunkStream(downloader.chunks())), downloader.properties.etag
+
+    def write(self, name: str, data: bytes) -> str:
+        # Append blob: `append` sube solo las filas nuevas (ver abajo)
+        from azure.storage.blob import BlobType
+        props = self._container.get_blob_client(name).upload_blob(data, blob_type=BlobType.APPENDBLOB,
+                                                                  overwrite=True)
+        return props["etag"]
+
+    def append(self, name: str, data: bytes) -> str:
+        # Los CSV son append blobs: cada flush sube solo `data` (Append Block), sin bajar
+        # ni reescribir el archivo. Los bloques van condicionados a la posición esperada,
+        # así una escritura concurrente hace fallar esta en vez de intercalarse
+        from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+        blob = self._container.get_blob_client(name)
+        try:
+            size = blob.get_blob_properties().size
+            return self._append_blocks(blob, size, data)
+        except ResourceNotFoundError as e:
+            raise FileNotFoundError(name) from e
+        except HttpResponseError as e:
+            if e.error_code != "InvalidBlobType":
+                raise
+        # Block blob de antes de este cambio: se convierte una vez a append blob
+        return self._convert_to_append(blob, data)
+
+    @staticmethod
+    def _append_blocks(blob, size: int, data: bytes) -> str:
+        props = None
+        for start in range(0, len(data), APPEND_BLOCK_BYTES):
+            chunk = data[start:start + APPEND_BLOCK_BYTES]
+            props = blob.append_block(chunk, length=len(chunk), appendpos_condition=size + start)
+        return props["etag"] if props is not None else blob.get_blob_properties().etag
+
+    @staticmethod
+    def _convert_to_append(blob, data: bytes) -> str:
+        from azure.core import MatchConditions
+        from azure.storage.blob import BlobType
+        downloader = blob.download_blob()
+        current = downloader.readall()
+        props = blob.upload_blob(current + data, blob_type=BlobType.APPENDBLOB, overwrite=True,
+                                 etag=downloader.properties.etag,
+                                 match_condition=MatchConditions.IfNotModified)
+        return props["etag"]
+
+
+# ---------------- Directorio local ---------------- #
+class LocalStorage(Storage):
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @staticmethod
+    def _stat_version(st: os.stat_result) -> str:
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+    def version(self, name: str) -> str:
+        return self._stat_version(os.stat(self._path(name)))
+
+    def open(self, name: str) -> Tuple[BinaryIO, str]:
+        # mmap: las páginas las sirve el page cache, sin copiar el archivo a un bytes
+        with open(self._path(name), "rb") as f:
+            st = os.fstat(f.fileno())
+            version = self._stat_version(st)
+            if st.st_size == 0:
+                return io.BytesIO(b""), version
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), version
+
+    def write(self, name: str, data: bytes) -> str:
+        path = self._path(name)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return self.version(name)
+
+    def append(self, name: str, data: bytes) -> str:
+        with open(self._path(name), "ab") as f:
+            f.write(data)
+        return self.version(name)
+
+
+# ---------------- En memoria ---------------- #
+class MemoryStorage(Storage):
+    def __init__(self, blobs: Dict[str, bytes] = None):
+        self._lock = threading.Lock()
+        self._blobs: Dict[str, Tuple[bytes, str]] = {}
+        self._counter = 0
+        for name, data in (blobs or {}).items():
+            self.write(name, data)
+
+    @classmethod
+    def from_directory(cls, root: str) -> "MemoryStorage":
+        blobs = {}
+        for dirpath, _, files in os.walk(root):
+            for fname in files:
+                path = os.path.join(dirpath, fname)
+                with open(path, "rb") as f:
+                    blobs[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+        return cls(blobs)
+
+    def _get(self, name: str) -> Tuple[bytes, str]:
+        try:
+            return self._blobs[name]
+        except KeyError:
+            raise FileNotFoundError(name) from None
+
+    def version(self, name: str) -> str:
+        return self._get(name)[1]
+
+    def open(self, name: str) -> Tuple[BinaryIO, str]:
+        data, version = self._get(name)
+        return io.BytesIO(data), version
+
+    def write(self, name: str, data: bytes) -> str:
+        with self._lock:
+            self._counter += 1
+            self._blobs[name] = (bytes(data), str(self._counter))
+            return str(self._counter)
+
+    def append(self, name: str, data: bytes) -> str:
+        with self._lock:
+            current = self._blobs.get(name, (b"", ""))[0]
+            self._counter += 1
+            self._blobs[name] = (current + bytes(data), str(self._counter))
+            return str(self._counter)
+
+
+# ---------------- Prefijo (p.ej. un tenant) ---------------- #
+class PrefixedStorage(Storage):
+    """Vista de otro storage limitada a los archivos bajo `prefix` (`"tenants/ana/"`)."""
+
+    def __init__(self, base: Storage, prefix: str):
+        self.base = base
+        self.prefix = prefix
+
+    def version(self, name: str) -> str:
+        return self.base.version(self.prefix + name)
+
+    def open(self, name: str) -> Tuple[BinaryIO, str]:
+        return self.base.open(self.prefix + name)
+
+    def write(self, name: str, data: bytes) -> str:
+        return self.base.write(self.prefix + name, data)
+
+    def append(self, name: str, data: bytes) -> str:
+        return self.base.append(self.prefix + name, data)
+
+
+# ---------------- Selección por entorno ---------------- #
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+def storage_from_env() -> Storage:
+    """`STORAGE_BACKEND` = azure | local | memory.
+
+    Sin valor explícito se usa Azure si hay `AZURE_STORAGE_CONNECTION`, y si no
+    el directorio `LOCAL_DATA_DIR` (por defecto `backend/data/`).
+    """
+    backend = os.getenv("STORAGE_BACKEND") or ("azure" if os.getenv("AZURE_STORAGE_CONNECTION") else "local")
+    data_dir = os.getenv("LOCAL_DATA_DIR", DEFAULT_DATA_DIR)
+    if backend == "azure":
+        return AzureBlobStorage(os.getenv("AZURE_STORAGE_CONNECTION"), os.getenv("AZURE_STORAGE_CONTAINER", "data"))
+    if backend == "local":
+        return LocalStorage(data_dir)
+    if backend == "memory":
+        return MemoryStorage.from_directory(data_dir)
+    raise ValueError(f"STORAGE_BACKEND desconocido: {backend}")
@@ -0,0 +1,233 @@
+"""
+Datasets por tenant.
+
+Cada tenant tiene sus seis CSV bajo un prefijo del storage
+(`tenants/<nombre>/transactions.csv`, ...) y su propio snapshot publicado,
+refresco e ingesta. El tenant por defecto ("") es la raíz del storage: se
+carga al arrancar y nunca se expulsa, así un despliegue de una sola persona
+funciona igual que antes.
+
+Los demás se cargan la primera vez que se piden y quedan en una LRU acotada
+por bytes (`Dataset.memory_bytes`). Si dos requests piden a la vez un tenant
+que no está cargado, solo uno lo carga y el otro espera ese mismo resultado.
+Un tenant solo se expulsa si ningún request lo tiene tomado (`acquire` /
+`release`) y no le quedan transacciones sin persistir; al expulsarlo su
+ingesta se cierra (`IngestClosed`, 503), así ningún lote queda en un
+snapshot que ya nadie va a escribir. Si el storage no acepta lo pendiente,
+el tenant sigue cargado aunque se pase del límite.
+Un solo hilo refresca y otro persiste la ingesta de todos los tenants
+cargados, sin hilos por tenant.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+import logging
+import re
+import threading
+
+from cache import ColumnarCache
+from dataset import Dataset, DatasetSlot, default_slot, load_dataset
+from ingest import TransactionIngestor
+from refresh import DatasetRefresher
+from storage import PrefixedStorage, Storage
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TENANT = ""
+TENANT_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+class InvalidTenant(ValueError):
+    pass
+
+
+class UnknownTenant(LookupError):
+    pass
+
+
+class Tenant:
+    def __init__(self, name: str, storage: Storage, cache: Optional[ColumnarCache], slot: DatasetSlot):
+        self.name = name
+        self.storage = storage
+        self.cache = cache
+        self.slot = slot
+        self.refresher = DatasetRefresher(storage, cache=cache, slot=slot)
+        self.ingestor = TransactionIngestor(storage, slot=slot)
+        self.nbytes = 0
+        # Requests en curso que lo usan (protegido por el lock del registro)
+        self.refs = 0
+
+    def dataset(self) -> Dataset:
+        return self.slot.current()
+
+    def measure(self) -> int:
+        self.nbytes = self.slot.current().memory_bytes()
+        return self.nbytes
+
+
+class TenantRegistry:
+    def __init__(self, storage: Storage, cache: Optional[ColumnarCache] = None,
+                 max_bytes: int = 512 * 1024 * 1024, prefix: str = "tenants/",
+                 loader: Callable[..., Dataset] = load_dataset):
+        self.storage = storage
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._tenants: "OrderedDict[str, Tenant]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        self.default = Tenant(DEFAULT_TENANT, storage, cache, default_slot)
+
+    # -------- Acceso -------- #
+    def get(self, name: str) -> Tenant:
+        """Tenant cargado (lo carga si hace falta). Lanza `InvalidTenant` / `UnknownTenant`."""
+        return self._get(name, hold=False)
+
+    def acquire(self, name: str) -> Tenant:
+        """Como `get`, pero el tenant no se expulsa hasta el `release` correspondiente."""
+        return self._get(name, hold=True)
+
+    def try_acquire(self, name: str) -> Optional[Tenant]:
+        """`acquire` solo si ya está cargado (sin cargarlo); None si no."""
+        if name == DEFAULT_TENANT:
+            return self.default
+        with self._lock:
+            tenant = self._tenants.get(name)
+            if tenant is not None:
+                self._tenants.move_to_end(name)
+                tenant.refs += 1
+            return tenant
+
+    def release(self, tenant: Tenant) -> None:
+        if tenant is self.default:
+            return
+        with self._lock:
+            tenant.refs -= 1
+
+    def _get(self, name: str, hold: bool) -> Tenant:
+        if name == DEFAULT_TENANT:
+            return self.default
+        if not TENANT_RE.match(name):
+            raise InvalidTenant(f"Tenant inválido: {name!r}")
+
+        while True:
+            with self._lock:
+                tenant = self._tenants.get(name)
+                if tenant is not None:
+                    self._tenants.move_to_end(name)
+                    tenant.refs += hold
+                    return tenant
+                fut = self._loading.get(name)
+                owner = fut is None
+                if owner:
+                    fut = self._loading[name] = Future()
+            if owner:
+                return self._load_owned(name, fut, hold)
+            # Se vuelve a buscar en el registro: entre la carga y ahora pudo expulsarse
+            fut.result()
+
+    def _load_owned(self, name: str, fut: Future, hold: bool) -> Tenant:
+        try:
+            tenant = self._load(name)
+        except BaseException as e:
+            with self._lock:
+                self._loading.pop(name, None)
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            self._loading.pop(name, None)
+            tenant.refs += hold
+            self._tenants[tenant.name] = tenant
+            evicted = self._evict_locked(keep=tenant.name)
+        fut.set_result(tenant)
+        self._release(evicted)
+        return tenant
+
+    def loaded(self, name: str) -> Optional[Tenant]:
+        """El tenant si ya está cargado, sin cargarlo ni tocar la LRU."""
+        if name == DEFAULT_TENANT:
+            return self.default
+        return self._tenants.get(name)
+
+    def all_loaded(self) -> List[Tenant]:
+        with self._lock:
+            return [self.default] + list(self._tenants.values())
+
+    @property
+    def used_bytes(self) -> int:
+        with self._lock:
+            return sum(t.nbytes for t in self._tenants.values())
+
+    # -------- Carga y expulsión -------- #
+    def _load(self, name: str) -> Tenant:
+        storage = PrefixedStorage(self.storage, f"{self.prefix}{name}/")
+        cache = self.cache.scoped(f"{self.prefix}{name}") if self.cache is not None else None
+        try:
+            ds = self.loader(storage, cache)
+        except FileNotFoundError as e:
+            raise UnknownTenant(f"Tenant desconocido: {name}") from e
+        tenant = Tenant(name, storage, cache, DatasetSlot(ds))
+        tenant.measure()
+        log.info("Tenant %s cargado (%.1f MiB)", name, tenant.nbytes / 2**20)
+        return tenant
+
+    def _evict_locked(self, keep: Optional[str] = None) -> List[Tenant]:
+        evicted = []
+        size = sum(t.nbytes for t in self._tenants.values())
+        for name, tenant in list(self._tenants.items()):
+            if size <= self.max_bytes:
+                break
+            # En uso o con filas sin persistir: se reintenta en el próximo ciclo,
+            # después de `flush_all`
+            if name == keep or tenant.refs > 0 or not tenant.ingestor.close():
+                continue
+            del self._tenants[name]
+            size -= tenant.nbytes
+            evicted.append(tenant)
+        return evicted
+
+    def _release(self, evicted: List[Tenant]) -> None:
+        for tenant in evicted:
+            log.info("Tenant %s expulsado de memoria", tenant.name)
+
+    # -------- Mantenimiento en segundo plano -------- #
+    def refresh_all(self) -> None:
+        for tenant in self.all_loaded():
+            try:
+                tenant.refresher.check_once()
+                tenant.measure()
+            except Exception:
+                log.exception("Fallo refrescando el tenant %r; se mantiene su snapshot", tenant.name)
+        with self._lock:
+            evicted = self._evict_locked()
+        self._release(evicted)
+
+    def flush_all(self) -> None:
+        for tenant in self.all_loaded():
+            try:
+                tenant.ingestor.flush()
+            except Exception:
+                log.exception("Fallo persistiendo transacciones del tenant %r; se reintenta", tenant.name)
+
+    def _loop(self, interval: float, fn: Callable[[], None]):
+        while not self._stop.wait(interval):
+            fn()
+
+    def start(self, refresh_interval: float, flush_interval: float):
+        for interval, fn, name in ((refresh_interval, self.refresh_all, "tenant-refresher"),
+                                   (flush_interval, self.flush_all, "tenant-flush")):
+            if interval > 0:
+                t = threading.Thread(target=self._loop, args=(interval, fn), name=name, daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads.clear()
+        self.flush_all()
@@ -0,0 +1,29 @@
+"""
+Fixtures de las pruebas del backend.
+
+Los módulos del backend se importan por nombre (como hace main.py), así que se
+agrega `backend/` al path. Los datos salen de `backend/data/`, copiados a un
+`MemoryStorage` para que cada prueba pueda escribirlos sin tocar los archivos.
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+from dataset import DatasetSlot, load_dataset  # noqa: E402
+from storage import MemoryStorage  # noqa: E402
+
+DATA_DIR = os.path.join(BACKEND, "data")
+
+
+@pytest.fixture
+def storage() -> MemoryStorage:
+    return MemoryStorage.from_directory(DATA_DIR)
+
+
+@pytest.fixture
+def slot(storage) -> DatasetSlot:
+    return DatasetSlot(load_dataset(storage))
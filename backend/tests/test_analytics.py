@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import asset_returns, portfolio_analytics, rolling_corr
+
+
+def synthetic(n_assets: int = 4, periods: int = 60, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=periods, freq="MS")
+    prices = 100 * np.cumprod(1 + rng.normal(0, 0.03, (periods, n_assets)), axis=0)
+    prices[:10, 0] = np.nan                                  # un activo que empieza después
+    assets = [f"A{i}" for i in range(n_assets)]
+    matrix = pd.DataFrame(prices, index=dates, columns=assets)
+    holdings = pd.DataFrame([np.ones(n_assets)], index=dates[:1], columns=assets)
+    return matrix, holdings
+
+
+def test_rolling_is_opt_in(slot):
+    ds = slot.current()
+    out = portfolio_analytics(ds.price_matrix, ds.holdings_matrix, window=6)["correlation"]
+    assert set(out) == {"window", "matrix"}
+
+
+def test_rolling_corr_matches_pandas():
+    matrix, _ = synthetic()
+    r = asset_returns(matrix.to_numpy())
+    dates, assets = matrix.index[1:], matrix.columns
+    pairs = [("A0", "A1"), ("A2", "A3")]
+    got, step = rolling_corr(r, dates, assets, pairs, window=12, max_points=1000)
+    assert step == 1
+    returns = pd.DataFrame(r, index=dates, columns=assets)
+    for a, b in pairs:
+        want = returns[a].rolling(12, min_periods=3).corr(returns[b])
+        pair = got[(got["asset_a"] == a) & (got["asset_b"] == b)]
+        np.testing.assert_allclose(pair["corr"].to_numpy(), want.to_numpy(), atol=1e-9)
+
+
+def test_rolling_corr_last_date_is_window_matrix():
+    matrix, holdings = synthetic()
+    out = portfolio_analytics(matrix, holdings, window=12, pairs=[("A0", "A2"), ("A1", "A3")],
+                              max_points=10)["correlation"]
+    rolling, corr = out["rolling"], out["matrix"].set_index("asset")
+    # Fechas muestreadas: hasta `max_points` por par, terminando en la última
+    assert rolling["date"].nunique() <= 10 and out["rolling_step"] == 6
+    assert rolling["date"].iloc[-1] == matrix.index[-1].strftime("%Y-%m-%d")
+    last = rolling[rolling["date"] == rolling["date"].iloc[-1]]
+    np.testing.assert_allclose(last["corr"], [corr.loc[a, b] for a, b in zip(last["asset_a"], last["asset_b"])])
+
+
+@pytest.mark.parametrize("window", [2, 3])
+def test_small_windows(window):
+    matrix, holdings = synthetic()
+    out = portfolio_analytics(matrix, holdings, window=window, pairs=[("A1", "A2")])["correlation"]
+    assert len(out["rolling"]) == len(matrix) - 1
+
+
+def test_window_lower_bound_on_endpoint():
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        assert client.get("/investments_analytics", params={"window": 2}).status_code == 422
+        r = client.get("/investments_analytics", params={"window": 3, "pairs": "Accion_Tec:Bono_Gov"})
+        assert r.status_code == 200 and r.json()["correlation"]["rolling"]
+        assert client.get("/investments_analytics", params={"pairs": "Accion_Tec:X"}).status_code == 404
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from forecast import forecast
+
+
+def test_all_months_stop_at_last_data_month(slot):
+    ds = slot.current()
+    limits = ds.budget_limits.copy()
+    limits.loc["2099-01"] = limits.iloc[-1]               # presupuesto cargado a futuro
+    last_date = ds.tx["date"].iloc[-1]
+    months = sorted(set(limits.index) | set(ds.month_index))
+
+    df = forecast(ds.spend_cube, limits, months, last_date)
+    assert df["month"].max() == last_date.strftime("%Y-%m")
+    last = df[df["month"] == df["month"].max()]
+    assert (last["as_of_day"] == last_date.day).all()
+    assert forecast(ds.spend_cube, limits, ["2099-01"], last_date).empty
+
+
+def test_without_last_date_keeps_every_month(slot):
+    ds = slot.current()
+    months = list(ds.budget_limits.index[:2])
+    df = forecast(ds.spend_cube, ds.budget_limits, months, None)
+    assert sorted(df["month"].unique()) == months
+    assert (df["as_of_day"] == df["days_in_month"]).all()
+    assert pd.api.types.is_integer_dtype(df["exceed_day"])
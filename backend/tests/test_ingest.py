@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import Dataset, load_dataset
+from ingest import IngestClosed, TransactionIn, TransactionIngestor, to_frame
+from refresh import DatasetRefresher
+
+BATCH = [
+    # Mes existente, categoría existente y nueva
+    TransactionIn(date="2024-05-10", type="Gasto", category="Comida", amount=1234.5, description="Almuerzo"),
+    TransactionIn(date="2024-05-10", type="Gasto", category="Mascotas", amount=99.9),
+    TransactionIn(date="2024-04-01", type="Ingreso", category="Sueldo", amount=5000.0),
+    # Mes nuevo, después del último
+    TransactionIn(date="2099-01-15", type="Gasto", category="Comida", amount=10.0, description="con, coma"),
+    TransactionIn(date="2099-01-15", type="Ingreso", category="Sueldo", amount=20.0),
+]
+
+
+def plain(df: pd.DataFrame) -> pd.DataFrame:
+    """Para comparar sin depender del orden de filas ni de las categorías de cada dtype."""
+    df = df.astype({c: str for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])
+                    and not pd.api.types.is_datetime64_any_dtype(df[c])})
+    keys = [c for c in df.columns if df[c].dtype == object or pd.api.types.is_string_dtype(df[c])
+            or pd.api.types.is_datetime64_any_dtype(df[c])]
+    return df.sort_values(keys, kind="stable").reset_index(drop=True) if keys else df.reset_index(drop=True)
+
+
+def assert_same_month_index(got, want):
+    assert list(got) == list(want)
+    for m in want:
+        g, w = got[m], want[m]
+        assert (g.start, g.stop) == (w.start, w.stop), m
+        assert g.ingresos == pytest.approx(w.ingresos)
+        assert g.gastos == pytest.approx(w.gastos)
+        pd.testing.assert_frame_equal(plain(g.gastos_cat), plain(w.gastos_cat), check_dtype=False)
+
+
+def assert_same_arrays(got, want):
+    for g, w in zip(got, want):
+        if isinstance(w, pd.Index):
+            assert list(g) == list(w)
+        else:
+            np.testing.assert_allclose(np.asarray(g, dtype=float), np.asarray(w, dtype=float), rtol=1e-12)
+
+
+def test_incremental_updates_match_rebuild(slot):
+    base = slot.current()
+    ds = base.append_transactions(to_frame(BATCH), "local:1")
+    rebuilt = Dataset(ds.frames, ds.versions)
+
+    pd.testing.assert_frame_equal(plain(ds.cube), plain(rebuilt.cube), check_dtype=False)
+    assert_same_month_index(ds.month_index, rebuilt.month_index)
+    pd.testing.assert_frame_equal(ds.cash_daily, rebuilt.cash_daily, check_dtype=False)
+    assert_same_arrays(ds.spend_cube, rebuilt.spend_cube)
+    assert_same_arrays(ds.daily_sums, rebuilt.daily_sums)
+    # Los offsets del índice siguen valiendo para `tx` ordenado
+    for m, agg in ds.month_index.items():
+        assert (ds.tx["month"].iloc[agg.start:agg.stop] == m).all()
+    # Lo que no depende de transactions.csv no se toca
+    assert ds.derived["portfolio_monthly"] is base.derived["portfolio_monthly"]
+
+
+def test_ingest_flush_reload_round_trip(storage, slot):
+    ingestor = TransactionIngestor(storage, slot=slot)
+    out = ingestor.ingest(BATCH)
+    assert out["inserted"] == len(BATCH) and out["pending_rows"] == len(BATCH)
+    assert "2099-01" in slot.current().month_index
+
+    assert ingestor.flush() == len(BATCH)
+    assert ingestor.pending_rows == 0 and ingestor.flush() == 0
+    in_memory = slot.current()
+    assert in_memory.versions["transactions.csv"] == storage.version("transactions.csv")
+    # Lo persistido ya está en memoria: el refresco no lo vuelve a bajar
+    assert DatasetRefresher(storage, slot=slot).check_once() == []
+
+    reloaded = load_dataset(storage)
+    pd.testing.assert_frame_equal(plain(in_memory.tx), plain(reloaded.tx), check_dtype=False)
+    assert list(in_memory.tx.index) == list(reloaded.tx.index)
+    assert_same_month_index(in_memory.month_index, reloaded.month_index)
+    pd.testing.assert_frame_equal(in_memory.cash_monthly, reloaded.cash_monthly)
+
+
+def test_failed_flush_keeps_rows_pending(storage, slot):
+    ingestor = TransactionIngestor(storage, slot=slot)
+    ingestor.ingest(BATCH[:2])
+
+    def fail(name, data):
+        raise OSError("storage caído")
+    storage.append = fail
+    with pytest.raises(OSError):
+        ingestor.flush()
+    assert ingestor.pending_rows == 2
+    assert not ingestor.close()
+
+
+def test_closed_ingestor_rejects_batches(storage, slot):
+    ingestor = TransactionIngestor(storage, slot=slot)
+    assert ingestor.close()
+    with pytest.raises(IngestClosed):
+        ingestor.ingest(BATCH[:1])
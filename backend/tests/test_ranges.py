@@ -0,0 +1,13 @@
+import pandas as pd
+
+from ranges import range_aggregate
+
+
+def test_range_of_a_month_equals_month_index(slot):
+    ds = slot.current()
+    for month, agg in ds.month_index.items():
+        start = pd.Timestamp(f"{month}-01")
+        got = range_aggregate(ds.daily_sums, start, start + pd.offsets.MonthEnd(0))
+        assert (got.start, got.stop, got.ingresos, got.gastos) == (agg.start, agg.stop, agg.ingresos, agg.gastos)
+        assert dict(zip(got.gastos_cat["category"], got.gastos_cat["amount"])) == \
+            dict(zip(agg.gastos_cat["category"], agg.gastos_cat["amount"]))
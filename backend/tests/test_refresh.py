@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from ingest import TransactionIn, TransactionIngestor
+from networth import price_matrix
+from refresh import DatasetRefresher
+from storage import MemoryStorage
+
+
+def append_line(storage, name: str, line: bytes) -> None:
+    storage.write(name, storage.open(name)[0].read() + line)
+
+
+def test_no_changes_reloads_nothing(storage, slot):
+    before = slot.current()
+    assert DatasetRefresher(storage, slot=slot).check_once() == []
+    assert slot.current() is before
+
+
+def test_reloads_only_changed_csv(storage, slot):
+    before = slot.current()
+    append_line(storage, "budgets.csv", b"2099-01,Comida,123\n")
+
+    assert DatasetRefresher(storage, slot=slot).check_once() == ["budgets.csv"]
+    after = slot.current()
+    assert after.versions["budgets.csv"] == storage.version("budgets.csv")
+    assert after.version != before.version
+    assert "2099-01" in after.budgets_by_month
+    # Lo que no depende de budgets.csv se reutiliza tal cual
+    for name in ("transactions.csv", "investments_prices.csv", "goals.csv"):
+        assert after.frames[name] is before.frames[name]
+    for key in ("cube", "month_index", "cash_daily", "spend_cube", "portfolio_monthly"):
+        assert after.derived[key] is before.derived[key]
+    assert after.derived["budgets_by_month"] is not before.derived["budgets_by_month"]
+
+
+def test_appended_prices_extend_price_matrix(storage, slot):
+    append_line(storage, "investments_prices.csv", b"2099-01-01,ETF_Global,150.0\n")
+
+    assert DatasetRefresher(storage, slot=slot).check_once() == ["investments_prices.csv"]
+    ds = slot.current()
+    assert ds.price_matrix.loc[pd.Timestamp("2099-01-01"), "ETF_Global"] == 150.0
+    pd.testing.assert_frame_equal(ds.price_matrix, price_matrix(ds.prices))
+
+
+def test_unpersisted_rows_are_not_overwritten(storage, slot):
+    ingestor = TransactionIngestor(storage, slot=slot)
+    ingestor.ingest([TransactionIn(date="2099-01-01", type="Gasto", category="Comida", amount=10.0)])
+    # Un cambio externo de transactions.csv no pisa las filas que aún no se escribieron
+    append_line(storage, "transactions.csv", b"")
+
+    assert DatasetRefresher(storage, slot=slot).check_once() == []
+    assert ingestor.pending_rows == 1
+    assert (slot.current().tx["month"] == "2099-01").sum() == 1
+
+
+def test_missing_blob_keeps_snapshot(slot):
+    before = slot.current()
+    with pytest.raises(FileNotFoundError):
+        DatasetRefresher(MemoryStorage(), slot=slot).check_once()
+    assert slot.current() is before
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import TransactionIn, to_frame
+from tx_query import InvalidCursor, TransactionQuery
+
+QUERIES = [
+    {"month": "all"},
+    {"month": None},
+    {"month": "2024-05"},
+    {"month": "all", "types": ["Gasto"], "min_amount": 50_000.0},
+    {"month": "all", "q": "vivienda"},
+    {"date_from": pd.Timestamp("2024-06-10"), "date_to": pd.Timestamp("2024-09-03")},
+    {"month": "1999-01"},
+]
+
+
+def all_pages(ds, limit: int, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = TransactionQuery(cursor=cursor, **params).page(ds, limit)
+        assert len(rows) <= limit
+        ids.extend(rows.index)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.parametrize("params", QUERIES)
+@pytest.mark.parametrize("limit", [1, 7, 100, 10_000])
+def test_pages_cover_every_row_once(slot, params, limit):
+    ds = slot.current()
+    want = [i for chunk in TransactionQuery(**params).iter_chunks(ds) for i in chunk.index]
+    ids, pages = all_pages(ds, limit, **params)
+    assert ids == want
+    assert pages == max(1, -(-len(want) // limit))
+
+
+def test_pages_after_out_of_order_ingest(slot):
+    # Filas en fechas que ya tienen otras: el cursor (date, id) no repite ni saltea ninguna
+    batch = to_frame([TransactionIn(date="2024-04-01", type="Gasto", category="Comida", amount=float(i))
+                      for i in range(1, 6)])
+    ds = slot.current().append_transactions(batch, "local:1")
+    ids, _ = all_pages(ds, 3, month="2024-04")
+    assert ids == list(ds.tx.index[ds.month_index["2024-04"].start:ds.month_index["2024-04"].stop])
+    assert len(set(ids)) == len(ids)
+
+
+def test_invalid_cursor():
+    with pytest.raises(InvalidCursor):
+        TransactionQuery(cursor="no-es-un-cursor")
+
+
+def test_search_skips_missing_descriptions(slot):
+    batch = to_frame([TransactionIn(date="2099-01-01", type="Gasto", category="Comida", amount=1.0),
+                      TransactionIn(date="2099-01-02", type="Gasto", category="Comida", amount=2.0,
+                                    description="Luz")])
+    ds = slot.current().append_transactions(batch, "local:1")
+    for q, want in (("nan", []), ("na", []), ("LUZ", ["Luz"])):
+        rows, _ = TransactionQuery(month="2099-01", q=q).page(ds, 10)
+        assert rows["description"].tolist() == want
+    # Columna object (pandas < 3 o frames armados a mano): NaN no es "nan"
+    chunk = pd.DataFrame({"description": pd.Series(["Luz", np.nan], dtype=object)})
+    assert TransactionQuery(q="nan")._filter(chunk).empty
@@ -0,0 +1,144 @@
+"""
+Consulta de transacciones para `/transactions`: filtros, paginación por
+cursor y exportación en streaming.
+
+`tx` está ordenado por (month, date, id), con el id de fila como índice. Como
+`month` se deriva de `date`, ese orden es también (date, id), así que:
+- el rango de fechas y el cursor se resuelven con búsqueda binaria;
+- el cursor (keyset) es el par (date, id) de la última fila entregada, y la
+  página siguiente empieza justo después, sin importar cuántas filas haya
+  antes;
+- los filtros se aplican por bloques de `CHUNK_ROWS` filas, así una
+  exportación completa usa memoria acotada.
+"""
+from typing import Iterator, List, Optional, Tuple
+import base64
+
+import pandas as pd
+
+from dataset import Dataset
+from serialization import frame_lines
+
+CHUNK_ROWS = 10_000
+EXPORT_COLUMNS = ["date", "type", "category", "amount", "description", "month"]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(date: pd.Timestamp, row_id: int) -> str:
+    raw = f"{pd.Timestamp(date).value}:{int(row_id)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[pd.Timestamp, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ns, row_id = raw.split(":")
+        return pd.Timestamp(int(ns)), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Cursor inválido: {cursor}") from e
+
+
+class TransactionQuery:
+    """`month=None` es el último mes, salvo que se pida un rango de fechas;
+    `month="all"` recorre toda la historia."""
+
+    def __init__(self, month: Optional[str] = None, cursor: Optional[str] = None,
+                 types: Optional[List[str]] = None, categories: Optional[List[str]] = None,
+                 date_from: Optional[pd.Timestamp] = None, date_to: Optional[pd.Timestamp] = None,
+                 min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                 q: Optional[str] = None):
+        self.month = month
+        self.after = decode_cursor(cursor) if cursor else None
+        self.types = types
+        self.categories = categories
+        self.date_from = date_from
+        self.date_to = date_to
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.q = q
+
+    def resolved_month(self, ds: Dataset) -> str:
+        if self.month:
+            return self.month
+        if self.date_from is not None or self.date_to is not None:
+            return "all"
+        return max(ds.month_index)
+
+    def _bounds(self, ds: Dataset) -> Tuple[int, int]:
+        """Rango [start, stop) de filas de `tx` según mes, fechas y cursor."""
+        m = self.resolved_month(ds)
+        if m == "all":
+            start, stop = 0, len(ds.tx)
+        else:
+            agg = ds.month_index.get(m)
+            if agg is None:
+                return 0, 0
+            start, stop = agg.start, agg.stop
+
+        dates = ds.tx["date"].iloc[start:stop]
+        lo, hi = 0, len(dates)
+        if self.date_from is not None:
+            lo = max(lo, int(dates.searchsorted(self.date_from, side="left")))
+        if self.date_to is not None:
+            hi = min(hi, int(dates.searchsorted(self.date_to, side="right")))
+        if self.after is not None:
+            after_date, after_id = self.after
+            d_lo = int(dates.searchsorted(after_date, side="left"))
+            d_hi = int(dates.searchsorted(after_date, side="right"))
+            ids = ds.tx.index[start + d_lo:start + d_hi]
+            lo = max(lo, d_lo + int(ids.searchsorted(after_id, side="right")))
+        return start + lo, start + max(lo, hi)
+
+    def _filter(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        mask = pd.Series(True, index=chunk.index)
+        if self.types:
+            mask &= chunk["type"].isin(self.types)
+        if self.categories:
+            mask &= chunk["category"].isin(self.categories)
+        if self.min_amount is not None:
+            mask &= chunk["amount"] >= self.min_amount
+        if self.max_amount is not None:
+            mask &= chunk["amount"] <= self.max_amount
+        if self.q:
+            mask &= chunk["description"].str.contains(self.q, case=False, regex=False, na=False)
+        return chunk[mask]
+
+    def iter_chunks(self, ds: Dataset) -> Iterator[pd.DataFrame]:
+        start, stop = self._bounds(ds)
+        for lo in range(start, stop, CHUNK_ROWS):
+            chunk = self._filter(ds.tx.iloc[lo:min(lo + CHUNK_ROWS, stop)])
+            if len(chunk):
+                yield chunk
+
+    def page(self, ds: Dataset, limit: int) -> Tuple[pd.DataFrame, Optional[str]]:
+        """Hasta `limit` filas y el cursor de la página siguiente (None si no hay más)."""
+        limit = max(int(limit), 0)
+        parts, size = [], 0
+        for chunk in self.iter_chunks(ds):
+            parts.append(chunk.head(limit + 1 - size))
+            size += len(parts[-1])
+            if size > limit:
+                break
+        rows = pd.concat(parts) if parts else ds.tx.iloc[0:0]
+        more = len(rows) > limit
+        rows = rows.iloc[:limit]
+        next_cursor = encode_cursor(rows["date"].iloc[-1], rows.index[-1]) if more and len(rows) else None
+        return rows, next_cursor
+
+
+# ---------------- Exportación en streaming ---------------- #
+def _export_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    out = chunk[EXPORT_COLUMNS].copy()
+    out["date"] = out["date"].dt.strftime("%Y-%m-%d")
+    return out
+
+def stream_ndjson(query: TransactionQuery, ds: Dataset) -> Iterator[bytes]:
+    for chunk in query.iter_chunks(ds):
+        yield b"".join(frame_lines(_export_chunk(chunk)))
+
+def stream_csv(query: TransactionQuery, ds: Dataset) -> Iterator[bytes]:
+    yield (",".join(EXPORT_COLUMNS) + "\n").encode("utf-8")
+    for chunk in query.iter_chunks(ds):
+        yield _export_chunk(chunk).to_csv(index=False, header=False).encode("utf-8")
@@ -0,0 +1,285 @@
+"""
+Cálculo de cada vista de la API a partir de un `Dataset`.
+
+Cada función devuelve el cuerpo que responde su endpoint (dicts con
+DataFrames, ver `serialization.py`). Las vistas de un mes reciben un
+`MonthSlice` (o un `RangeSlice` con `from`/`to`), que se arma una sola vez
+por request y se comparte entre las vistas de `/dashboard`.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import contextvars
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregates import EMPTY_MONTH
+from analytics import portfolio_analytics
+from cube import CubeQuery
+from dataset import Dataset
+from forecast import forecast
+from metrics import stage
+from montecarlo import MAX_MONTHS, GoalSimulator, monthly_returns, months_between
+import networth
+from ranges import date_span, range_aggregate, range_limits, top_positions
+from tx_query import TransactionQuery
+
+# Hilos para calcular en paralelo las vistas de /dashboard
+VIEW_WORKERS = int(os.getenv("DASHBOARD_WORKERS", "4"))
+_pool = ThreadPoolExecutor(max_workers=VIEW_WORKERS, thread_name_prefix="dashboard")
+
+
+# ---------------- Utilidades ---------------- #
+def latest_month(ds: Dataset) -> str:
+    return max(ds.month_index)
+
+def iso_date(s: pd.Series) -> pd.Series:
+    return s.dt.strftime("%Y-%m-%d")
+
+
+class MonthSlice:
+    """Agregados y filas de `tx` de un mes (offsets del índice, sin copiar)."""
+
+    def __init__(self, ds: Dataset, month: Optional[str]):
+        self.ds = ds
+        self.month = month or latest_month(ds)
+        self.agg = ds.month_index.get(self.month, EMPTY_MONTH)
+        self.rows = ds.tx.iloc[self.agg.start:self.agg.stop]
+
+    # Fecha del patrimonio de /summary (None = la última con datos)
+    as_of: Optional[pd.Timestamp] = None
+
+    @property
+    def period(self) -> Dict[str, Any]:
+        return {"month": self.month}
+
+    def limits(self) -> pd.DataFrame:
+        return self.ds.budgets_by_month.get(self.month, self.ds.budgets.iloc[0:0])
+
+    @cached_property
+    def gastos_amount(self) -> np.ndarray:
+        """`amount` de cada fila del período, NaN en las que no son gasto (sin copiar las filas)."""
+        return np.where((self.rows["type"] == "Gasto").to_numpy(), self.rows["amount"].to_numpy(dtype=float), np.nan)
+
+
+class RangeSlice(MonthSlice):
+    """Lo mismo que `MonthSlice` para las fechas entre `start` y `end` (inclusive),
+    con los acumulados diarios de `ranges.py`. Sin `start`/`end`, desde la
+    primera o hasta la última fecha con movimientos."""
+
+    def __init__(self, ds: Dataset, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]):
+        span = date_span(ds.daily_sums)
+        self.ds = ds
+        first, last = span or (start or end, end or start)
+        self.end = end if end is not None else max(last, start)
+        self.start = start if start is not None else min(first, self.end)
+        # Mes del final del rango, para las vistas de /dashboard que son por mes
+        self.month = self.end.strftime("%Y-%m")
+        self.agg = range_aggregate(ds.daily_sums, self.start, self.end)
+        self.rows = ds.tx.iloc[self.agg.start:self.agg.stop]
+        self.as_of = self.end
+
+    @property
+    def period(self) -> Dict[str, Any]:
+        return {"from": self.start.strftime("%Y-%m-%d"), "to": self.end.strftime("%Y-%m-%d")}
+
+    def limits(self) -> pd.DataFrame:
+        return range_limits(self.ds.budget_limits, self.start, self.end)
+
+    def shifted(self, start: pd.Timestamp) -> "RangeSlice":
+        """Rango de la misma cantidad de días que empieza en `start` (para `compare_to`)."""
+        return RangeSlice(self.ds, start, start + (self.end - self.start))
+
+
+Slice = Union[MonthSlice, RangeSlice]
+
+
+# -------- 1) Resumen financiero -------- #
+def summary(sl: Slice) -> Dict[str, Any]:
+    ingresos = sl.agg.ingresos
+    gastos = sl.agg.gastos
+    neto_mes = ingresos - gastos
+
+    nw = networth.net_worth_at(sl.ds.cash_daily, sl.ds.price_matrix, sl.ds.holdings_matrix, sl.as_of)
+
+    return {
+        **sl.period,
+        "kpis": {
+            "ingresos_mes": ingresos,
+            "gastos_mes": gastos,
+            "neto_mes": neto_mes,
+            "patrimonio_actual": nw["net_worth"],
+            "efectivo_acumulado": nw["cumulative_cash"],
+            "valor_inversiones": nw["value"],
+        },
+        "waterfall": [
+            {"label": "Inicio", "value": 0},
+            {"label": "Ingresos", "value": ingresos},
+            {"label": "Gastos", "value": -gastos},
+            {"label": "Neto mes", "value": neto_mes},
+        ],
+        "rows_mes": sl.agg.rows,
+    }
+
+# -------- 2) Donut de gastos -------- #
+def expenses_donut(sl: Slice) -> Dict[str, Any]:
+    return {**sl.period, "donut": sl.agg.gastos_cat}
+
+def top_expenses(sl: Slice, n: int = 10) -> Dict[str, Any]:
+    with stage("filter"):
+        amount = sl.gastos_amount
+    with stage("aggregate"):
+        # Selección parcial: solo se ordenan (y se copian) las n filas elegidas
+        dfm = sl.rows.iloc[top_positions(amount, n)]
+    dfm["date"] = iso_date(dfm["date"])
+    return {**sl.period, "top": dfm}
+
+# -------- 3) Presupuestos -------- #
+def budget_progress(sl: Slice) -> Dict[str, Any]:
+    g_m = sl.agg.gastos_cat.rename(columns={"amount":"spent"})
+    lim = sl.limits()
+    with stage("aggregate"):
+        df = lim.merge(g_m, on="category", how="left").fillna({"spent": 0.0})
+    df["pct"] = (df["spent"] / df["limit"]).replace([np.inf, -np.inf], 0).fillna(0) * 100
+    df["status"] = np.select([df["pct"] <= 80, df["pct"] <= 100], ["green", "amber"], default="red")
+    return {**sl.period, "progress": df.sort_values("pct", ascending=False)}
+
+def budget_forecast(ds: Dataset, month: Optional[str] = None, day: Optional[int] = None) -> Dict[str, Any]:
+    """Proyección al cierre del mes (o de todos los meses con `month="all"`)."""
+    month = month or latest_month(ds)
+    months = sorted(set(ds.budget_limits.index) | set(ds.month_index)) if month == "all" else [month]
+    last_date = ds.tx["date"].iloc[-1] if len(ds.tx) else None
+    with stage("aggregate"):
+        df = forecast(ds.spend_cube, ds.budget_limits, months, last_date, day)
+    return {"month": month, "forecast": df}
+
+# -------- 4) Patrimonio -------- #
+def net_worth_series(ds: Dataset, resolution: str = "monthly", date_from: Optional[pd.Timestamp] = None,
+                     date_to: Optional[pd.Timestamp] = None) -> Dict[str, Any]:
+    with stage("aggregate"):
+        df = networth.net_worth_series(ds.cash_daily, ds.price_matrix, ds.holdings_matrix, resolution,
+                                      date_from, date_to)
+    return {"resolution": resolution, "series": df}
+
+# -------- 5) Inversiones -------- #
+def investments_history(ds: Dataset) -> Dict[str, Any]:
+    df = ds.portfolio_monthly.sort_values("month")
+    base = float(df["value"].iloc[0])
+    df["ret_acum"] = (df["value"] / base - 1.0) * 100
+    return {"history": df}
+
+def _last_position_date(ds: Dataset) -> Optional[pd.Timestamp]:
+    dates = [ds.price_matrix.index, ds.holdings_matrix.index[ds.holdings_matrix.index > pd.Timestamp.min]]
+    return max((d.max() for d in dates if len(d)), default=None)
+
+def investments_alloc(ds: Dataset, as_of: Optional[pd.Timestamp] = None) -> Dict[str, Any]:
+    """Asignación con el último precio de cada activo y las unidades vigentes en `as_of`
+    (por defecto, la fecha más reciente con precios o movimientos)."""
+    when = pd.Timestamp(as_of) if as_of is not None else _last_position_date(ds)
+    if when is None:
+        return {"as_of": None, "allocation": pd.DataFrame(columns=["asset","units","price","value","weight_pct"]),
+                "total_value": 0.0}
+    alloc = networth.positions_at(ds.price_matrix, ds.holdings_matrix, pd.DatetimeIndex([when]))
+    alloc = alloc.drop(columns="date").sort_values("value", ascending=False)
+    return {"as_of": when.strftime("%Y-%m-%d"), "allocation": alloc, "total_value": float(alloc["value"].sum())}
+
+def investments_alloc_batch(ds: Dataset, dates: List[pd.Timestamp]) -> Dict[str, Any]:
+    """Valuación del portafolio en varias fechas en una sola pasada."""
+    when = pd.DatetimeIndex(sorted(set(dates)))
+    with stage("aggregate"):
+        pos = networth.positions_at(ds.price_matrix, ds.holdings_matrix, when)
+        totals = pos.groupby("date")["value"].sum().reindex(when, fill_value=0.0)
+    pos["date"] = iso_date(pos["date"])
+    return {
+        "valuations": pd.DataFrame({"date": when.strftime("%Y-%m-%d"), "total_value": totals.to_numpy()}),
+        "allocation": pos,
+    }
+
+def investments_analytics(ds: Dataset, window: int = 12, risk_free: float = 0.0,
+                          pairs: Sequence[Tuple[str, str]] = ()) -> Dict[str, Any]:
+    with stage("aggregate"):
+        return portfolio_analytics(ds.price_matrix, ds.holdings_matrix, window, risk_free, pairs)
+
+# -------- 6) Metas -------- #
+def goals(ds: Dataset) -> Dict[str, Any]:
+    df = ds.goals.copy()
+    df["progress_pct"] = (df["current_savings"] / df["target_amount"]).clip(0,1) * 100
+    df["due_date"] = iso_date(df["due_date"])
+    return {"goals": df}
+
+def goal_simulations(ds: Dataset, simulator: GoalSimulator, names: List[str], contribution: float = 0.0,
+                     months: Optional[int] = None, paths: int = 10_000, seed: int = 0) -> Dict[str, Any]:
+    """Monte Carlo de cada meta desde el último mes con datos hasta su `due_date`
+    (o `months` meses). `names` ya validados contra `ds.goals`."""
+    start = latest_month(ds)
+    returns = tuple(float(r) for r in monthly_returns(ds.portfolio_monthly))
+    goals_df = ds.goals.set_index("goal")
+    rows, keys = [], []
+    for name in names:
+        g = goals_df.loc[name]
+        horizon = months if months is not None else min(months_between(start, g["due_date"]), MAX_MONTHS)
+        rows.append((name, g, horizon))
+        keys.append((returns, float(g["current_savings"]), float(g["target_amount"]), int(horizon),
+                     float(contribution), int(paths), int(seed)))
+
+    out = []
+    with stage("simulate"):
+        results = simulator.run(keys)
+    for (name, g, horizon), result in zip(rows, results):
+        curves = result["curves"].copy()
+        curves.insert(1, "month", (pd.Period(start, freq="M") + curves["month_offset"].to_numpy()).astype(str))
+        out.append({
+            "goal": name, "target_amount": float(g["target_amount"]),
+            "current_savings": float(g["current_savings"]), "due_date": g["due_date"].strftime("%Y-%m-%d"),
+            "start_month": start, "months": horizon, "contribution": contribution, "paths": paths,
+            **result, "curves": curves,
+        })
+    return {"returns_sample": len(returns), "simulations": out}
+
+# -------- Extras -------- #
+def transactions(ds: Dataset, query: TransactionQuery, limit: int = 200) -> Dict[str, Any]:
+    with stage("filter"):
+        rows, next_cursor = query.page(ds, limit)
+    rows = rows.copy()
+    rows["date"] = iso_date(rows["date"])
+    return {"month": query.resolved_month(ds), "rows": rows, "next_cursor": next_cursor}
+
+def months(ds: Dataset) -> Dict[str, Any]:
+    return {"months": sorted(ds.month_index)}
+
+def cube(ds: Dataset, query: CubeQuery) -> Dict[str, Any]:
+    with stage("aggregate"):
+        df = query.run(ds)
+    return {"rows": query.rows, "columns": query.columns, "measures": query.measures, "cube": df}
+
+def compared(view: Callable[..., Dict[str, Any]], sl: Slice, other: Optional[Slice], *args) -> Dict[str, Any]:
+    """`view` sobre `sl` y, con `compare_to`, la misma vista del otro período en `compare`."""
+    out = view(sl, *args)
+    if other is not None:
+        out["compare"] = view(other, *args)
+    return out
+
+
+# ---------------- /dashboard ---------------- #
+DASHBOARD: Dict[str, Callable[[Slice, int], Dict[str, Any]]] = {
+    "summary": lambda sl, n: summary(sl),
+    "donut": lambda sl, n: expenses_donut(sl),
+    "top": lambda sl, n: top_expenses(sl, n),
+    "budget": lambda sl, n: budget_progress(sl),
+    "budget_forecast": lambda sl, n: budget_forecast(sl.ds, sl.month),
+    "net_worth": lambda sl, n: net_worth_series(sl.ds),
+    "investments_history": lambda sl, n: investments_history(sl.ds),
+    "investments_alloc": lambda sl, n: investments_alloc(sl.ds),
+    "investments_analytics": lambda sl, n: investments_analytics(sl.ds),
+    "goals": lambda sl, n: goals(sl.ds),
+    "months": lambda sl, n: months(sl.ds),
+}
+
+def dashboard(sl: Slice, names: List[str], n: int = 10) -> Dict[str, Any]:
+    """Calcula en paralelo las vistas pedidas sobre el mismo `MonthSlice` (o `RangeSlice`)."""
+    if "top" in names:
+        sl.gastos_amount  # se arma una vez antes de repartir entre hilos
+    futures = {name: _pool.submit(contextvars.copy_context().run, DASHBOARD[name], sl, n) for name in names}
+    return {**sl.period, "views": {name: fut.result() for name, fut in futures.items()}}
@@ -0,0 +1,230 @@
+"""
+Caché de respuestas de la API invalidada por versión de tabla, con precarga.
+
+`/version` devuelve la versión de cada CSV del dataset. Cada entrada guarda
+la versión de las tablas de las que depende su respuesta (`tables_for`) y
+sigue valiendo mientras esas tablas no cambien, en vez de vencer por TTL.
+`/version` se consulta como mucho cada `poll_seconds` (compartido entre
+sesiones) y, cuando cambia una tabla, se descartan solo las entradas que la
+usan: lo demás no se vuelve a bajar. Una entrada vencida se vuelve a pedir
+con `If-None-Match` (el ETag que devolvió la API): si la respuesta no
+cambió llega un 304 sin cuerpo y se reutiliza el que ya estaba. Las
+entradas forman un LRU acotado por cantidad (`max_entries`) y por bytes de
+los cuerpos (`max_bytes`).
+
+`gather` carga a la vez todo lo que necesita una página y mide cuánto tardó
+cada parte; `prefetch` pide en hilos aparte lo que probablemente se vea
+después (meses vecinos, otras páginas). Un pedido en curso no se repite:
+quien lo necesite espera ese mismo resultado. Los pedidos salen por un
+`HttpClient` compartido (keep-alive, plazos, reintentos y circuit breaker,
+ver http_client.py). No usa nada de Streamlit, así que estos hilos no
+necesitan el contexto del script.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet, Iterable, NamedTuple, Optional, Tuple
+import logging
+import threading
+import time
+
+import requests
+
+from http_client import HttpClient
+
+log = logging.getLogger(__name__)
+
+TX = "transactions.csv"
+BUDGETS = "budgets.csv"
+PRICES = "investments_prices.csv"
+HOLDINGS = "investments_holdings.csv"
+GOALS = "goals.csv"
+
+# Tablas que lee cada vista de /dashboard (ver backend/views.py)
+VIEW_TABLES: Dict[str, FrozenSet[str]] = {
+    "summary": frozenset({TX, PRICES, HOLDINGS}),
+    "donut": frozenset({TX}),
+    "top": frozenset({TX}),
+    "budget": frozenset({TX, BUDGETS}),
+    "budget_forecast": frozenset({TX, BUDGETS}),
+    "net_worth": frozenset({TX, PRICES, HOLDINGS}),
+    "investments_history": frozenset({PRICES, HOLDINGS}),
+    "investments_alloc": frozenset({PRICES, HOLDINGS}),
+    "investments_analytics": frozenset({PRICES, HOLDINGS}),
+    "goals": frozenset({GOALS}),
+    "months": frozenset({TX}),
+}
+PATH_TABLES: Dict[str, FrozenSet[str]] = {
+    "/months": frozenset({TX}),
+}
+
+
+def tables_for(path: str, params: Dict[str, Any]) -> Optional[FrozenSet[str]]:
+    """Tablas de las que depende la respuesta de `path`; None = todas."""
+    if path == "/dashboard":
+        views = str(params.get("views") or "").split(",")
+        if all(v in VIEW_TABLES for v in views):
+            return frozenset().union(*(VIEW_TABLES[v] for v in views))
+        return None
+    if path.startswith("/goals/") and path.endswith("/simulate"):
+        # Parte del último mes con datos y usa los retornos del portafolio
+        return frozenset({GOALS, TX, PRICES, HOLDINGS})
+    return PATH_TABLES.get(path)
+
+
+class _Entry(NamedTuple):
+    versions: Dict[str, str]  # versiones de las tablas de las que salió
+    body: Any
+    etag: Optional[str]
+    size: int  # bytes de la respuesta
+
+
+class ApiCache:
+    def __init__(self, base_url: str, client: Optional[HttpClient] = None, poll_seconds: float = 5.0,
+                 workers: int = 2, page_workers: int = 4, max_entries: int = 512,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.base_url = base_url.rstrip("/")
+        self.client = client or HttpClient()
+        self.poll_seconds = poll_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # URL -> _Entry, de la menos a la más usada
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._pending: Dict[str, Future] = {}
+        self._versions: Dict[str, str] = {}
+        self._checked = float("-inf")
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        # Aparte de la precarga: lo que espera la página no hace cola detrás de ella
+        self._page_pool = ThreadPoolExecutor(max_workers=page_workers, thread_name_prefix="page")
+
+    def url(self, path: str, params: Dict[str, Any]) -> str:
+        return requests.Request("GET", f"{self.base_url}{path}", params=params).prepare().url
+
+    # ---------------- Versiones ---------------- #
+    def versions(self) -> Dict[str, str]:
+        """Versión de cada tabla, revisada como mucho cada `poll_seconds`."""
+        with self._lock:
+            if time.monotonic() - self._checked < self.poll_seconds:
+                return self._versions
+        r = self.client.get(f"{self.base_url}/version")
+        r.raise_for_status()
+        tables = r.json()["tables"]
+        with self._lock:
+            changed = {t for t in tables.keys() | self._versions.keys() if tables.get(t) != self._versions.get(t)}
+            if changed and self._versions:
+                # Las vencidas se quedan (con su ETag) hasta revalidarlas o salir del LRU
+                stale = sum(1 for e in self._entries.values() if changed & e.versions.keys())
+                log.info("Cambiaron %s: %d entradas a revalidar", ", ".join(sorted(changed)), stale)
+            self._versions = tables
+            self._checked = time.monotonic()
+        return tables
+
+    def invalidate(self) -> None:
+        """Vuelve a consultar `/version` en el próximo pedido."""
+        with self._lock:
+            self._checked = float("-inf")
+
+    # ---------------- Pedidos ---------------- #
+    def get(self, path: str, **params) -> Any:
+        """Cuerpo JSON de `GET path?params`, desde la caché mientras sus tablas no cambien."""
+        url = self.url(path, params)
+        current = self.versions()
+        tables = tables_for(path, params)
+        want = {t: current.get(t, "") for t in (current if tables is None else tables)}
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and entry.versions == want:
+                self._entries.move_to_end(url)
+                return entry.body
+            pending = self._pending.get(url)
+            if pending is None:
+                pending = self._pending[url] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return pending.result()
+        try:
+            body = self._fetch(url, want, entry)
+            pending.set_result(body)
+            return body
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(url, None)
+
+    def _fetch(self, url: str, want: Dict[str, str], stale: Optional[_Entry]) -> Any:
+        headers = {"If-None-Match": stale.etag} if stale is not None and stale.etag else None
+        r = self.client.get(url, headers=headers)
+        if r.status_code == 304 and headers:
+            entry = stale._replace(versions=want)
+        else:
+            r.raise_for_status()
+            entry = _Entry(want, r.json(), r.headers.get("ETag"), len(r.content))
+        self._store(url, entry)
+        return entry.body
+
+    def _store(self, url: str, entry: _Entry) -> None:
+        with self._lock:
+            old = self._entries.pop(url, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[url] = entry
+            self._bytes += entry.size
+            # Siempre queda al menos la recién guardada
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                              or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def cached(self, path: str, **params) -> bool:
+        """Si `get(path, **params)` se respondería sin ir a la API (con las versiones ya conocidas)."""
+        url = self.url(path, params)
+        tables = tables_for(path, params)
+        with self._lock:
+            entry = self._entries.get(url)
+            want = {t: self._versions.get(t, "") for t in (self._versions if tables is None else tables)}
+            return entry is not None and entry.versions == want
+
+    def prefetch(self, requests_: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Pide en segundo plano lo que no esté en caché ni en curso; los errores solo se registran."""
+        seen = set()
+        for path, params in requests_:
+            url = self.url(path, params)
+            with self._lock:
+                if url in self._pending or url in seen:
+                    continue
+            seen.add(url)
+            if self.cached(path, **params):
+                continue
+            self._pool.submit(self._prefetch_one, path, params)
+
+    def _prefetch_one(self, path: str, params: Dict[str, Any]) -> None:
+        try:
+            self.get(path, **params)
+        except Exception as e:
+            log.warning("Precarga de %s falló: %s", path, e)
+
+    def gather(self, loads: Dict[str, Callable[[], Any]]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Ejecuta `loads` a la vez; devuelve sus resultados y los segundos de cada uno.
+
+        Si alguno falla se relanza su error, después de esperar a los demás.
+        """
+        def timed(fn: Callable[[], Any]):
+            t0 = time.perf_counter()
+            out = fn()
+            return out, time.perf_counter() - t0
+
+        futures = {name: self._page_pool.submit(timed, fn) for name, fn in loads.items()}
+        results, seconds, errors = {}, {}, []
+        for name, fut in futures.items():
+            try:
+                results[name], seconds[name] = fut.result()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return results, seconds
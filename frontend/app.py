@@ -5,8 +5,13 @@ import altair as alt
 import plotly.express as px
 import numpy as np
 import re, math, datetime as dt, pandas as pd
-from functools import lru_cache
+from functools import lru_cache, partial
+from urllib.parse import quote
 import os # 
+import threading, time
+from api_cache import ApiCache
+from http_client import HttpClient
+from local_compute import LOCAL_VIEWS, LocalData, read_snapshot
 
 
 def fmt_cop(x):
@@ -84,65 +89,152 @@ div[data-testid="stHorizontalBlock"] ::-webkit-scrollbar-thumb {
 # ============================
 # Helpers
 # ============================
-@st.cache_data(ttl=60)
-def api_get(path: str, **params):
-    url = f"{API}{path}"
-    r = requests.get(url, params=params, timeout=30)
-    r.raise_for_status()
-    return r.json()
-
-@st.cache_data(ttl=300)
-def get_months():
-    series = api_get("/net_worth_series")["series"]
-    months = sorted({row["month"] for row in series})
-    return months
-
-@st.cache_data(ttl=60)
-def get_summary(month):
-    return api_get("/summary", month=month)
-
-@st.cache_data(ttl=60)
-def get_donut(month):
-    return api_get("/expenses_donut", month=month)
-
-@st.cache_data(ttl=60)
-def get_top_expenses(month, n=10):
-    return api_get("/top_expenses", month=month, n=n)
-
-@st.cache_data(ttl=60)
-def get_budget_progress(month):
-    return api_get("/budget_progress", month=month)
-
-@st.cache_data(ttl=300)
-def get_networth():
-    return api_get("/net_worth_series")["series"]
+# Cada cuánto se revisa /version; las respuestas valen hasta que cambie una tabla que usan
+VERSION_POLL_SECONDS = float(os.environ.get("VERSION_POLL_SECONDS", "5"))
+# Plazo total de cada pedido a la API, reintentos incluidos; el snapshot completo tiene el suyo
+API_DEADLINE = float(os.environ.get("API_DEADLINE_SECONDS", "10"))
+SNAPSHOT_DEADLINE = float(os.environ.get("SNAPSHOT_DEADLINE_SECONDS", "120"))
+# Tope de la caché de respuestas (LRU): cantidad de entradas y bytes de los cuerpos
+API_CACHE_MAX_ENTRIES = int(os.environ.get("API_CACHE_MAX_ENTRIES", "512"))
+API_CACHE_MAX_BYTES = int(os.environ.get("API_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+@st.cache_resource
+def api_cache():
+    # Compartida entre sesiones y reruns: un solo pool de conexiones keep-alive (ver http_client.py)
+    return ApiCache(API, HttpClient(deadline=API_DEADLINE), poll_seconds=VERSION_POLL_SECONDS,
+                    max_entries=API_CACHE_MAX_ENTRIES, max_bytes=API_CACHE_MAX_BYTES)
 
-@st.cache_data(ttl=300)
-def get_inv_history():
-    return api_get("/investments_history")["history"]
-
-@st.cache_data(ttl=300)
-def get_inv_alloc():
-    return api_get("/investments_alloc")
-
-@st.cache_data(ttl=300)
-def get_goals():
-    return api_get("/goals")["goals"]
+def api_get(path: str, **params):
+    return api_cache().get(path, **params)
+
+# Vistas de /dashboard que necesita cada página (todas llevan "summary" por el encabezado)
+PAGE_VIEWS = {
+    "1": ("summary",),
+    "2": ("summary", "donut", "top"),
+    "3": ("summary", "budget", "budget_forecast"),
+    "4": ("summary", "net_worth"),
+    "5": ("summary", "investments_history", "investments_alloc"),
+    "6": ("summary", "goals"),
+}
+PAGES = ["1 · Resumen", "2 · Gastos", "3 · Presupuesto", "4 · Patrimonio", "5 · Inversiones", "6 · Metas"]
+
+# Modo local: se baja el dataset una vez (/snapshot.arrow) y las vistas que dependen
+# del mes se calculan acá; cambiar de mes no va a la API
+LOCAL_COMPUTE = os.environ.get("LOCAL_COMPUTE", "0") == "1"
+
+@st.cache_resource
+def _snapshot_store():
+    # Compartido entre sesiones: LocalData y las versiones de las tablas de las que salió
+    return {"lock": threading.Lock(), "versions": None, "data": None, "etag": None}
+
+def load_local_data(cache, store):
+    # Sin llamadas a Streamlit: corre en los hilos de carga de la página
+    versions = cache.versions()
+    with store["lock"]:
+        if store["data"] is None or store["versions"] != versions:
+            # Revalida con el ETag anterior: si el dataset no cambió llega un 304 sin el snapshot
+            headers = {"If-None-Match": store["etag"]} if store["data"] is not None and store["etag"] else None
+            r = cache.client.get(f"{API}/snapshot.arrow", headers=headers, deadline=SNAPSHOT_DEADLINE)
+            if not (r.status_code == 304 and headers):
+                r.raise_for_status()
+                store["data"] = LocalData(read_snapshot(r.content))
+                store["etag"] = r.headers.get("ETag")
+            store["versions"] = versions
+        return store["data"]
+
+def dashboard_request(month, views, n=10, local_mode=False):
+    """(path, params) de lo que una página pide a la API; None si todo se calcula localmente."""
+    if local_mode:
+        views = tuple(v for v in views if v not in LOCAL_VIEWS)
+        if not views:
+            return None
+        # De las que quedan solo budget_forecast depende del mes; sin él la respuesta sirve para todos
+        if "budget_forecast" not in views:
+            month = None
+    return "/dashboard", {"month": month, "views": ",".join(views), "n": n}
+
+def prefetch_around(months, month, page_key, n=10, local_mode=False):
+    """En segundo plano: la página actual en los meses vecinos y las demás páginas en este mes."""
+    i = months.index(month)
+    wanted = [(m, PAGE_VIEWS[page_key]) for m in months[max(i - 1, 0):i + 2] if m != month]
+    wanted += [(month, views) for key, views in PAGE_VIEWS.items() if key != page_key]
+    reqs = [dashboard_request(m, views, n, local_mode) for m, views in wanted]
+    api_cache().prefetch(r for r in reqs if r is not None)
+
+def simulate_goal(cache, goal, contribution, months=None):
+    # Monte Carlo en el backend (memorizado allá por parámetros). Sin llamadas a
+    # Streamlit: corre en los hilos de carga de la página
+    params = {"contribution": contribution}
+    if months:
+        params["months"] = months
+    return cache.get(f"/goals/{quote(goal, safe='')}/simulate", **params)["simulations"][0]
+
+def goal_key(i, goal):
+    # clave segura para widgets (evita choques si hay espacios/acentos)
+    slug = re.sub(r"\W+", "_", str(goal)).lower()
+    return f"{i}_{slug}"
 
 # ============================
 # Sidebar / Navigation
 # ============================
 st.sidebar.title("📊 Finanzas Personales")
-months = get_months()
+local_mode = st.sidebar.checkbox("Cálculo local", value=LOCAL_COMPUTE,
+                                 help="Baja el dataset una vez (Arrow) y calcula acá las vistas del mes; cambiar de mes no va a la API")
+
+# Todo lo que necesita la página se pide a la vez. El mes y la vista elegidos ya están en
+# session_state al hacer el rerun; la primera vez se pide el último mes (sin `month`)
+t_page = time.perf_counter()
+topn = st.session_state.get("topn", 10)
+cache, snapshot_store = api_cache(), _snapshot_store()
+early_req = dashboard_request(st.session_state.get("mes"), PAGE_VIEWS[st.session_state.get("vista", PAGES[0])[0]],
+                              topn, local_mode)
+loads = ({"snapshot": lambda: load_local_data(cache, snapshot_store)} if local_mode
+         else {"months": lambda: cache.get("/months")["months"]})
+if early_req is not None:
+    loads["dashboard"] = lambda: cache.get(early_req[0], **early_req[1])
+try:
+    loaded, fetch_seconds = cache.gather(loads)
+except requests.RequestException as e:
+    st.error(f"No se pudo contactar la API ({API}): {e}")
+    st.stop()
+
+local = loaded.get("snapshot")
+months = local.months if local is not None else loaded["months"]
 def_month = months[-1] if months else None
-selected_month = st.sidebar.selectbox("Mes", months, index=len(months)-1)
-page = st.sidebar.radio("Vistas", [
-    "1 · Resumen", "2 · Gastos", "3 · Presupuesto",
-    "4 · Patrimonio", "5 · Inversiones", "6 · Metas"
-])
+selected_month = st.sidebar.selectbox("Mes", months, index=len(months)-1, key="mes")
+page = st.sidebar.radio("Vistas", PAGES, key="vista")
 
 st.sidebar.caption(f"API: {API}")
 
+# Datos de toda la página (encabezado incluido): lo de la API salvo que la selección haya cambiado
+req = dashboard_request(selected_month, PAGE_VIEWS[page[0]], topn, local_mode)
+early = loaded.get("dashboard")
+if early is not None and req is not None and (req == early_req or (
+        early_req[1]["month"] is None and early["month"] == selected_month and req[1]["views"] == early_req[1]["views"])):
+    api_views = early["views"]
+elif req is not None:
+    t0 = time.perf_counter()
+    try:
+        api_views = api_get(req[0], **req[1])["views"]
+    except requests.RequestException as e:
+        st.error(f"No se pudo contactar la API ({API}): {e}")
+        st.stop()
+    fetch_seconds["dashboard"] = time.perf_counter() - t0
+else:
+    api_views = {}
+dash = {**(local.dashboard(selected_month, PAGE_VIEWS[page[0]], n=topn) if local is not None else {}), **api_views}
+
+page_ms = (time.perf_counter() - t_page) * 1000
+st.sidebar.caption(f"Datos de la página: {page_ms:.0f} ms (" +
+                   ", ".join(f"{name} {sec * 1000:.0f} ms" for name, sec in fetch_seconds.items()) + ")")
+if cache.client.state != "closed":
+    st.sidebar.warning("La API no responde: se esperan unos segundos antes de volver a llamarla.")
+
+# Al elegir otro mes (o página) se adelanta lo que probablemente se vea después
+if st.session_state.get("_prefetched") != (selected_month, page[0], local_mode):
+    st.session_state["_prefetched"] = (selected_month, page[0], local_mode)
+    prefetch_around(months, selected_month, page[0], n=topn, local_mode=local_mode)
+
 # =============================
 # Encabezado principal del Dashboard con resumen
 # =============================
@@ -151,7 +243,7 @@ from datetime import datetime
 hoy = datetime.now().strftime("%d/%m/%Y")
 
 # Traemos KPIs para el mes seleccionado
-s_head = get_summary(selected_month)
+s_head = dash["summary"]
 k_head = s_head["kpis"]
 balance = float(k_head["ingresos_mes"] - k_head["gastos_mes"])
 saldo_txt = "Balance positivo" if balance >= 0 else "Balance negativo"
@@ -308,7 +400,7 @@ if page.startswith("1"):
         </style>
     """, unsafe_allow_html=True)
 
-    s = get_summary(selected_month)
+    s = dash["summary"]
     k = s["kpis"]
 
     # KPIs en formato COP
@@ -360,7 +452,7 @@ if page.startswith("1"):
 # ============================
 elif page.startswith("2"):
     st.title("2 · Análisis de gastos")
-    donut_raw = pd.DataFrame(get_donut(selected_month)["donut"])  # category, amount
+    donut_raw = pd.DataFrame(dash["donut"]["donut"])  # category, amount
 
     col1, col2 = st.columns([1,1])
 
@@ -377,8 +469,8 @@ elif page.startswith("2"):
         col1.plotly_chart(fig, use_container_width=True)
 
         # --- Top N (tabla) con COP ---
-        topn = st.slider("Top N gastos", 5, 30, 10, 1)
-        top = pd.DataFrame(get_top_expenses(selected_month, n=topn)["top"])
+        topn = st.slider("Top N gastos", 5, 30, 10, 1, key="topn")
+        top = pd.DataFrame(dash["top"]["top"])
         if not top.empty:
             top = top.rename(columns={
                 "date": "Fecha",
@@ -420,7 +512,7 @@ elif page.startswith("2"):
 # ============================
 elif page.startswith("3"):
     st.title("3 · Seguimiento de presupuesto")
-    prog = pd.DataFrame(get_budget_progress(selected_month)["progress"])  # month, category, limit, spent, pct, status
+    prog = pd.DataFrame(dash["budget"]["progress"])  # month, category, limit, spent, pct, status
     st.caption("Verde ≤80%, Amarillo 80–100%, Rojo >100%")
 
     # Aviso de categorías excedidas
@@ -488,12 +580,32 @@ elif page.startswith("3"):
 
     st.altair_chart(bars + rule80 + rule100, use_container_width=True)
 
+    # --- Proyección al cierre del mes (ritmo de gasto diario) ---
+    fc = pd.DataFrame(dash["budget_forecast"]["forecast"])
+    if not fc.empty and (fc["as_of_day"] < fc["days_in_month"]).any():
+        st.subheader("Proyección al cierre del mes")
+        st.caption(f"Al ritmo de gasto hasta el día {int(fc['as_of_day'].iloc[0])} de {int(fc['days_in_month'].iloc[0])}.")
+        riesgo = fc[(fc["status"] == "red") & ~fc["exceeded"]]
+        if not riesgo.empty:
+            st.warning("Se excederían: " + ", ".join(
+                f"{r.category} (≈ día {int(r.exceed_day)})" if pd.notna(r.exceed_day) else r.category
+                for r in riesgo.itertuples()))
+        fc_disp = fc[["category", "limit", "spent", "projected", "projected_pct", "exceed_day"]].rename(columns={
+            "category": "Categoría", "limit": "Límite", "spent": "Gasto a la fecha",
+            "projected": "Proyectado", "projected_pct": "% Proyectado", "exceed_day": "Día en que se excede",
+        })
+        st.dataframe(
+            fc_disp.style.format({"Límite": fmt_cop, "Gasto a la fecha": fmt_cop, "Proyectado": fmt_cop,
+                                  "% Proyectado": "{:.1f}%", "Día en que se excede": "{:.0f}"}, na_rep="—"),
+            use_container_width=True, hide_index=True,
+        )
+
 # ============================
 # 4) Evolución del Patrimonio Neto
 # ============================
 elif page.startswith("4"):
     st.title("4 · Evolución del patrimonio neto")
-    series = pd.DataFrame(get_networth())
+    series = pd.DataFrame(dash["net_worth"]["series"])
 
     if not series.empty:
         # Asegurar que los nombres de columnas son correctos y numéricos
@@ -617,8 +729,8 @@ elif page.startswith("4"):
 # ============================
 elif page.startswith("5"):
     st.title("5 · Inversiones")
-    hist = pd.DataFrame(get_inv_history())  # month, value, ret_acum
-    alloc = get_inv_alloc()
+    hist = pd.DataFrame(dash["investments_history"]["history"])  # month, value, ret_acum
+    alloc = dash["investments_alloc"]
     aldf = pd.DataFrame(alloc["allocation"])  # asset, units, price, value, weight_pct
 
     c1, c2 = st.columns([1.4, 1])
@@ -777,7 +889,7 @@ elif page.startswith("5"):
 # ============================
 else:
     st.title("6 · Metas y ahorros")
-    goals = pd.DataFrame(get_goals())
+    goals = pd.DataFrame(dash["goals"]["goals"])
 
     if goals.empty:
         st.info("Sin metas registradas.")
@@ -798,12 +910,23 @@ else:
         st.divider()
         st.subheader("Progreso por meta")
 
-        # ---------- IMPORTANTE: TODO lo que sigue va DENTRO del for -----------
+        # Las simulaciones de todas las metas se piden a la vez, con lo que ya tienen sus
+        # widgets en session_state (mismos valores por defecto que los number_input de abajo)
+        sim_loads = {}
         for i, row in goals.iterrows():
+            safe = goal_key(i, row["goal"])
+            aporte_mc = st.session_state.get(f"aporte_mc_{safe}", st.session_state.get(f"aporte_{safe}", 0.0))
+            meses_mc = st.session_state.get(f"meses_mc_{safe}", 0)
+            sim_loads[safe] = partial(simulate_goal, cache, row["goal"], float(aporte_mc), int(meses_mc) or None)
+        try:
+            sims, _ = cache.gather(sim_loads)
+        except requests.RequestException as e:
+            st.error(f"No se pudo contactar la API ({API}): {e}")
+            st.stop()
 
-            # clave segura para widgets (evita choques si hay espacios/acentos)
-            slug = re.sub(r"\W+", "_", str(row["goal"])).lower()
-            safe = f"{i}_{slug}"
+        # ---------- IMPORTANTE: TODO lo que sigue va DENTRO del for -----------
+        for i, row in goals.iterrows():
+            safe = goal_key(i, row["goal"])
 
             objetivo = float(row["target_amount"])
             actual   = float(row["current_savings"])
@@ -821,7 +944,8 @@ else:
 
                 # --- Simuladores (dos pestañas) ---
                 with st.expander("Simuladores"):
-                    tab1, tab2 = st.tabs(["💵 Aportar cada mes", "🗓️ Cumplir en una fecha"])
+                    tab1, tab2, tab3 = st.tabs(["💵 Aportar cada mes", "🗓️ Cumplir en una fecha",
+                                                "🎲 Probabilidad (con retornos)"])
 
                     # ---------------------------
                     # Tab 1: Aportar cada mes
@@ -886,3 +1010,37 @@ else:
                             )
                             st.write(f"Proyección a esa fecha: ahorro **{fmt_cop(ahorro_proj)}** → avance **{progreso_proj:.1f}%**.")
                             st.progress(min(1.0, progreso_proj/100.0))
+
+                    # ---------------------------
+                    # Tab 3: Monte Carlo (backend)
+                    # ---------------------------
+                    with tab3:
+                        cM1, cM2 = st.columns([1,1])
+                        # Sus valores ya se usaron arriba (sims); acá solo se muestran
+                        cM1.number_input(
+                            "Aporte mensual ($COP)", min_value=0.0, step=50_000.0, format="%.2f",
+                            value=float(st.session_state.get(f"aporte_{safe}", 0.0)), key=f"aporte_mc_{safe}"
+                        )
+                        cM2.number_input(
+                            "Horizonte en meses (0 = hasta la fecha objetivo)",
+                            min_value=0, value=0, step=1, key=f"meses_mc_{safe}"
+                        )
+                        sim = sims[safe]
+
+                        m1, m2 = st.columns(2)
+                        m1.metric("Probabilidad de cumplir", f"{sim['probability_of_success_pct']:.1f}%")
+                        mediana = sim["median_months_to_target"]
+                        m2.metric("Meses hasta la meta (mediana)", "—" if mediana is None else str(mediana))
+                        st.caption(f"{sim['paths']:,} escenarios desde {sim['start_month']} con retornos mensuales "
+                                   f"históricos del portafolio.")
+
+                        curves = pd.DataFrame(sim["curves"])
+                        if not curves.empty:
+                            base = alt.Chart(curves).encode(x=alt.X("month:N", title="Mes"))
+                            chart = (
+                                base.mark_area(opacity=0.15).encode(y=alt.Y("p5:Q", title="Ahorro ($)"), y2="p95:Q")
+                                + base.mark_area(opacity=0.3).encode(y="p25:Q", y2="p75:Q")
+                                + base.mark_line().encode(y="p50:Q")
+                                + alt.Chart(pd.DataFrame({"y": [objetivo]})).mark_rule(strokeDash=[4, 4]).encode(y="y:Q")
+                            )
+                            st.altair_chart(chart, use_container_width=True)
@@ -0,0 +1,138 @@
+"""
+Cliente HTTP del frontend: conexiones keep-alive, plazos, reintentos acotados
+y circuit breaker.
+
+- Un solo `requests.Session` con un pool de conexiones compartido por todas
+  las sesiones y reruns de Streamlit (y por los hilos de precarga): no se
+  abre una conexión TCP/TLS nueva por pedido.
+- Cada pedido tiene un plazo total (`deadline`); los reintentos solo se
+  hacen si queda tiempo, con espera exponencial (o el `Retry-After` del 503).
+- Presupuesto de reintentos: cada pedido suma `retry_ratio` fichas (hasta
+  `retry_burst`) y cada reintento gasta una, así una API caída no recibe el
+  doble o triple de tráfico.
+- Circuit breaker: tras `failure_threshold` pedidos fallidos seguidos (error de
+  conexión, plazo vencido o respuesta 5xx) se deja de llamar a la API por
+  `reset_seconds` (`CircuitOpen`); después pasa un solo pedido de prueba y, si
+  sale bien, se vuelve a la normalidad.
+"""
+from typing import Dict, Optional
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Respuestas que vale la pena reintentar (la API reinicia o está saturada)
+RETRY_STATUS = frozenset({502, 503, 504})
+
+
+class CircuitOpen(requests.ConnectionError):
+    pass
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: requests.Response):
+        self.response = response
+
+
+class HttpClient:
+    def __init__(self, pool_size: int = 8, deadline: float = 10.0, connect_timeout: float = 3.05,
+                 retries: int = 2, backoff: float = 0.1, retry_ratio: float = 0.1, retry_burst: float = 10.0,
+                 failure_threshold: int = 5, reset_seconds: float = 15.0):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_ratio = retry_ratio
+        self.retry_burst = retry_burst
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._tokens = retry_burst
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    # ---------------- Circuit breaker ---------------- #
+    def _admit(self) -> bool:
+        """Si el pedido puede salir; True si además es el pedido de prueba con el circuito medio abierto."""
+        with self._lock:
+            self._tokens = min(self.retry_burst, self._tokens + self.retry_ratio)
+            if self._opened_at is None:
+                return False
+            left = self.reset_seconds - (time.monotonic() - self._opened_at)
+            if self._probing or left > 0:
+                raise CircuitOpen(f"API no disponible: {self._failures} fallas seguidas; "
+                                  f"se vuelve a probar en {max(left, 0):.1f} s")
+            self._probing = True
+            return True
+
+    def _record(self, ok: bool, probe: bool) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+            if ok:
+                self._failures, self._opened_at = 0, None
+                return
+            self._failures += 1
+            if probe or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def _spend_retry(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.reset_seconds else "open"
+
+    # ---------------- Pedidos ---------------- #
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            deadline: Optional[float] = None) -> requests.Response:
+        """`GET url` con plazo total `deadline` (segundos) y reintentos si el presupuesto y el plazo alcanzan.
+
+        Los 4xx se devuelven tal cual (no cuentan como falla de la API); los 5xx
+        también se devuelven, pero cuentan como falla para el circuit breaker.
+        """
+        probe = self._admit()
+        until = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+        while True:
+            remaining = until - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise requests.Timeout(f"Plazo vencido para {url}")
+                r = self.session.get(url, headers=headers,
+                                     timeout=(min(self.connect_timeout, remaining), remaining))
+                if r.status_code in RETRY_STATUS:
+                    raise _RetryableStatus(r)
+                # Un 5xx sin reintento (p.ej. 500) es una falla de la API aunque haya respuesta
+                self._record(r.status_code < 500, probe)
+                return r
+            except (requests.ConnectionError, requests.Timeout, _RetryableStatus) as e:
+                wait = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+                if isinstance(e, _RetryableStatus):
+                    retry_after = e.response.headers.get("Retry-After", "")
+                    wait = max(wait, float(retry_after)) if retry_after.isdigit() else wait
+                if (attempt >= self.retries or time.monotonic() + wait >= until
+                        or not self._spend_retry()):
+                    self._record(False, probe)
+                    if isinstance(e, _RetryableStatus):
+                        return e.response
+                    raise
+                time.sleep(wait)
+                attempt += 1
+            except Exception:
+                self._record(False, probe)
+                raise
@@ -0,0 +1,167 @@
+"""
+Modo de cálculo local: las vistas del dashboard a partir de `/snapshot.arrow`.
+
+`read_snapshot` abre los streams Arrow del snapshot (uno por tabla) y
+`LocalData` prepara una vez por versión los agregados por mes y la
+valuación del portafolio; después, cambiar de mes es una búsqueda en esos
+agregados, sin ir a la API. Cada vista devuelve el mismo cuerpo que su
+endpoint en el backend (ver backend/views.py) para que las páginas no
+distingan de dónde vienen los datos.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Vistas de /dashboard que se calculan en el cliente; el resto se pide a la API
+LOCAL_VIEWS = ("summary", "donut", "top", "budget", "investments_history", "investments_alloc")
+
+
+def read_snapshot(body: bytes) -> Dict[str, pd.DataFrame]:
+    """Tabla (nombre del CSV) -> DataFrame, con los tipos del backend."""
+    src = pa.input_stream(pa.py_buffer(body))
+    tables = {}
+    while src.tell() < len(body):
+        with pa.ipc.open_stream(src) as reader:
+            table = reader.read_all()
+        tables[table.schema.metadata[b"table"].decode()] = table.to_pandas()
+    return tables
+
+
+def _units_as_of(hold: pd.DataFrame, frame: pd.DataFrame) -> np.ndarray:
+    """Unidades de `frame["asset"]` vigentes en `frame["date"]` (movimientos con `date`
+    acumulados; sin fecha valen desde siempre, como en backend/networth.py)."""
+    if "date" not in hold:
+        return frame["asset"].map(hold.groupby("asset")["units"].sum()).fillna(0.0).to_numpy(dtype=float)
+    moves = (
+        hold.assign(date=hold["date"].fillna(pd.Timestamp.min).astype("datetime64[ns]"))
+            .groupby(["date", "asset"], as_index=False)["units"].sum()
+            .sort_values("date", kind="stable")
+    )
+    moves["units"] = moves.groupby("asset")["units"].cumsum()
+    left = frame[["date", "asset"]].astype({"date": "datetime64[ns]"}).reset_index()
+    out = pd.merge_asof(left.sort_values("date", kind="stable"), moves, on="date", by="asset")
+    return out.set_index("index")["units"].reindex(left["index"]).fillna(0.0).to_numpy(dtype=float)
+
+
+class LocalData:
+    """Agregados de un snapshot, armados una sola vez (todo vectorizado)."""
+
+    def __init__(self, tables: Dict[str, pd.DataFrame]):
+        tx = tables["transactions.csv"]
+        self.tx = tx
+        self.budgets = tables["budgets.csv"]
+        self.prices = tables["investments_prices.csv"]
+        self.hold = tables["investments_holdings.csv"]
+
+        # -------- Por mes: totales, filas y gasto por categoría -------- #
+        self.totals = (
+            tx.groupby(["month", "type"], observed=True)["amount"].sum()
+              .unstack(fill_value=0.0)
+              .reindex(columns=["Ingreso", "Gasto"], fill_value=0.0)
+        )
+        self.rows = tx.groupby("month").size()
+        self.gastos = tx[tx["type"] == "Gasto"]
+        self.gastos_cat = (
+            self.gastos.groupby(["month", "category"], observed=True)["amount"].sum()
+                       .rename_axis(["month", "category"]).reset_index()
+                       .sort_values(["month", "amount"], ascending=[True, False], kind="stable")
+        )
+        self.months = sorted(self.rows.index)
+
+        # -------- Portafolio: valor mensual y posiciones actuales -------- #
+        port = self.prices[self.prices["asset"].isin(self.hold["asset"])].copy()
+        port["value"] = port["price"].to_numpy(dtype=float) * _units_as_of(self.hold, port)
+        port["month"] = port["date"].dt.to_period("M").astype(str)
+        self.portfolio_monthly = port.groupby("month", as_index=False)["value"].sum()
+
+        hold_dates = self.hold["date"].dropna() if "date" in self.hold else pd.Series(dtype="datetime64[ns]")
+        self.last_position = max([d.max() for d in (self.prices["date"], hold_dates) if len(d)], default=None)
+        # Patrimonio "actual": a la última fecha con movimientos o precios
+        self.last_date = max([d.max() for d in (tx["date"], self.prices["date"]) if len(d)], default=None)
+        signed = np.where(tx["type"] == "Ingreso", tx["amount"], np.where(tx["type"] == "Gasto", -tx["amount"], 0.0))
+        self.cumulative_cash = float(signed.sum())
+        # Valor del portafolio a esa fecha (el de `summary` en cualquier mes)
+        self.current_value = float(self.positions(self.last_date)["value"].sum()) if self.last_date is not None else 0.0
+
+    def positions(self, when: pd.Timestamp) -> pd.DataFrame:
+        """asset, units, price, value, weight_pct en `when` (último precio conocido)."""
+        last = self.prices[self.prices["date"] <= when].sort_values("date", kind="stable").groupby("asset").tail(1)
+        frame = pd.DataFrame({"date": when, "asset": last["asset"].to_numpy()})
+        alloc = pd.DataFrame({"asset": last["asset"].astype(str).to_numpy(), "units": _units_as_of(self.hold, frame),
+                              "price": last["price"].to_numpy(dtype=float)})
+        alloc = alloc[(alloc["units"] != 0) & np.isfinite(alloc["price"])]
+        alloc["value"] = alloc["units"] * alloc["price"]
+        total = alloc["value"].sum()
+        alloc["weight_pct"] = alloc["value"] / total * 100 if total else 0.0
+        return alloc.sort_values("value", ascending=False).reset_index(drop=True)
+
+    # ---------------- Vistas (mismo cuerpo que el backend) ---------------- #
+    def summary(self, month: str) -> Dict[str, Any]:
+        ingresos = float(self.totals["Ingreso"].get(month, 0.0))
+        gastos = float(self.totals["Gasto"].get(month, 0.0))
+        neto_mes = ingresos - gastos
+        value = self.current_value
+        return {
+            "month": month,
+            "kpis": {
+                "ingresos_mes": ingresos,
+                "gastos_mes": gastos,
+                "neto_mes": neto_mes,
+                "patrimonio_actual": self.cumulative_cash + value,
+                "efectivo_acumulado": self.cumulative_cash,
+                "valor_inversiones": value,
+            },
+            "waterfall": [
+                {"label": "Inicio", "value": 0},
+                {"label": "Ingresos", "value": ingresos},
+                {"label": "Gastos", "value": -gastos},
+                {"label": "Neto mes", "value": neto_mes},
+            ],
+            "rows_mes": int(self.rows.get(month, 0)),
+        }
+
+    def donut(self, month: str) -> Dict[str, Any]:
+        cat = self.gastos_cat[self.gastos_cat["month"] == month]
+        return {"month": month, "donut": cat[["category", "amount"]].reset_index(drop=True)}
+
+    def top(self, month: str, n: int = 10) -> Dict[str, Any]:
+        dfm = self.gastos[self.gastos["month"] == month].nlargest(n, "amount")
+        dfm["date"] = dfm["date"].dt.strftime("%Y-%m-%d")
+        return {"month": month, "top": dfm}
+
+    def budget(self, month: str) -> Dict[str, Any]:
+        spent = self.gastos_cat[self.gastos_cat["month"] == month][["category", "amount"]]
+        lim = self.budgets[self.budgets["month"] == month]
+        df = lim.merge(spent.rename(columns={"amount": "spent"}), on="category", how="left").fillna({"spent": 0.0})
+        df["pct"] = (df["spent"] / df["limit"]).replace([np.inf, -np.inf], 0).fillna(0) * 100
+        df["status"] = np.select([df["pct"] <= 80, df["pct"] <= 100], ["green", "amber"], default="red")
+        return {"month": month, "progress": df.sort_values("pct", ascending=False)}
+
+    def investments_history(self) -> Dict[str, Any]:
+        df = self.portfolio_monthly.sort_values("month")
+        base = float(df["value"].iloc[0]) if len(df) else 1.0
+        df["ret_acum"] = (df["value"] / base - 1.0) * 100
+        return {"history": df}
+
+    def investments_alloc(self) -> Dict[str, Any]:
+        if self.last_position is None:
+            return {"as_of": None, "allocation": pd.DataFrame(columns=["asset", "units", "price", "value", "weight_pct"]),
+                    "total_value": 0.0}
+        alloc = self.positions(self.last_position)
+        return {"as_of": self.last_position.strftime("%Y-%m-%d"), "allocation": alloc,
+                "total_value": float(alloc["value"].sum())}
+
+    def dashboard(self, month: Optional[str], views: Iterable[str], n: int = 10) -> Dict[str, Any]:
+        """Las vistas de `LOCAL_VIEWS` pedidas, como `/dashboard` en el backend."""
+        month = month or (self.months[-1] if self.months else None)
+        build = {
+            "summary": lambda: self.summary(month),
+            "donut": lambda: self.donut(month),
+            "top": lambda: self.top(month, n),
+            "budget": lambda: self.budget(month),
+            "investments_history": self.investments_history,
+            "investments_alloc": self.investments_alloc,
+        }
+        return {v: build[v]() for v in views if v in build}